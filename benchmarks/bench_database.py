@@ -0,0 +1,244 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of database operations and of processing steps that use database.
+
+Require PostgreSQL - see `db_conn_str` fixture.
+"""
+# pylint: disable=redefined-outer-name,protected-access
+import queue
+import typing as ty
+from configparser import ConfigParser
+
+import datagen
+import pytest
+
+from webmon2 import database, filters, model, worker
+
+_USERS = 2
+_SOURCES = 10
+_ENTRIES = 100
+
+
+@pytest.fixture(scope="module")
+def dataset(bench_db: str) -> ty.List[model.Source]:
+    with database.DB.get() as db:
+        return datagen.populate(db, _USERS, _SOURCES, _ENTRIES, seed=1)
+
+
+@pytest.mark.parametrize("count", [10, 100])
+@pytest.mark.benchmark(group="db-save_many")
+def bench_save_many(benchmark, db, dataset, gen, count):
+    source = dataset[0]
+    template = gen.entries(source, count)
+
+    def setup():
+        return ([entry.clone() for entry in template],), {}
+
+    def run(entries):
+        database.entries.save_many(db, entries)
+
+    benchmark.pedantic(run, setup=setup, rounds=20)
+
+
+@pytest.mark.parametrize(
+    "shape", [database.entries.SHAPE_FULL, database.entries.SHAPE_LIST]
+)
+@pytest.mark.parametrize("scope", ["all", "group", "source"])
+@pytest.mark.benchmark(group="db-find")
+def bench_find(benchmark, db, dataset, scope, shape):
+    source = dataset[0]
+    kwargs: ty.Dict[str, ty.Any] = {"unread": True, "shape": shape}
+    if scope == "group":
+        kwargs["group_id"] = source.group_id
+    elif scope == "source":
+        kwargs["source_id"] = source.id
+    else:
+        kwargs["limit"] = 100
+
+    def run():
+        return list(database.entries.find(db, source.user_id, **kwargs))
+
+    assert benchmark(run)
+
+
+@pytest.mark.parametrize("name", ["ndiff", "remove_visited"])
+@pytest.mark.benchmark(group="filters-db")
+def bench_db_filter(benchmark, db, dataset, gen, name):
+    source = dataset[0]
+    template = gen.entries(source, 50)
+    fltr = filters.get_filter({"name": name})
+    assert fltr
+    fltr.db = db
+    fltr.validate()
+    prev_state = model.SourceState.new(source.id)
+    curr_state = prev_state.new_ok()
+
+    def setup():
+        return ([entry.clone() for entry in template],), {}
+
+    def run(entries):
+        return list(fltr.filter(entries, prev_state, curr_state))
+
+    benchmark.pedantic(run, setup=setup, rounds=20)
+
+
+@pytest.mark.parametrize("rules", [0, 10, 50])
+@pytest.mark.benchmark(group="scoring")
+def bench_scoring(benchmark, db, dataset, gen, rules):
+    source = dataset[0]
+    database.scoring.save(
+        db,
+        source.user_id,
+        [
+            model.ScoringSett(
+                user_id=source.user_id,
+                pattern=gen.words(2),
+                score_change=idx % 5 - 2,
+            )
+            for idx in range(rules)
+        ],
+    )
+    template = gen.entries(source, 50)
+    fworker = worker.FetchWorker("bench", queue.Queue(), ConfigParser(), None)
+
+    def setup():
+        return ([entry.clone() for entry in template],), {}
+
+    def run(entries):
+        return list(fworker._score_entries(entries, db, source.user_id, {}))
+
+    benchmark.pedantic(run, setup=setup, rounds=20)
+
+
+@pytest.mark.parametrize("view", ["sources", "groups", "next_unread"])
+@pytest.mark.benchmark(group="db-stats")
+def bench_stats_views(benchmark, db, dataset, view):
+    user_id = dataset[0].user_id
+
+    def run():
+        if view == "sources":
+            return database.sources.get_all(db, user_id)
+        if view == "groups":
+            return database.groups.get_all(db, user_id)
+        return database.groups.get_next_unread_group(db, user_id)
+
+    assert benchmark(run)
+
+
+@pytest.mark.benchmark(group="db-stats")
+def bench_stats_refresh(benchmark, db, dataset):
+    source = dataset[0]
+    benchmark(database.stats.refresh, db, (source.id,))
+
+
+@pytest.mark.parametrize("scope", ["ids", "range", "group"])
+@pytest.mark.benchmark(group="db-mark_read")
+def bench_mark_read_many(benchmark, db, dataset, scope):
+    source = dataset[0]
+    with db.cursor() as cur:
+        cur.execute(
+            "SELECT id FROM entries WHERE source_id=%s ORDER BY id",
+            (source.id,),
+        )
+        ids = [row[0] for row in cur]
+
+    kwargs: ty.Dict[str, ty.Any] = {}
+    if scope == "ids":
+        kwargs["ids"] = ids
+    elif scope == "range":
+        kwargs["ranges"] = [(ids[0], ids[-1])]
+        kwargs["source_ids"] = [source.id]
+    else:
+        kwargs["ranges"] = [(None, None)]
+        kwargs["group_ids"] = [source.group_id]
+
+    marks = iter([model.EntryReadMark.READ, model.EntryReadMark.UNREAD] * 1000)
+
+    def run():
+        return database.entries.mark_read_many(
+            db, source.user_id, read=next(marks), **kwargs
+        )
+
+    benchmark.pedantic(run, rounds=50)
+
+
+def _planning_ms(db: database.DB, sql: str, params: ty.Any) -> float:
+    with db.cursor(tuples=True) as cur:
+        cur.execute("EXPLAIN (SUMMARY) " + sql, params)
+        for (line,) in cur:
+            if line.startswith("Planning Time:"):
+                return float(line.split()[2])
+
+    return 0.0
+
+
+@pytest.mark.parametrize("prepared", [False, True])
+@pytest.mark.benchmark(group="db-prepared")
+def bench_fetch_round_queries(benchmark, db, dataset, monkeypatch, prepared):
+    """Frequently executed queries for each source processed in fetch round;
+    `extra_info` contain server planning time that prepared statements save
+    in one round."""
+    monkeypatch.setattr(database.DB, "PREPARE_STATEMENTS", prepared)
+
+    def run():
+        for source in dataset:
+            src = database.sources.get(db, source.id, with_state=True)
+            assert src.state
+            database.settings.get_all(db, source.user_id)
+            database.sources.save_state(db, src.state, source.user_id)
+            database.users.put_log(
+                db, source.user_id, "bench", source_id=source.id
+            )
+
+    benchmark(run)
+
+    source = dataset[0]
+    state = database.sources.get_state(db, source.id)
+    assert state
+    log = model.UserLog(user_id=source.user_id, content="bench")
+    stmts = database.DB.STATEMENTS
+    queries = (
+        ("sources_get", (source.id,)),
+        ("sources_get_state", (source.id,)),
+        ("settings_get_all", (source.user_id,)),
+        ("sources_delete_state", (source.id,)),
+        ("sources_insert_state", model.SourceState.to_row(state)),
+        ("users_put_log", log.to_row()),
+    )
+    planning = sum(
+        _planning_ms(db, stmts[name].sql, params) for name, params in queries
+    )
+    benchmark.extra_info["sources"] = len(dataset)
+    benchmark.extra_info["planning_ms_per_round"] = planning * len(dataset)
+
+
+@pytest.mark.parametrize("batch", [False, True])
+@pytest.mark.benchmark(group="db-user_logs")
+def bench_user_logs(benchmark, db, dataset, batch):
+    """Save one log per source - one by one (as `put_log` without writer)
+    or in one query (as buffered log writer)."""
+    logs = [
+        model.UserLog(
+            user_id=source.user_id, content="bench", related={"sid": source.id}
+        )
+        for source in dataset
+    ]
+
+    def run():
+        if batch:
+            database.users.save_logs(db, logs)
+        else:
+            for log in logs:
+                database.users.save_log(db, log)
+
+        db.commit()
+
+    benchmark(run)
+    benchmark.extra_info["logs"] = len(logs)
@@ -0,0 +1,84 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of filters that do not require database.
+
+Filters using database (ndiff, remove_visited) are benchmarked in
+bench_database.py.
+"""
+import typing as ty
+
+import pytest
+
+from webmon2 import filters, model
+
+# filter name -> configuration
+FILTERS = {
+    "fix_urls": {},
+    "grep": {"pattern": ".*(python|rust)"},
+    "html2text": {},
+    "join": {},
+    "score": {"patterns": "python;rust;go", "score_change": 5},
+    "sort": {},
+    "get-elements-by-re": {"re": "<p.*?</p>"},
+    "strip": {},
+    "compact": {},
+    "head": {"count": 20},
+    "wrap": {"width": 76},
+    "get-elements-by-css": {"sel": "p.text"},
+    "get-elements-by-xpath": {"xpath": "//p"},
+    "get-elements-by-id": {"sel": "sec1"},
+}
+
+# filters known to fail with configuration above; name -> reason
+_BROKEN = {
+    "get-elements-by-re": "split_re compile str pattern with re.LOCALE",
+}
+
+_ENTRIES = 50
+
+
+def _filter_names() -> ty.Iterator[ty.Any]:
+    for name in sorted(FILTERS):
+        if reason := _BROKEN.get(name):
+            # filter creation should fail; when fixed xfail become error
+            xfail = pytest.mark.xfail(
+                reason=reason, raises=ValueError, strict=True
+            )
+            yield pytest.param(name, marks=xfail)
+        else:
+            yield name
+
+
+@pytest.mark.parametrize("name", list(_filter_names()))
+@pytest.mark.benchmark(group="filters")
+def bench_filter(benchmark, gen, name):
+    source = model.Source(user_id=1, name="bench", kind="rss", group_id=1)
+    source.id = 1
+    template = gen.entries(source, _ENTRIES)
+    try:
+        fltr = filters.get_filter({"name": name, **FILTERS[name]})
+    except filters.UnknownFilterException:
+        # optional module not installed
+        pytest.skip(f"filter {name} not available")
+
+    assert fltr
+    fltr.validate()
+    prev_state = model.SourceState.new(1)
+    curr_state = prev_state.new_ok()
+
+    def setup():
+        # filters may modify entries; each round gets fresh copy
+        return ([entry.clone() for entry in template],), {}
+
+    def run(entries):
+        return list(fltr.filter(entries, prev_state, curr_state))
+
+    result = benchmark.pedantic(run, setup=setup, rounds=20)
+    assert isinstance(result, list)
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of content formatters.
+"""
+import pytest
+
+from webmon2 import formatters
+
+_SIZES = [1, 10, 100]
+
+
+@pytest.mark.parametrize("paragraphs", _SIZES)
+@pytest.mark.benchmark(group="sanitize_content")
+def bench_sanitize_html(benchmark, gen, paragraphs):
+    content = gen.html(paragraphs, paragraphs)
+    body, content_type = benchmark(
+        formatters.sanitize_content, content, "html"
+    )
+    assert body
+    assert content_type == "safe"
+
+
+@pytest.mark.parametrize("paragraphs", _SIZES)
+@pytest.mark.benchmark(group="sanitize_content")
+def bench_sanitize_markdown(benchmark, gen, paragraphs):
+    content = "\n\n".join(gen.paragraphs(paragraphs))
+    body, _ = benchmark(formatters.sanitize_content, content, "markdown")
+    assert body
+
+
+@pytest.mark.parametrize("paragraphs", _SIZES)
+@pytest.mark.parametrize("content_type", ["html", "plain"])
+@pytest.mark.benchmark(group="entry_summary")
+def bench_entry_summary(benchmark, gen, paragraphs, content_type):
+    if content_type == "html":
+        content = gen.html(paragraphs, paragraphs)
+    else:
+        content = "\n".join(gen.paragraphs(paragraphs))
+
+    assert benchmark(formatters.entry_summary, content, content_type)
@@ -0,0 +1,81 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of per-fetch setup: looking up source / filter classes and
+creating its instances.
+
+`*-subclass` cases use old lookup by walking class hierarchy
+(`common.find_subclass`), `*-registry` - class registry.
+"""
+import pytest
+
+from webmon2 import common, filters, model, sources
+from webmon2.filters import AbstractFilter
+from webmon2.sources import AbstractSource
+
+_SOURCE_KINDS = ["rss", "url", "github_commits", "gitlab_releases"]
+_FILTER_NAMES = ["html2text", "strip", "sort", "remove_visited"]
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _plugins() -> None:
+    sources.load_plugins()
+    filters.load_plugins()
+
+
+@pytest.mark.benchmark(group="lookup-source")
+def bench_source_subclass(benchmark):
+    def run():
+        for kind in _SOURCE_KINDS:
+            assert common.find_subclass(AbstractSource, kind)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="lookup-source")
+def bench_source_registry(benchmark):
+    def run():
+        for kind in _SOURCE_KINDS:
+            assert sources.get_source_class(kind)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="lookup-filter")
+def bench_filter_subclass(benchmark):
+    def run():
+        for name in _FILTER_NAMES:
+            assert common.find_subclass(AbstractFilter, name)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="lookup-filter")
+def bench_filter_registry(benchmark):
+    def run():
+        for name in _FILTER_NAMES:
+            assert filters.get_filter_class(name)
+
+    benchmark(run)
+
+
+@pytest.mark.benchmark(group="fetch-setup")
+def bench_fetch_setup(benchmark):
+    """Create source and its filters like FetchWorker do for each source."""
+    source = model.Source(user_id=1, name="bench", kind="rss", group_id=1)
+    source.id = 1
+    source.settings = {"url": "http://localhost/"}
+    source.filters = [{"name": name} for name in _FILTER_NAMES]
+
+    def run():
+        src = sources.get_source(source, {})
+        fltrs = [filters.get_filter(conf) for conf in source.filters]
+        return src, fltrs
+
+    benchmark(run)
@@ -0,0 +1,176 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of rendering one page of entries list.
+
+`entry` cases build `model.Entry` from dict rows and attach full sources
+(as `database.entries` did for all lists), `item` cases - compact
+`model.EntryListItem` from tuple rows. Rows are prepared before run, so
+cost of database driver rows is not included (see `bench_database.py`).
+
+Besides time, `extra_info` contains memory allocated while page is
+rendered (`alloc_peak_kb`, from tracemalloc) and size of page objects
+(`page_kb`).
+"""
+# pylint: disable=redefined-outer-name,protected-access
+import os.path
+import tracemalloc
+import typing as ty
+
+import flask_babel
+import pytest
+from flask import Flask, render_template_string
+
+import webmon2
+from webmon2 import conf, model
+from webmon2.database import entries as dbentries
+from webmon2.web import app as webapp
+
+_PAGE = 25
+_SOURCES = 50
+
+_TEMPLATE = """{% import '_render_entry.html' as re %}
+{% for entry in entries %}
+{{ re.render_entry(entry, 'summary', True, webmon2) }}
+{% endfor %}"""
+
+
+@pytest.fixture(scope="module")
+def app() -> Flask:
+    template_folder = os.path.join(
+        os.path.dirname(webmon2.__file__), "web", "templates"
+    )
+    app_ = Flask(__name__, template_folder=template_folder)
+    app_.config["app_conf"] = conf.default_conf()
+    flask_babel.Babel(app_)
+    webapp._register_blueprints(app_)
+    app_.context_processor(lambda: {"webmon2": webmon2})
+    return app_
+
+
+def _make_sources() -> ty.Dict[int, model.Source]:
+    group = model.SourceGroup(name="bench", user_id=1, id=1)
+    srcs = {}
+    for idx in range(1, _SOURCES + 1):
+        source = model.Source(
+            user_id=1, name=f"source {idx}", kind="rss", group_id=1
+        )
+        source.id = idx
+        source.settings = {"url": f"http://localhost/feed/{idx}"}
+        source.filters = [{"name": "strip"}, {"name": "remove_visited"}]
+        source.interval = "1h"
+        source.group = group
+        source.state = model.SourceState.new(idx).new_ok(etag="1234567890")
+        srcs[idx] = source
+
+    return srcs
+
+
+def _make_entries(gen: ty.Any) -> ty.List[model.Entry]:
+    srcs = _make_sources()
+    entries = []
+    for idx in range(_PAGE):
+        entry = gen.entry(srcs[idx % _SOURCES + 1], idx)
+        entry.id = idx + 1
+        entry.content = entry.content[: dbentries._LIST_CONTENT_LENGTH]
+        entries.append(entry)
+
+    return entries
+
+
+def _dict_rows(entries: ty.List[model.Entry]) -> ty.List[ty.Any]:
+    return [entry.to_row() for entry in entries]
+
+
+def _tuple_rows(entries: ty.List[model.Entry]) -> ty.List[ty.Any]:
+    rows = []
+    for entry in entries:
+        rows.append(
+            (
+                entry.id,
+                entry.source_id,
+                entry.updated,
+                entry.created,
+                entry.read_mark.value,
+                int(entry.star_mark),
+                entry.title,
+                entry.url,
+                entry.icon,
+                entry.score,
+                entry.content_type,
+                entry.content,
+                f"source {entry.source_id}",
+                1,
+                "bench",
+                None,
+                f"http://localhost/feed/{entry.source_id}",
+            )
+        )
+
+    return rows
+
+
+def _page_entries(rows: ty.List[ty.Any]) -> ty.List[model.Entry]:
+    # sources are loaded for each page
+    user_sources = _make_sources()
+    return list(dbentries._yield_entries(rows, user_sources))  # type: ignore
+
+
+def _page_items(rows: ty.List[ty.Any]) -> ty.List[model.EntryListItem]:
+    return list(dbentries._yield_items(rows))  # type: ignore
+
+
+_BUILDERS = {
+    "entry": (_dict_rows, _page_entries),
+    "item": (_tuple_rows, _page_items),
+}
+
+
+def _measure(func: ty.Callable[[], ty.Any]) -> ty.Tuple[int, int]:
+    """Return peak memory allocated by `func` and memory retained by its
+    result."""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        result = func()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    del result
+    return peak - base, current - base
+
+
+@pytest.mark.parametrize("kind", ["entry", "item"])
+@pytest.mark.benchmark(group="render-page")
+def bench_build_page(benchmark, gen, kind):
+    make_rows, build = _BUILDERS[kind]
+    rows = make_rows(_make_entries(gen))
+
+    peak, retained = _measure(lambda: build(rows))
+    benchmark.extra_info["alloc_peak_kb"] = peak / 1024
+    benchmark.extra_info["page_kb"] = retained / 1024
+
+    benchmark(build, rows)
+
+
+@pytest.mark.parametrize("kind", ["entry", "item"])
+@pytest.mark.benchmark(group="render-page")
+def bench_render_page(benchmark, app, gen, kind):
+    make_rows, build = _BUILDERS[kind]
+    rows = make_rows(_make_entries(gen))
+
+    def run():
+        return render_template_string(_TEMPLATE, entries=build(rows))
+
+    with app.test_request_context("/"):
+        peak, _retained = _measure(run)
+        benchmark.extra_info["alloc_peak_kb"] = peak / 1024
+        benchmark(run)
@@ -0,0 +1,47 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Benchmarks of loading RSS/Atom feeds.
+"""
+# pylint: disable=redefined-outer-name
+import typing as ty
+
+import pytest
+
+from webmon2 import model, sources
+
+
+def _make_source(url: str, **settings: ty.Any) -> sources.AbstractSource:
+    source = model.Source(user_id=1, name="bench", kind="rss", group_id=1)
+    source.id = 1
+    source.interval = "1h"
+    source.settings = {"url": url, **settings}
+    return sources.get_source(source, {})
+
+
+@pytest.mark.parametrize("items", [10, 100, 500])
+@pytest.mark.parametrize("fmt", ["rss", "atom"])
+@pytest.mark.benchmark(group="rss-load")
+def bench_rss_load(benchmark, feed_server, gen, fmt, items):
+    url, path = feed_server
+    fname = f"{fmt}_{items}.xml"
+    doc = gen.rss(items, url) if fmt == "rss" else gen.atom(items, url)
+    (path / fname).write_text(doc, encoding="utf-8")
+
+    src = _make_source(url + fname, load_content=True)
+    state = model.SourceState.new(1)
+
+    def run():
+        # pylint: disable=protected-access
+        new_state, entries = src._load(state)
+        return new_state, list(entries)
+
+    new_state, entries = benchmark(run)
+    assert new_state.status == model.SourceStateStatus.OK
+    assert len(entries) == items
@@ -0,0 +1,144 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Common fixtures for benchmarks.
+"""
+# pylint: disable=redefined-outer-name
+from __future__ import annotations
+
+import http.server
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import typing as ty
+
+import datagen
+import pytest
+
+from webmon2 import database
+
+try:
+    import pytest_benchmark  # noqa: F401 pylint: disable=unused-import
+except ImportError:
+
+    @pytest.fixture
+    def benchmark() -> ty.Any:
+        pytest.skip("pytest-benchmark not installed")
+
+
+@pytest.fixture
+def gen() -> datagen.Generator:
+    return datagen.Generator(seed=0)
+
+
+class _Handler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args: ty.Any) -> None:
+        pass
+
+
+@pytest.fixture(scope="session")
+def feed_server(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> ty.Iterator[ty.Tuple[str, ty.Any]]:
+    """Serve files from temporary directory over http.
+
+    Return (base url, directory path).
+    """
+    path = tmp_path_factory.mktemp("feeds")
+    handler = _make_handler(str(path))
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", path
+    server.shutdown()
+    server.server_close()
+
+
+def _make_handler(directory: str) -> ty.Type[_Handler]:
+    class Handler(_Handler):
+        def __init__(self, *args: ty.Any, **kwargs: ty.Any) -> None:
+            super().__init__(*args, directory=directory, **kwargs)
+
+    return Handler
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@pytest.fixture(scope="session")
+def db_conn_str(
+    tmp_path_factory: pytest.TempPathFactory,
+) -> ty.Iterator[str]:
+    """Connection string to throwaway database.
+
+    Use database defined by WEBMON2_BENCH_DB environment variable (it
+    should be empty, all data is lost) or create temporary PostgreSQL
+    cluster when `initdb` and `pg_ctl` are available.
+    """
+    conn_str = os.environ.get("WEBMON2_BENCH_DB")
+    if conn_str:
+        yield conn_str
+        return
+
+    if not shutil.which("initdb") or not shutil.which("pg_ctl"):
+        pytest.skip("no WEBMON2_BENCH_DB nor local PostgreSQL")
+
+    path = tmp_path_factory.mktemp("pgdata")
+    datadir = str(path / "data")
+    port = _free_port()
+    subprocess.run(
+        ["initdb", "-A", "trust", "-U", "webmon2", "-D", datadir],
+        check=True,
+        capture_output=True,
+    )
+    sockdir = tempfile.mkdtemp()
+    subprocess.run(
+        [
+            "pg_ctl",
+            "-D",
+            datadir,
+            "-w",
+            "-l",
+            str(path / "log"),
+            "-o",
+            f"-p {port} -k {sockdir} -c fsync=off",
+            "start",
+        ],
+        check=True,
+        capture_output=True,
+    )
+    try:
+        yield f"host=127.0.0.1 port={port} user=webmon2 dbname=postgres"
+    finally:
+        subprocess.run(
+            ["pg_ctl", "-D", datadir, "-m", "immediate", "stop"],
+            check=False,
+            capture_output=True,
+        )
+        shutil.rmtree(sockdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def bench_db(db_conn_str: str) -> str:
+    """Initialize database pool and schema."""
+    database.DB.initialize(db_conn_str, True, 1, 5)
+    return db_conn_str
+
+
+@pytest.fixture
+def db(bench_db: str) -> ty.Iterator[database.DB]:
+    with database.DB.get() as db_:
+        yield db_
+        db_.rollback()
@@ -0,0 +1,222 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Synthetic data generator for benchmarks and load tests.
+
+All data is generated from `random.Random(seed)` so the same seed always
+give the same feeds, pages and entries.
+
+Populate database:
+
+    PYTHONPATH=. python3 benchmarks/datagen.py --database <conn str> \\
+        --users 10 --sources 50 --entries 100
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import logging
+import random
+import typing as ty
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+
+from webmon2 import database, model
+
+_LOG = logging.getLogger(__name__)
+
+_WORDS = (
+    "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua python rust go "
+    "postgresql release security update kernel linux feed server worker "
+    "database network performance memory cache queue thread benchmark"
+).split()
+
+_BASE_DATE = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+class Generator:
+    """Generate synthetic texts, documents and model objects."""
+
+    def __init__(self, seed: int = 0) -> None:
+        self.rnd = random.Random(seed)
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rnd.choice(_WORDS) for _ in range(count))
+
+    def title(self) -> str:
+        return self.words(self.rnd.randint(3, 10)).capitalize()
+
+    def paragraphs(self, count: int) -> ty.List[str]:
+        return [
+            self.words(self.rnd.randint(20, 80)).capitalize() + "."
+            for _ in range(count)
+        ]
+
+    def date(self, idx: int = 0) -> datetime.datetime:
+        return _BASE_DATE + datetime.timedelta(
+            hours=idx, seconds=self.rnd.randint(0, 3599)
+        )
+
+    def html(self, paragraphs: int = 5, links: int = 5) -> str:
+        """Generate html page with some noise (scripts, styles, links)."""
+        body = []
+        for idx, para in enumerate(self.paragraphs(paragraphs)):
+            body.append(f"<h2 id='sec{idx}'>{escape(self.title())}</h2>")
+            body.append(f"<p class='text'>{escape(para)}</p>")
+
+        body.extend(
+            f"<a href='/page/{idx}?q={self.rnd.randint(0, 1000)}'>"
+            f"{escape(self.title())}</a>"
+            for idx in range(links)
+        )
+        return (
+            "<html><head><title>"
+            + escape(self.title())
+            + "</title><style>p {color: red}</style>"
+            "<script>var x = 1;</script></head><body><div id='main'>"
+            + "\n".join(body)
+            + "</div></body></html>"
+        )
+
+    def rss(self, items: int, url: str = "http://localhost/") -> str:
+        """Generate RSS 2.0 document with `items` items."""
+        parts = [
+            "<?xml version='1.0' encoding='UTF-8'?>",
+            "<rss version='2.0'><channel>",
+            f"<title>{escape(self.title())}</title>",
+            f"<link>{escape(url)}</link>",
+            "<description>Synthetic feed</description>",
+        ]
+        for idx in range(items):
+            date = format_datetime(self.date(idx))
+            parts.append(
+                "<item>"
+                f"<title>{escape(self.title())}</title>"
+                f"<link>{escape(url)}item/{idx}</link>"
+                f"<guid>{escape(url)}item/{idx}</guid>"
+                f"<pubDate>{date}</pubDate>"
+                f"<description>{escape(self.html(2, 2))}</description>"
+                "</item>"
+            )
+
+        parts.append("</channel></rss>")
+        return "\n".join(parts)
+
+    def atom(self, items: int, url: str = "http://localhost/") -> str:
+        """Generate Atom document with `items` entries."""
+        parts = [
+            "<?xml version='1.0' encoding='UTF-8'?>",
+            "<feed xmlns='http://www.w3.org/2005/Atom'>",
+            f"<title>{escape(self.title())}</title>",
+            f"<link href='{escape(url)}'/>",
+            f"<id>{escape(url)}</id>",
+            f"<updated>{self.date(items).isoformat()}</updated>",
+        ]
+        for idx in range(items):
+            parts.append(
+                "<entry>"
+                f"<title>{escape(self.title())}</title>"
+                f"<link href='{escape(url)}entry/{idx}'/>"
+                f"<id>{escape(url)}entry/{idx}</id>"
+                f"<updated>{self.date(idx).isoformat()}</updated>"
+                f"<content type='html'>{escape(self.html(2, 2))}</content>"
+                "</entry>"
+            )
+
+        parts.append("</feed>")
+        return "\n".join(parts)
+
+    def entry(
+        self, source: model.Source, idx: int, paragraphs: int = 3
+    ) -> model.Entry:
+        entry = model.Entry.for_source(source)
+        entry.title = self.title()
+        entry.url = f"http://localhost/source/{source.id}/entry/{idx}"
+        entry.content = self.html(paragraphs, 3)
+        entry.set_opt("content-type", "html")
+        entry.updated = entry.created = self.date(idx)
+        entry.status = model.EntryStatus.NEW
+        entry.calculate_oid()
+        return entry
+
+    def entries(
+        self, source: model.Source, count: int, paragraphs: int = 3
+    ) -> ty.List[model.Entry]:
+        return [self.entry(source, idx, paragraphs) for idx in range(count)]
+
+
+def populate(
+    db: database.DB,
+    users: int,
+    sources: int,
+    entries: int,
+    seed: int = 0,
+    kind: str = "rss",
+) -> ty.List[model.Source]:
+    """Create `users` users, each with `sources` sources and each source
+    with `entries` entries.
+
+    Return created sources.
+    """
+    gen = Generator(seed)
+    created = []
+    for user_idx in range(users):
+        user = database.users.save(
+            db,
+            model.User(
+                login=f"bench{seed}_{user_idx}",
+                email=f"bench{user_idx}@localhost",
+                active=True,
+            ),
+        )
+        assert user.id
+        group = database.groups.save(
+            db, model.SourceGroup(name="bench", user_id=user.id)
+        )
+        assert group.id
+        for src_idx in range(sources):
+            source = model.Source(
+                user_id=user.id,
+                name=f"source {src_idx}",
+                kind=kind,
+                group_id=group.id,
+            )
+            source.settings = {"url": f"http://localhost/feed/{src_idx}"}
+            source.interval = "1h"
+            source = database.sources.save(db, source)
+            if entries:
+                database.entries.save_many(db, gen.entries(source, entries))
+                database.stats.refresh(db, (source.id,))
+
+            created.append(source)
+
+        db.commit()
+        _LOG.info("created user %s", user.login)
+
+    return created
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database", required=True, help="connection str")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--sources", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    database.DB.initialize(args.database, True, 1, 2)
+    with database.DB.get() as db:
+        populate(db, args.users, args.sources, args.entries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
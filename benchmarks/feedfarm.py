@@ -0,0 +1,268 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Local HTTP server that serve synthetic feeds and pages for load tests.
+
+Paths:
+    /rss/<n>, /atom/<n> - feed with `items` entries
+    /html/<n> - web page
+
+Each path has own, stable content generated from `seed` + n. Behaviour is
+controlled by `FarmConfig`: response latency, size, error rate, ETag and
+Last-Modified support (304 responses), rate of content changes and rate
+of temporary redirects.
+
+Run standalone:
+
+    PYTHONPATH=. python3 benchmarks/feedfarm.py --port 8080 --latency 0.1
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import http.server
+import random
+import threading
+import time
+import typing as ty
+from collections import Counter
+from dataclasses import dataclass
+from email.utils import formatdate
+
+import datagen
+
+_CONTENT_TYPES = {
+    "rss": "application/rss+xml; charset=utf-8",
+    "atom": "application/atom+xml; charset=utf-8",
+    "html": "text/html; charset=utf-8",
+}
+
+
+@dataclass
+class FarmConfig:
+    # base response latency in seconds
+    latency: float = 0.0
+    # random latency added to base latency (0 - jitter) seconds
+    jitter: float = 0.0
+    # number of items in feeds
+    items: int = 20
+    # number of paragraphs in each item / page
+    paragraphs: int = 2
+    # probability of 5xx response
+    error_rate: float = 0.0
+    # probability of content change on each request
+    change_rate: float = 0.1
+    # probability of 302 redirect
+    redirect_rate: float = 0.0
+    # send ETag / Last-Modified and honour conditional requests
+    etag: bool = True
+    seed: int = 0
+
+
+@dataclass
+class _Document:
+    version: int
+    body: bytes
+    etag: str
+    modified: float
+
+
+class FeedFarm:
+    """Threaded HTTP server with synthetic documents."""
+
+    def __init__(
+        self, conf: FarmConfig, address: str = "127.0.0.1", port: int = 0
+    ) -> None:
+        self.conf = conf
+        self.stats: ty.Counter[str] = Counter()
+        self._docs: ty.Dict[str, _Document] = {}
+        self._lock = threading.Lock()
+        self._rnd = random.Random(conf.seed)
+        self._server = http.server.ThreadingHTTPServer(
+            (address, port), _make_handler(self)
+        )
+        self._server.daemon_threads = True
+        self._thread: ty.Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> FeedFarm:
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True, name="feedfarm"
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def random(self) -> float:
+        with self._lock:
+            return self._rnd.random()
+
+    def count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def document(self, kind: str, num: int) -> _Document:
+        """Get current version of document; change it randomly."""
+        key = f"{kind}/{num}"
+        with self._lock:
+            doc = self._docs.get(key)
+            if doc is None or self._rnd.random() < self.conf.change_rate:
+                version = doc.version + 1 if doc else 0
+                doc = self._docs[key] = self._generate(kind, num, version)
+
+            return doc
+
+    def _generate(self, kind: str, num: int, version: int) -> _Document:
+        seed = self.conf.seed * 1000003 + num * 1009 + version
+        gen = datagen.Generator(seed)
+        base = f"{self.url}{kind}/{num}/"
+        if kind == "rss":
+            body = gen.rss(self.conf.items, base)
+        elif kind == "atom":
+            body = gen.atom(self.conf.items, base)
+        else:
+            body = gen.html(self.conf.paragraphs * 5, self.conf.items)
+
+        data = body.encode("utf-8")
+        return _Document(
+            version,
+            data,
+            '"' + hashlib.sha1(data).hexdigest() + '"',
+            time.time(),
+        )
+
+
+def _make_handler(
+    farm: FeedFarm,
+) -> ty.Type[http.server.BaseHTTPRequestHandler]:
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args: ty.Any) -> None:
+            pass
+
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            conf = farm.conf
+            delay = conf.latency + farm.random() * conf.jitter
+            if delay:
+                time.sleep(delay)
+
+            path, _, query = self.path.partition("?")
+            parts = path.strip("/").split("/")
+            if (
+                len(parts) != 2
+                or parts[0] not in _CONTENT_TYPES
+                or not parts[1].isdigit()
+            ):
+                self._reply(404)
+                return
+
+            if farm.random() < conf.error_rate:
+                self._reply(503)
+                return
+
+            if "final" not in query and farm.random() < conf.redirect_rate:
+                self._reply(302, {"Location": f"{path}?final=1"})
+                return
+
+            doc = farm.document(parts[0], int(parts[1]))
+            headers = {}
+            if conf.etag:
+                headers["ETag"] = doc.etag
+                headers["Last-Modified"] = formatdate(
+                    doc.modified, usegmt=True
+                )
+                if self.headers.get("If-None-Match") == doc.etag:
+                    self._reply(304, headers)
+                    return
+
+            headers["Content-Type"] = _CONTENT_TYPES[parts[0]]
+            self._reply(200, headers, doc.body)
+
+        def _reply(
+            self,
+            status: int,
+            headers: ty.Optional[ty.Dict[str, str]] = None,
+            body: bytes = b"",
+        ) -> None:
+            farm.count(str(status))
+            farm.count("bytes", len(body))
+            self.send_response(status)
+            for key, val in (headers or {}).items():
+                self.send_header(key, val)
+
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if body:
+                self.wfile.write(body)
+
+    return Handler
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add farm configuration arguments to `parser`."""
+    defaults = FarmConfig()
+    parser.add_argument("--latency", type=float, default=defaults.latency)
+    parser.add_argument("--jitter", type=float, default=defaults.jitter)
+    parser.add_argument("--items", type=int, default=defaults.items)
+    parser.add_argument("--paragraphs", type=int, default=defaults.paragraphs)
+    parser.add_argument(
+        "--error-rate", type=float, default=defaults.error_rate
+    )
+    parser.add_argument(
+        "--change-rate", type=float, default=defaults.change_rate
+    )
+    parser.add_argument(
+        "--redirect-rate", type=float, default=defaults.redirect_rate
+    )
+    parser.add_argument("--no-etag", action="store_true")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> FarmConfig:
+    return FarmConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        items=args.items,
+        paragraphs=args.paragraphs,
+        error_rate=args.error_rate,
+        change_rate=args.change_rate,
+        redirect_rate=args.redirect_rate,
+        etag=not args.no_etag,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    farm = FeedFarm(config_from_args(args), args.address, args.port)
+    print("serving on", farm.url)
+    farm.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(dict(farm.stats))
+    except KeyboardInterrupt:
+        farm.stop()
+
+
+if __name__ == "__main__":
+    main()
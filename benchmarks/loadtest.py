@@ -0,0 +1,225 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Load test of background worker.
+
+Start local feed farm (see feedfarm.py), create user with `--sources`
+sources (rss, atom and url kinds) pointing to farm, run CheckWorker for
+`--duration` seconds and report throughput.
+
+    PYTHONPATH=. python3 benchmarks/loadtest.py --database <conn str> \\
+        --sources 1000 --duration 300 --workers 8 --latency 0.2
+
+Database should be dedicated for tests; created user is deleted after test
+unless `--keep` is given.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import resource
+import threading
+import time
+import typing as ty
+from dataclasses import dataclass, field
+
+import feedfarm
+from prometheus_client import REGISTRY
+
+from webmon2 import conf, database, model, worker
+
+_LOG = logging.getLogger("loadtest")
+
+_KINDS = (("rss", "rss"), ("rss", "atom"), ("url", "html"))
+
+
+@dataclass
+class PoolWaitStats:
+    """Time spent on getting connections from pool."""
+
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, duration: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += duration
+            self.max = max(self.max, duration)
+
+
+def _instrument_pool(stats: PoolWaitStats) -> None:
+    """Measure `getconn` time of database pool."""
+    pool = database.DB.POOL
+    assert pool
+    getconn = pool.getconn
+
+    def timed_getconn(*args: ty.Any, **kwargs: ty.Any) -> ty.Any:
+        start = time.perf_counter()
+        try:
+            return getconn(*args, **kwargs)
+        finally:
+            stats.add(time.perf_counter() - start)
+
+    pool.getconn = timed_getconn  # type: ignore
+
+
+def _create_sources(
+    db: database.DB, farm_url: str, count: int, interval: int
+) -> model.User:
+    login = f"loadtest_{int(time.time())}"
+    user = database.users.save(
+        db, model.User(login=login, email="", active=True)
+    )
+    assert user.id
+    group = database.groups.save(
+        db, model.SourceGroup(name="loadtest", user_id=user.id)
+    )
+    assert group.id
+    for idx in range(count):
+        kind, path = _KINDS[idx % len(_KINDS)]
+        source = model.Source(
+            user_id=user.id,
+            name=f"{path} {idx}",
+            kind=kind,
+            group_id=group.id,
+        )
+        source.settings = {"url": f"{farm_url}{path}/{idx}"}
+        if kind == "rss":
+            source.settings["load_content"] = True
+
+        source.interval = str(interval)
+        source.status = model.SourceStatus.ACTIVE
+        database.sources.save(db, source)
+
+    database.sources.refresh(db, user.id)
+    db.commit()
+    _LOG.info("created user %s with %d sources", login, count)
+    return user
+
+
+def _metric(name: str, labels: ty.Optional[ty.Dict[str, str]] = None) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def _pool_timeouts() -> ty.Tuple[float, float]:
+    return (
+        _metric("webmon2_db_pool_timeouts_total", {"reason": "timeout"}),
+        _metric("webmon2_db_pool_timeouts_total", {"reason": "queue_full"}),
+    )
+
+
+def _run(
+    args: argparse.Namespace, farm: feedfarm.FeedFarm, stats: PoolWaitStats
+) -> None:
+    app_conf = conf.default_conf()
+    app_conf.set("main", "workers", str(args.workers))
+    app_conf.set("main", "work_interval", str(args.work_interval))
+    app_conf.set("smtp", "enabled", "false")
+    cworker = worker.CheckWorker(app_conf)
+    cworker.start()
+
+    # CheckWorker start processing after initial sleep; measure from first
+    # processed source.
+    while not _metric("webmon2_sources_processed_total"):
+        time.sleep(0.1)
+
+    start = time.monotonic()
+    sources_start = _metric("webmon2_sources_processed_total")
+    entries_start = _metric("webmon2_entries_loaded_total")
+    errors_start = _metric("webmon2_sources_processed_errors_total")
+    requests_start = sum(
+        cnt for key, cnt in farm.stats.items() if key.isdigit()
+    )
+    timeouts_start = _pool_timeouts()
+    time.sleep(args.duration)
+    elapsed = time.monotonic() - start
+
+    sources = _metric("webmon2_sources_processed_total") - sources_start
+    entries = _metric("webmon2_entries_loaded_total") - entries_start
+    errors = _metric("webmon2_sources_processed_errors_total") - errors_start
+    requests = (
+        sum(cnt for key, cnt in farm.stats.items() if key.isdigit())
+        - requests_start
+    )
+    timeouts = [
+        end - begin for begin, end in zip(timeouts_start, _pool_timeouts())
+    ]
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"duration:           {elapsed:0.1f} s")
+    print(f"sources processed:  {sources:0.0f} ({sources / elapsed:0.2f}/s)")
+    print(f"source errors:      {errors:0.0f}")
+    print(f"entries loaded:     {entries:0.0f} ({entries / elapsed:0.2f}/s)")
+    print(f"farm requests:      {requests} ({requests / elapsed:0.2f}/s)")
+    print(f"farm responses:     {dict(farm.stats)}")
+    print(
+        f"db conn wait:       count={stats.count} "
+        f"total={stats.total:0.3f}s "
+        f"avg={stats.total / (stats.count or 1) * 1000:0.3f}ms "
+        f"max={stats.max * 1000:0.3f}ms"
+    )
+    print(
+        f"db conn failures:   timeout={timeouts[0]:0.0f} "
+        f"queue_full={timeouts[1]:0.0f}"
+    )
+    print(f"max RSS:            {maxrss / 1024:0.1f} MB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database", required=True, help="connection str")
+    parser.add_argument("--sources", type=int, default=1000)
+    parser.add_argument(
+        "--duration", type=float, default=300, help="test time in seconds"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument(
+        "--interval", type=int, default=60, help="sources interval in sec"
+    )
+    parser.add_argument(
+        "--work-interval", type=int, default=5, help="CheckWorker interval"
+    )
+    parser.add_argument("--db-pool-max", type=int, default=20)
+    parser.add_argument(
+        "--db-pool-timeout", type=float, default=30, help="in seconds"
+    )
+    parser.add_argument("--keep", action="store_true", help="keep test data")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    feedfarm.add_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING
+    )
+
+    database.DB.initialize(
+        args.database, True, 1, args.db_pool_max, args.db_pool_timeout
+    )
+    stats = PoolWaitStats()
+    _instrument_pool(stats)
+
+    farm = feedfarm.FeedFarm(feedfarm.config_from_args(args)).start()
+    with database.DB.get() as db:
+        user = _create_sources(db, farm.url, args.sources, args.interval)
+
+    try:
+        _run(args, farm, stats)
+    finally:
+        farm.stop()
+        if not args.keep:
+            assert user.id
+            with database.DB.get() as db:
+                database.users.delete(db, user.id)
+                db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -18,12 +18,12 @@ import typing as ty
 
 from webmon2 import model
 
-from . import common, conf, database, filters, security, sources
+from . import common, conf, database, security
 
 
-def _show_abilities_cls(title: str, base_cls: ty.Any) -> None:
+def _show_abilities_cls(title: str, registry: common.Registry[ty.Any]) -> None:
     print(title)
-    for name, cls in common.get_subclasses_with_name(base_cls):
+    for name, cls in registry.items():
         print("  -", name)
         if hasattr(cls, "description"):
             print("    " + cls.description)
@@ -40,8 +40,13 @@ def _show_abilities_cls(title: str, base_cls: ty.Any) -> None:
 
 
 def show_abilities() -> None:
-    _show_abilities_cls("Sources:", sources.AbstractSource)
-    _show_abilities_cls("Filters:", filters.AbstractFilter)
+    # pylint: disable=import-outside-toplevel
+    from . import filters, sources
+
+    sources.load_plugins()
+    filters.load_plugins()
+    _show_abilities_cls("Sources:", sources.SOURCES)
+    _show_abilities_cls("Filters:", filters.FILTERS)
 
 
 def add_user(args: argparse.Namespace) -> None:
@@ -15,7 +15,10 @@ import itertools
 import logging
 import os.path
 import pathlib
+import threading
+import time
 import typing as ty
+from collections import OrderedDict
 from contextlib import suppress
 
 __author__ = "Karol Będkowski"
@@ -90,6 +93,89 @@ def get_subclasses_with_name(
     yield from find(base_class)
 
 
+RegisteredClass = ty.TypeVar("RegisteredClass")
+
+
+class Registry(ty.Generic[RegisteredClass]):
+    """Registry of plugin classes identified by `name` attribute.
+
+    Classes are registered when defined (see `__init_subclass__` in
+    AbstractSource, AbstractFilter) or loaded from entry points in `group`.
+    """
+
+    def __init__(self, group: str) -> None:
+        self.group = group
+        self._classes: ty.Dict[str, ty.Type[RegisteredClass]] = {}
+        self._entry_points: ty.Optional[ty.Dict[str, ty.Any]] = None
+        self._lock = threading.Lock()
+
+    def register(self, cls: ty.Type[RegisteredClass]) -> None:
+        # register only classes that define name; subclasses inherit name
+        # and should not replace parent class
+        name = cls.__dict__.get("name")
+        if not name:
+            return
+
+        if (prev := self._classes.get(name)) and prev is not cls:
+            _LOG.warning(
+                "%s: %s overwrite %s for %r", self.group, cls, prev, name
+            )
+
+        self._classes[name] = cls
+
+    def get(self, name: str) -> ty.Optional[ty.Type[RegisteredClass]]:
+        """Get class registered by `name`; try load it from entry points when
+        not found."""
+        cls = self._classes.get(name)
+        if cls is None and self._load_entry_point(name):
+            cls = self._classes.get(name)
+
+        return cls
+
+    def items(self) -> ty.List[ty.Tuple[str, ty.Type[RegisteredClass]]]:
+        return list(self._classes.items())
+
+    def load_entry_points(self) -> None:
+        """Load all classes defined in entry points."""
+        for name in self._get_entry_points():
+            self._load_entry_point(name)
+
+    def _get_entry_points(self) -> ty.Dict[str, ty.Any]:
+        # importlib.metadata is quite heavy; import it only when needed
+        # pylint: disable=import-outside-toplevel
+        import importlib.metadata
+
+        with self._lock:
+            if self._entry_points is None:
+                eps = importlib.metadata.entry_points()
+                if hasattr(eps, "select"):
+                    group = eps.select(group=self.group)
+                else:  # py < 3.10
+                    group = eps.get(self.group, ())  # type: ignore
+
+                self._entry_points = {ep.name: ep for ep in group}
+
+            return self._entry_points
+
+    def _load_entry_point(self, name: str) -> bool:
+        entry_point = self._get_entry_points().pop(name, None)
+        if entry_point is None:
+            return False
+
+        try:
+            cls = entry_point.load()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOG.error("%s: load %r error: %s", self.group, name, err)
+            return False
+
+        if name not in self._classes:
+            # class may be not subclass of base class; register it by
+            # entry point name
+            self._classes[name] = cls
+
+        return True
+
+
 def parse_interval(instr: ty.Union[str, float, int]) -> int:
     """Parse interval in human readable format and return interval in sec."""
     if isinstance(instr, (int, float)):
@@ -317,6 +403,19 @@ def parse_form_list_data(
         yield val
 
 
+ChunkItem = ty.TypeVar("ChunkItem")
+
+
+def chunked(
+    items: ty.Iterable[ChunkItem], size: int
+) -> ty.Iterator[ty.List[ChunkItem]]:
+    """Split `items` into lists of `size` elements (last may be shorter).
+    Items are consumed lazily."""
+    iterator = iter(items)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
 CacheFuncRes = ty.TypeVar("CacheFuncRes")
 
 
@@ -341,3 +440,61 @@ def _cache(
 cache: ty.Callable[[ty.Callable[..., ty.Any]], ty.Any] = (
     functools.cache if hasattr(functools, "cache") else _cache  # type: ignore
 )
+
+
+CacheKey = ty.TypeVar("CacheKey")
+CacheValue = ty.TypeVar("CacheValue")
+
+
+class LRUCache(ty.Generic[CacheKey, CacheValue]):
+    """Thread-safe, size-limited LRU cache with optional time-to-live (in
+    seconds) of entries."""
+
+    def __init__(self, maxsize: int, ttl: ty.Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: ty.OrderedDict[
+            CacheKey, ty.Tuple[float, CacheValue]
+        ] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self, key: CacheKey, default: ty.Optional[CacheValue] = None
+    ) -> ty.Optional[CacheValue]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            inserted, value = item
+            if self.ttl and time.monotonic() - inserted > self.ttl:
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: CacheKey, value: CacheValue) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(
+        self, key: CacheKey, default: ty.Optional[CacheValue] = None
+    ) -> ty.Optional[CacheValue]:
+        with self._lock:
+            item = self._data.pop(key, None)
+            return default if item is None else item[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def keys(self) -> ty.List[CacheKey]:
+        with self._lock:
+            return list(self._data.keys())
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -259,5 +259,52 @@ class TestParseFormListData(unittest.TestCase):
         self.assertEqual(values[0]["__idx"], 3)
 
 
+class TestLRUCache(unittest.TestCase):
+    def test_lru(self):
+        cache = common.LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        # "b" is least recently used
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.pop("a"), 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_ttl(self):
+        cache = common.LRUCache(10, ttl=0.05)
+        cache.put("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+
+class TestChunked(unittest.TestCase):
+    def test_chunked(self):
+        chunks = list(common.chunked(iter(range(7)), 3))
+        self.assertEqual(chunks, [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(common.chunked([], 3)), [])
+
+
+class TestRegistry(unittest.TestCase):
+    def test_register_inherited_name(self):
+        registry = common.Registry("test")
+
+        class Parent:
+            name = "parent"
+
+        class Child(Parent):
+            pass
+
+        registry.register(Parent)
+        registry.register(Child)
+        self.assertIs(registry.get("parent"), Parent)
+        self.assertEqual(len(registry.items()), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
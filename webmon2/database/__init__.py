@@ -15,6 +15,7 @@ from . import (
     scoring,
     settings,
     sources,
+    stats,
     system,
     users,
 )
@@ -34,6 +35,7 @@ __all__ = (
     "sources",
     "binaries",
     "scoring",
+    "stats",
     "system",
     "Cursor",
 )
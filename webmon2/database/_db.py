@@ -11,13 +11,18 @@ Definition of DB object
 """
 from __future__ import annotations
 
+import itertools
 import logging
 import os.path
 import sys
 import typing as ty
 
 import psycopg2
-from psycopg2 import extensions, extras, pool
+from psycopg2 import extensions
+
+from ._pool import BlockingConnectionPool, WaitFunc
+from ._prepared import Statement, make_statement, prepared_in
+from ._querystats import TimingConnection, TimingCursor, TimingDictCursor
 
 _ = ty
 _LOG = logging.getLogger("db")
@@ -25,11 +30,25 @@ _LOG = logging.getLogger("db")
 psycopg2.extensions.register_adapter(dict, psycopg2.extras.Json)
 psycopg2.extras.register_default_json(globally=True)
 
+# default number of rows fetched at once by server-side cursors
+NAMED_CURSOR_ITERSIZE = 2000
+_NAMED_CURSOR_COUNTER = itertools.count()
+
+
+def _cursor_factory(
+    tuples: bool,
+) -> ty.Type[psycopg2.extensions.cursor]:
+    return TimingCursor if tuples else TimingDictCursor
+
 
 class DB:
 
     INSTANCE = None
-    POOL = None
+    POOL: ty.Optional[BlockingConnectionPool] = None
+    # statements registered by `register_statement`
+    STATEMENTS: ty.Dict[str, Statement] = {}
+    # execute registered statements as server-side prepared statements
+    PREPARE_STATEMENTS = True
 
     __slots__ = ("_conn",)
 
@@ -43,19 +62,86 @@ class DB:
         assert DB.POOL
         self._conn = DB.POOL.getconn()
         self._conn.autocommit = False
-        self._conn.initialize(_LOG)
 
     @classmethod
     def get(cls) -> DB:
         return DB()
 
-    def cursor(self) -> psycopg2.extensions.cursor:
+    def cursor(self, tuples: bool = False) -> psycopg2.extensions.cursor:
+        """Create cursor; rows are dict-like unless `tuples` is set - then
+        rows are plain tuples (cheaper, for reading many rows)."""
         if not self._conn or self._conn.closed:
             self.close()
             self.connect()
 
         assert self._conn
-        return self._conn.cursor(cursor_factory=extras.DictCursor)
+        return self._conn.cursor(cursor_factory=_cursor_factory(tuples))
+
+    def named_cursor(
+        self, itersize: int = NAMED_CURSOR_ITERSIZE, tuples: bool = False
+    ) -> psycopg2.extensions.cursor:
+        """Create server-side (named) cursor. Rows are fetched from server in
+        batches of `itersize` rows when iterating over cursor, so large
+        results can be processed in constant memory.
+
+        Cursor is valid only within current transaction.
+        """
+        if not self._conn or self._conn.closed:
+            self.close()
+            self.connect()
+
+        assert self._conn
+        name = f"webmon2_cur_{next(_NAMED_CURSOR_COUNTER)}"
+        cur = self._conn.cursor(
+            name=name, cursor_factory=_cursor_factory(tuples)
+        )
+        cur.itersize = itersize
+        return cur
+
+    @classmethod
+    def register_statement(cls, name: str, sql: str) -> Statement:
+        """Register frequently executed query `sql` as statement `name`.
+        Statement should be executed by `execute` or `executemany`."""
+        stmt = make_statement(name, sql)
+        if (old := cls.STATEMENTS.get(name)) and old.sql != sql:
+            raise ValueError(f"statement {name} already registered")
+
+        cls.STATEMENTS[name] = stmt
+        return stmt
+
+    def _prepare(
+        self, cur: psycopg2.extensions.cursor, stmt: Statement
+    ) -> str:
+        """Prepare `stmt` in cursor connection if not prepared yet; return
+        query to execute."""
+        if not DB.PREPARE_STATEMENTS:
+            return stmt.sql
+
+        prepared = prepared_in(cur.connection)
+        if stmt.name not in prepared:
+            _LOG.debug("preparing statement %s", stmt.name)
+            cur.execute(stmt.prepare_sql)
+            prepared.add(stmt.name)
+
+        return stmt.execute_sql
+
+    def execute(
+        self,
+        cur: psycopg2.extensions.cursor,
+        stmt: Statement,
+        params: ty.Any = None,
+    ) -> None:
+        """Execute registered statement `stmt` with `params` in `cur`."""
+        cur.execute(self._prepare(cur, stmt), params)
+
+    def executemany(
+        self,
+        cur: psycopg2.extensions.cursor,
+        stmt: Statement,
+        params_seq: ty.Iterable[ty.Any],
+    ) -> None:
+        """Execute registered statement `stmt` for each of `params_seq`."""
+        cur.executemany(self._prepare(cur, stmt), params_seq)
 
     def begin(self) -> None:
         pass
@@ -69,15 +155,35 @@ class DB:
         self._conn.rollback()
 
     @classmethod
-    def initialize(
-        cls, conn_str: str, update_schema: bool, min_conn: int, max_conn: int
+    def initialize(  # pylint: disable=too-many-arguments
+        cls,
+        conn_str: str,
+        update_schema: bool,
+        min_conn: int,
+        max_conn: int,
+        timeout: float = 30.0,
+        max_waiting: int = 100,
+        prepare_statements: bool = True,
     ) -> None:
+        """Create connections pool.
+
+        When all `max_conn` connections are in use, clients wait for free
+        connection up to `timeout` seconds; no more than `max_waiting`
+        clients may wait.
+
+        `prepare_statements` enable server-side prepared statements for
+        registered statements; should be disabled when connections are
+        shared by other clients (i.e. pgbouncer in transaction mode).
+        """
         _LOG.info("initializing database")
-        cls.POOL = pool.ThreadedConnectionPool(
+        cls.PREPARE_STATEMENTS = prepare_statements
+        cls.POOL = BlockingConnectionPool(
             min_conn,
             max_conn,
             conn_str,
-            connection_factory=extras.LoggingConnection,
+            connection_factory=TimingConnection,
+            timeout=timeout,
+            max_waiting=max_waiting,
         )
         # common.create_missing_dir(os.path.dirname(filename))
         with DB() as db:
@@ -85,6 +191,12 @@ class DB:
             if update_schema:
                 db.update_schema()
 
+    @classmethod
+    def set_pool_wait_func(cls, wait_func: WaitFunc) -> None:
+        """Set function used to wait for free connection in pool."""
+        assert cls.POOL
+        cls.POOL.wait_func = wait_func
+
     def __enter__(self) -> DB:
         # _LOG.debug("Enter conn %s", self._conn)
         return self
@@ -99,6 +211,8 @@ class DB:
         assert self.POOL
         if self._conn is not None:
             if self._conn.closed:
+                # release slot in pool taken by broken connection
+                self.POOL.putconn(self._conn, close=True)
                 self._conn = None
                 return
 
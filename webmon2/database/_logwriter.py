@@ -0,0 +1,151 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Buffered writer of user logs.
+
+Logs put into `LogWriter` are collected in bounded queue and saved by
+background thread in batches - when `batch_size` logs are collected or
+`interval` seconds after first not-saved log. Logs that do not fit in
+queue are rejected and should be saved directly by caller; logs are
+dropped only when saving batch fails. Number of logs saved in batches,
+rejected and dropped is reported in prometheus metrics.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+import typing as ty
+
+from prometheus_client import Counter, Gauge
+
+from webmon2 import model
+
+_LOG = logging.getLogger(__name__)
+
+_LOGS_WRITTEN = Counter(
+    "webmon2_user_logs_written", "Number of user logs saved in batches"
+)
+_LOGS_SYNC_WRITE = Counter(
+    "webmon2_user_logs_sync_write",
+    "Number of user logs rejected by buffered writer and saved directly",
+    ["reason"],
+)
+_LOGS_DROPPED = Counter(
+    "webmon2_user_logs_dropped",
+    "Number of user logs not saved because of errors",
+)
+_LOGS_QUEUED = Gauge(
+    "webmon2_user_logs_queued", "Number of user logs waiting for save"
+)
+
+# save(logs) - save batch of logs into database
+SaveFunc = ty.Callable[[ty.List[model.UserLog]], None]
+
+
+class LogWriter(threading.Thread):
+    """Thread that save user logs in batches."""
+
+    def __init__(
+        self,
+        save: SaveFunc,
+        batch_size: int = 100,
+        interval: float = 5.0,
+        max_queue: int = 10000,
+    ) -> None:
+        threading.Thread.__init__(self, daemon=True, name="user-log-writer")
+        self._save = save
+        self._batch_size = max(batch_size, 1)
+        self._interval = interval
+        # None in queue stop writer
+        self._queue: queue.Queue[ty.Optional[model.UserLog]] = queue.Queue(
+            max(max_queue, 1)
+        )
+        self._stopping = False
+        _LOGS_QUEUED.set_function(self._queue.qsize)
+
+    def put(self, log: model.UserLog) -> bool:
+        """Add `log` to queue; return False when log is rejected and should
+        be saved directly by caller."""
+        if self._stopping:
+            _LOGS_SYNC_WRITE.labels("stopped").inc()
+            return False
+
+        try:
+            self._queue.put_nowait(log)
+        except queue.Full:
+            _LOGS_SYNC_WRITE.labels("queue_full").inc()
+            return False
+
+        return True
+
+    def stop(self, timeout: ty.Optional[float] = None) -> None:
+        """Save queued logs and stop thread."""
+        if self._stopping:
+            return
+
+        self._stopping = True
+        # wait for free place in queue; writer remove items all the time
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            _LOG.warning("LogWriter stop timeout; logs are not saved")
+            return
+
+        self.join(timeout)
+
+    def run(self) -> None:
+        _LOG.info(
+            "LogWriter started; batch: %d, interval: %0.1f",
+            self._batch_size,
+            self._interval,
+        )
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if batch:
+                self._flush(batch)
+
+        _LOG.info("LogWriter stopped")
+
+    def _collect(self) -> ty.Tuple[ty.List[model.UserLog], bool]:
+        """Wait for logs; return batch and flag if writer should stop."""
+        log = self._queue.get()
+        if log is None:
+            return [], True
+
+        batch = [log]
+        deadline = time.monotonic() + self._interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+
+            try:
+                log = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if log is None:
+                return batch, True
+
+            batch.append(log)
+
+        return batch, False
+
+    def _flush(self, batch: ty.List[model.UserLog]) -> None:
+        _LOG.debug("saving %d logs", len(batch))
+        try:
+            self._save(batch)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOG.error("save %d logs error: %s", len(batch), err)
+            _LOGS_DROPPED.inc(len(batch))
+        else:
+            _LOGS_WRITTEN.inc(len(batch))
@@ -0,0 +1,294 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Connections pool that wait for free connection.
+
+`psycopg2.pool.ThreadedConnectionPool` raise `PoolError` when all
+connections are in use. `BlockingConnectionPool` instead wait (up to
+`timeout` seconds) until other thread or greenlet return connection; number
+of waiting clients is limited by `max_waiting`.
+
+Waiting is done by `wait_func`; default one block thread. Web app running
+under gevent should install waiting function that let other greenlets run
+(see `webmon2.web._dbwait`); otherwise greenlet waiting for connection block
+greenlets that may return connections.
+
+Opening new connections and restoring returned ones (rollback, close) is
+done outside pool lock: with gevent-friendly psycopg2 wait callback these
+operations switch to other greenlets of the same thread, that would
+otherwise block whole thread on the lock. Slots for such connections are
+reserved under lock, so pool never open more than `maxconn` connections.
+
+Pool usage (connections in use, idle and number of waiting clients) and
+waiting time are reported in prometheus metrics.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing as ty
+
+import psycopg2
+from prometheus_client import Counter, Gauge, Histogram
+from psycopg2 import extensions, pool
+
+_LOG = logging.getLogger("db")
+
+_POOL_CONNECTIONS = Gauge(
+    "webmon2_db_pool_connections",
+    "Number of database connections in pool",
+    ["state"],
+)
+_POOL_WAITING = Gauge(
+    "webmon2_db_pool_waiting",
+    "Number of clients waiting for database connection",
+)
+_POOL_WAIT_TIME = Histogram(
+    "webmon2_db_pool_wait_seconds",
+    "Time of waiting for database connection",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0),
+)
+_POOL_TIMEOUTS = Counter(
+    "webmon2_db_pool_timeouts",
+    "Number of failed requests for database connection",
+    ["reason"],
+)
+
+# wait_func(condition, timeout); called with locked condition
+WaitFunc = ty.Callable[[threading.Condition, float], None]
+
+
+class PoolTimeoutError(pool.PoolError):
+    """No free connection in pool within timeout."""
+
+
+def thread_wait(cond: threading.Condition, timeout: float) -> None:
+    """Wait for connection blocking current thread."""
+    cond.wait(timeout)
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """Threaded connection pool that wait for free connection."""
+
+    def __init__(
+        self,
+        minconn: int,
+        maxconn: int,
+        *args: ty.Any,
+        timeout: float = 30.0,
+        max_waiting: int = 100,
+        **kwargs: ty.Any,
+    ) -> None:
+        # number of connections being opened and being restored before
+        # putting into pool; they occupy slots in pool
+        self._opening = 0
+        self._restoring = 0
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self.timeout = timeout
+        self.max_waiting = max_waiting
+        self.wait_func: WaitFunc = thread_wait
+        self._cond = threading.Condition(self._lock)
+        self._waiting = 0
+
+        _POOL_CONNECTIONS.labels("in_use").set_function(
+            lambda: len(self._used)
+        )
+        _POOL_CONNECTIONS.labels("idle").set_function(lambda: len(self._pool))
+        _POOL_WAITING.set_function(lambda: self._waiting)
+
+    @property
+    def waiting(self) -> int:
+        """Number of clients waiting for connection."""
+        return self._waiting
+
+    def getconn(self, key: ty.Any = None) -> extensions.connection:
+        """Get free connection; wait for it up to `timeout` seconds.
+
+        Raise `PoolTimeoutError` when there is no free connection within
+        timeout or too many clients wait for connection.
+        """
+        start = time.monotonic()
+        try:
+            with self._cond:
+                key, conn = self._getconn_wait(key, start)
+                if conn is not None:
+                    return conn
+
+                # slot is reserved; open connection without lock
+                self._opening += 1
+
+            return self._open_reserved(key)
+        finally:
+            _POOL_WAIT_TIME.observe(time.monotonic() - start)
+
+    def _getconn_wait(
+        self, key: ty.Any, start: float
+    ) -> ty.Tuple[ty.Any, ty.Optional[extensions.connection]]:
+        """Find idle connection or wait for free slot; return key and
+        connection or None when new connection should be opened."""
+        if self.closed:
+            raise pool.PoolError("connection pool is closed")
+
+        if key is None:
+            key = self._getkey()
+        elif key in self._used:
+            return key, self._used[key]
+
+        while True:
+            while self._pool:
+                conn = self._pool.pop()
+                if conn.closed:
+                    # drop broken idle connection
+                    _LOG.debug("dropping closed connection %s", conn)
+                    continue
+
+                self._used[key] = conn
+                self._rused[id(conn)] = key
+                return key, conn
+
+            if self._slots_used() < self.maxconn:
+                return key, None
+
+            if self._waiting >= self.max_waiting:
+                _POOL_TIMEOUTS.labels("queue_full").inc()
+                raise PoolTimeoutError("too many clients waiting")
+
+            remaining = start + self.timeout - time.monotonic()
+            if remaining <= 0:
+                _POOL_TIMEOUTS.labels("timeout").inc()
+                raise PoolTimeoutError(
+                    f"no free connection within {self.timeout}s"
+                )
+
+            self._waiting += 1
+            try:
+                self.wait_func(self._cond, remaining)
+            finally:
+                self._waiting -= 1
+
+            if self.closed:
+                raise pool.PoolError("connection pool is closed")
+
+    def _open_reserved(self, key: ty.Any) -> extensions.connection:
+        """Open connection in slot reserved for `key`."""
+        try:
+            conn = self._open()
+        except BaseException:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+
+            raise
+
+        with self._cond:
+            self._opening -= 1
+            if self.closed:
+                conn.close()
+                self._cond.notify()
+                raise pool.PoolError("connection pool is closed")
+
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+
+        return conn
+
+    def _open(self) -> extensions.connection:
+        return psycopg2.connect(*self._args, **self._kwargs)
+
+    def _connect(self, key: ty.Any = None) -> extensions.connection:
+        # used by base class to open `minconn` connections on start
+        conn = self._open()
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+
+        return conn
+
+    def _slots_used(self) -> int:
+        return (
+            len(self._used) + len(self._pool) + self._opening + self._restoring
+        )
+
+    def putconn(
+        self,
+        conn: ty.Optional[extensions.connection] = None,
+        key: ty.Any = None,
+        close: bool = False,
+    ) -> None:
+        """Return connection to pool and wake up one waiting client.
+
+        Connection is kept in pool (after rollback of not finished
+        transaction) when there is less than `minconn` idle connections;
+        otherwise it is closed.
+        """
+        assert conn is not None
+        with self._cond:
+            if self.closed:
+                raise pool.PoolError("connection pool is closed")
+
+            if key is None:
+                key = self._rused.get(id(conn))
+                if key is None:
+                    raise pool.PoolError("trying to put unkeyed connection")
+
+            keep = (
+                not close
+                and not conn.closed
+                and len(self._pool) + self._restoring < self.minconn
+            )
+            del self._used[key]
+            del self._rused[id(conn)]
+            if keep:
+                self._restoring += 1
+            else:
+                self._cond.notify()
+
+        if not keep:
+            conn.close()
+            return
+
+        # restore connection state without lock
+        try:
+            keep = _restore(conn)
+        finally:
+            with self._cond:
+                self._restoring -= 1
+                if keep and not self.closed:
+                    self._pool.append(conn)
+                else:
+                    conn.close()
+
+                self._cond.notify()
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closeall()
+            self._cond.notify_all()
+
+
+def _restore(conn: extensions.connection) -> bool:
+    """Return connection to consistent state; return False when connection
+    is broken and should be closed."""
+    status = conn.info.transaction_status
+    if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+        # server connection lost
+        return False
+
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        # connection in error or in transaction
+        try:
+            conn.rollback()
+        except psycopg2.Error as err:
+            _LOG.debug("rollback returned connection error: %s", err)
+            return False
+
+    return True
@@ -0,0 +1,107 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Server-side prepared statements.
+
+Frequently executed queries are registered as `Statement` (see
+`DB.register_statement`). Statement is prepared (`PREPARE name AS ...`) once
+per database connection and then executed by `EXECUTE name (params)`, so
+server parse and plan query only once. Prepared statements live as long as
+connection (also after rollback), so names of prepared statements are kept
+per connection object.
+
+Query use the same parameters (`%s` or `%(name)s`) as plain query.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import typing as ty
+import weakref
+from dataclasses import dataclass
+
+from psycopg2 import extensions
+
+_RE_PLACEHOLDERS = re.compile(r"%\((\w+)\)s|%s|%%")
+_RE_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class Statement:
+    """Query that may be executed as prepared statement."""
+
+    # name of prepared statement
+    name: str
+    # plain query
+    sql: str
+    # query that prepare statement
+    prepare_sql: str
+    # query that execute prepared statement; use the same parameters as `sql`
+    execute_sql: str
+
+
+def make_statement(name: str, sql: str) -> Statement:
+    """Create statement `name` for query `sql`.
+
+    Placeholders are replaced by positional parameters ($1, $2...); named
+    placeholders used many times in query are passed once.
+    """
+    if not _RE_NAME.match(name):
+        raise ValueError(f"invalid statement name {name!r}")
+
+    names: ty.List[str] = []
+    args: ty.List[str] = []
+
+    def replace(match: ty.Match[str]) -> str:
+        placeholder = match.group(0)
+        if placeholder == "%%":
+            return "%"
+
+        key = match.group(1)
+        if key is None:
+            args.append(placeholder)
+            return f"${len(args)}"
+
+        if key not in names:
+            names.append(key)
+            args.append(placeholder)
+
+        return f"${names.index(key) + 1}"
+
+    query = _RE_PLACEHOLDERS.sub(replace, sql)
+    if names and len(names) != len(args):
+        raise ValueError("mixed named and positional placeholders")
+
+    execute_sql = f"EXECUTE {name}"
+    if args:
+        execute_sql += f" ({', '.join(args)})"
+
+    return Statement(
+        name=name,
+        sql=sql,
+        prepare_sql=f"PREPARE {name} AS {query}",
+        execute_sql=execute_sql,
+    )
+
+
+# connection -> names of statements prepared in connection
+_PREPARED: weakref.WeakKeyDictionary[
+    extensions.connection, ty.Set[str]
+] = weakref.WeakKeyDictionary()
+_PREPARED_LOCK = threading.Lock()
+
+
+def prepared_in(conn: extensions.connection) -> ty.Set[str]:
+    """Get names of statements prepared in `conn`."""
+    with _PREPARED_LOCK:
+        prepared = _PREPARED.get(conn)
+        if prepared is None:
+            prepared = _PREPARED[conn] = set()
+
+        return prepared
@@ -0,0 +1,213 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Queries statistics.
+
+Connection and cursors that measure every executed query. Time and number of
+rows are reported in prometheus histograms labelled by normalized query
+(fingerprint) hash and call site. N slowest queries are kept in memory.
+"""
+from __future__ import annotations
+
+import hashlib
+import heapq
+import logging
+import re
+import sys
+import threading
+import time
+import typing as ty
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+
+from prometheus_client import Histogram
+from psycopg2 import extensions, extras
+
+_LOG = logging.getLogger("db")
+
+_QUERY_TIME = Histogram(
+    "webmon2_db_query_seconds",
+    "Database queries execution time",
+    ["query", "caller"],
+)
+_QUERY_ROWS = Histogram(
+    "webmon2_db_query_rows",
+    "Number of rows returned/affected by database queries",
+    ["query", "caller"],
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, float("inf")),
+)
+
+# number of slowest queries to keep
+SLOW_QUERIES_SIZE = 20
+# max length of query text stored in slow queries
+_MAX_QUERY_LEN = 2000
+
+_RE_COMMENTS = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_RE_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_RE_PLACEHOLDERS = re.compile(r"%\(\w+\)s|%s")
+_RE_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_RE_SPACES = re.compile(r"\s+")
+
+# modules skipped when looking for caller of query
+_SKIP_MODULES = (__name__, "webmon2.database._db", "psycopg2")
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(query: str) -> str:
+    """Normalize query - remove comments, literals and parameters."""
+    query = _RE_COMMENTS.sub(" ", query)
+    query = _RE_STRINGS.sub("?", query)
+    query = _RE_PLACEHOLDERS.sub("?", query)
+    query = _RE_NUMBERS.sub("?", query)
+    query = _RE_LISTS.sub("(?)", query)
+    return _RE_SPACES.sub(" ", query).strip().lower()
+
+
+@lru_cache(maxsize=1024)
+def _fingerprint_id(fprint: str) -> str:
+    return hashlib.sha1(fprint.encode()).hexdigest()[:10]
+
+
+def _caller() -> str:
+    """Find first function outside db layer that execute query."""
+    frame = sys._getframe(2)  # pylint: disable=protected-access
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if not module.startswith(_SKIP_MODULES):
+            return f"{module}.{frame.f_code.co_name}"
+
+        frame = frame.f_back  # type: ignore
+
+    return "?"
+
+
+@dataclass(order=True)
+class SlowQuery:
+    duration: float
+    timestamp: datetime = field(compare=False)
+    fingerprint_id: str = field(compare=False)
+    caller: str = field(compare=False)
+    rows: int = field(compare=False)
+    query: str = field(compare=False)
+
+
+class _SlowQueries:
+    """Keep `size` slowest queries."""
+
+    def __init__(self, size: int) -> None:
+        self._size = size
+        self._heap: ty.List[SlowQuery] = []
+        self._lock = threading.Lock()
+
+    def min_duration(self) -> float:
+        """Minimal duration of query that is stored."""
+        heap = self._heap
+        return heap[0].duration if len(heap) >= self._size else 0.0
+
+    def add(self, query: SlowQuery) -> None:
+        with self._lock:
+            if len(self._heap) < self._size:
+                heapq.heappush(self._heap, query)
+            elif query.duration > self._heap[0].duration:
+                heapq.heapreplace(self._heap, query)
+
+    def get(self) -> ty.List[SlowQuery]:
+        """Get stored queries sorted by duration desc."""
+        with self._lock:
+            return sorted(self._heap, reverse=True)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+
+SLOW_QUERIES = _SlowQueries(SLOW_QUERIES_SIZE)
+# fingerprint id -> fingerprint
+FINGERPRINTS: ty.Dict[str, str] = {}
+
+
+def _query_to_str(cur: extensions.cursor, query: ty.Any) -> str:
+    if isinstance(query, str):
+        return query
+
+    if isinstance(query, bytes):
+        return query.decode("utf-8", "replace")
+
+    # psycopg2.sql.Composable
+    return str(query.as_string(cur))
+
+
+def _record(cur: extensions.cursor, query: ty.Any, duration: float) -> None:
+    query = _query_to_str(cur, query)
+    fprint = fingerprint(query)
+    fid = _fingerprint_id(fprint)
+    if fid not in FINGERPRINTS:
+        FINGERPRINTS[fid] = fprint
+
+    caller = _caller()
+    rows = cur.rowcount
+    _QUERY_TIME.labels(fid, caller).observe(duration)
+    if rows >= 0:
+        _QUERY_ROWS.labels(fid, caller).observe(rows)
+
+    if duration > SLOW_QUERIES.min_duration():
+        SLOW_QUERIES.add(
+            SlowQuery(
+                duration,
+                datetime.now(timezone.utc),
+                fid,
+                caller,
+                rows,
+                query[:_MAX_QUERY_LEN],
+            )
+        )
+
+    if _LOG.isEnabledFor(logging.DEBUG):
+        _LOG.debug(
+            "%s: %s [%0.4fs, %d rows]",
+            caller,
+            cur.query.decode("utf-8", "replace") if cur.query else query,
+            duration,
+            rows,
+        )
+
+
+class _TimingMixin:
+    def execute(self, query: ty.Any, vars: ty.Any = None) -> ty.Any:
+        # pylint: disable=redefined-builtin
+        start = time.perf_counter()
+        try:
+            return super().execute(query, vars)  # type: ignore
+        finally:
+            _record(self, query, time.perf_counter() - start)  # type: ignore
+
+    def executemany(self, query: ty.Any, vars_list: ty.Any) -> ty.Any:
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)  # type: ignore
+        finally:
+            _record(self, query, time.perf_counter() - start)  # type: ignore
+
+
+class TimingCursor(_TimingMixin, extensions.cursor):
+    """Cursor that measure executed queries."""
+
+
+class TimingDictCursor(_TimingMixin, extras.DictCursor):
+    """DictCursor that measure executed queries."""
+
+
+class TimingConnection(extensions.connection):
+    """Connection that by default create `TimingCursor`."""
+
+    def __init__(self, *args: ty.Any, **kwargs: ty.Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.cursor_factory = TimingCursor
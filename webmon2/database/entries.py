@@ -9,6 +9,7 @@
 """
 Access to entries in db.
 """
+
 import logging
 import typing as ty
 from datetime import date, datetime
@@ -19,7 +20,7 @@ import psycopg2.errors
 from webmon2 import model
 
 from . import _dbcommon as dbc
-from . import binaries, sources
+from . import binaries, sources, stats
 from ._db import DB
 from ._dbcommon import Cursor
 
@@ -38,12 +39,66 @@ _GET_ENTRIES_SQL_MAIN_COLS = """
     e.title AS entry__title,
     e.url AS entry__url,
     e.opts AS entry__opts,
-    e.content AS entry__content,
     e.user_id AS entry__user_id,
     e.icon AS entry__icon,
     e.score AS entry__score
 """
 
+# Entries may be loaded in one of shapes:
+# "full" - `model.Entry` with whole content
+SHAPE_FULL = "full"
+# "list" - `model.EntryListItem` with only beginning of content; enough to
+# render summary and short entries on lists
+SHAPE_LIST = "list"
+
+# max length of content loaded in "list" shape; should be much greater than
+# limits in `model.Entry.is_long_content` and `formatters.entry_summary`
+_LIST_CONTENT_LENGTH = 4000
+
+_CONTENT_COLS = {
+    SHAPE_FULL: "e.content",
+    SHAPE_LIST: f"left(e.content, {_LIST_CONTENT_LENGTH})",
+}
+
+# columns for `model.EntryListItem` (in order of fields) followed by columns
+# for `model.SourceRef`; require join `sources s` and `source_groups sg`
+_ITEM_COLS = """
+    e.id, e.source_id, e.updated, e.created, e.read_mark, e.star_mark,
+    e.title, e.url, e.icon, e.score,
+    nullif(e.opts, '')::json ->> 'content-type',
+    {content},
+    s.name, s.group_id, sg.name,
+    nullif(s.settings, '')::json ->> 'web_url',
+    nullif(s.settings, '')::json ->> 'url'
+"""
+# number of entry columns in `_ITEM_COLS`
+_ITEM_ENTRY_COLS = len(model.EntryListItem._fields) - 1
+
+_ITEM_JOINS = (
+    "JOIN sources s ON s.id = e.source_id",
+    "JOIN source_groups sg ON sg.id = s.group_id",
+)
+
+
+def _get_content_col(shape: str) -> str:
+    try:
+        return _CONTENT_COLS[shape]
+    except KeyError as err:
+        raise ValueError(f"invalid shape {shape}") from err
+
+
+def _get_columns(shape: str) -> str:
+    return (
+        _GET_ENTRIES_SQL_MAIN_COLS
+        + ", "
+        + _get_content_col(shape)
+        + " AS entry__content"
+    )
+
+
+def _get_item_columns(shape: str) -> str:
+    return _ITEM_COLS.format(content=_get_content_col(shape))
+
 
 def _build_find_sql(args: ty.Dict[str, ty.Any]) -> str:
     """
@@ -59,9 +114,20 @@ def _build_find_sql(args: ty.Dict[str, ty.Any]) -> str:
         star: if true - add filter for `star_mark` = `star`
         title_query:  `title_query` for text search in titles
         query: add `query` for text search in titles and content
+        shape: columns to load (SHAPE_FULL, SHAPE_LIST); default full
+        items: load columns for `model.EntryListItem` instead of
+            `model.Entry`; default: true for SHAPE_LIST
 
     """
-    query = dbc.Query(_GET_ENTRIES_SQL_MAIN_COLS, "entries e")
+    shape = args.get("shape", SHAPE_FULL)
+    items = args.get("items", shape == SHAPE_LIST)
+    if items:
+        query = dbc.Query(_get_item_columns(shape), "entries e")
+        for join in _ITEM_JOINS:
+            query.add_from(join)
+    else:
+        query = dbc.Query(_get_columns(shape), "entries e")
+
     query.add_where("e.user_id = %(user_id)s")
     query.order = args.get("order")
     query.limit = args.get("limit") is not None
@@ -73,25 +139,27 @@ def _build_find_sql(args: ty.Dict[str, ty.Any]) -> str:
 
     group_id = args.get("group_id")
     if group_id:
-        query.add_from("JOIN sources s ON s.id = e.source_id")
+        if not items:
+            query.add_from("JOIN sources s ON s.id = e.source_id")
+
         query.add_where("AND s.group_id = %(group_id)s")
 
     read = args.get("read")
     if read is not None:
-        query.add_where(f"AND read_mark = {read}")
+        query.add_where(f"AND e.read_mark = {read}")
 
     if args.get("star") is not None:
         query.add_where("AND e.star_mark = %(star)s")
 
     if args.get("title_query"):
         query.add_where(
-            "AND to_tsvector('simple'::regconfig, (title)::text) "
+            "AND to_tsvector('simple'::regconfig, (e.title)::text) "
             "@@ to_tsquery('simple'::regconfig, %(title_query)s)"
         )
     elif args.get("query"):
         query.add_where(
             "AND to_tsvector('simple'::regconfig, "
-            "(content || ' '::text) || (title)::text) "
+            "(e.content || ' '::text) || (e.title)::text) "
             "@@ to_tsquery('simple'::regconfig, %(query)s)"
         )
 
@@ -107,16 +175,51 @@ def _yield_entries(
         yield entry
 
 
-def get_starred(db: DB, user_id: int) -> model.Entries:
+def _yield_items(cur: Cursor) -> ty.Iterator[model.EntryListItem]:
+    """Create `model.EntryListItem` from rows with `_ITEM_COLS` columns.
+
+    Items of one source share one `SourceRef` object and sources in one
+    group share one `SourceGroupRef`.
+    """
+    srcs: ty.Dict[int, model.SourceRef] = {}
+    groups: ty.Dict[int, model.SourceGroupRef] = {}
+    cols = _ITEM_ENTRY_COLS
+    for row in cur:
+        source = srcs.get(row[1])
+        if source is None:
+            name, group_id, group_name, web_url, url = row[cols:]
+            group = groups.get(group_id)
+            if group is None:
+                group = groups[group_id] = model.SourceGroupRef(
+                    group_id, group_name
+                )
+
+            source = srcs[row[1]] = model.SourceRef(
+                row[1], name, group_id, group, web_url, url
+            )
+
+        yield model.EntryListItem(*row[:cols], source)
+
+
+def get_starred(
+    db: DB, user_id: int, shape: str = SHAPE_FULL
+) -> model.AnyEntries:
     """Get all starred entries for given user"""
     if not user_id:
         raise ValueError("missing user_id")
 
-    user_sources = sources.get_all_dict(db, user_id)
-    args = {"user_id": user_id, "star": 1}
+    args = {"user_id": user_id, "star": 1, "shape": shape}
     sql = _build_find_sql(args)
 
-    with db.cursor() as cur:
+    if shape == SHAPE_LIST:
+        with db.named_cursor(tuples=True) as cur:
+            cur.execute(sql, args)
+            yield from _yield_items(cur)
+
+        return
+
+    user_sources = sources.get_all_dict(db, user_id)
+    with db.named_cursor() as cur:
         cur.execute(sql, args)
         yield from _yield_entries(cur, user_sources)
 
@@ -128,11 +231,13 @@ def get_history(  # pylint: disable=too-many-arguments
     group_id: ty.Optional[int],
     offset: int = 0,
     limit: int = 20,
-) -> ty.Tuple[model.Entries, int]:
+    shape: str = SHAPE_FULL,
+) -> ty.Tuple[ty.List[model.AnyEntry], int]:
     """
     Get entries manually read (read_mark=2) for given user ordered by id
     Optionally filter by `source_id` and/or `group_id`.
     Load only `limit` entries starting from `offset`.
+    `shape` define loaded columns.
 
     Returns:
         (list of entries, number of all entries)
@@ -150,16 +255,12 @@ def get_history(  # pylint: disable=too-many-arguments
     if not user_id:
         raise ValueError("missing user_id")
 
-    if source_id:
-        user_sources = {source_id: sources.get(db, source_id, user_id=user_id)}
-    else:
-        user_sources = sources.get_all_dict(db, user_id, group_id=group_id)
-
     params = {
         "user_id": user_id,
         "read": model.EntryReadMark.MANUAL_READ,
         "source_id": source_id,
         "group_id": group_id,
+        "shape": shape,
     }
 
     sql = _build_find_sql(params)
@@ -178,6 +279,19 @@ def get_history(  # pylint: disable=too-many-arguments
     sql += " ORDER BY e.id OFFSET %(offset)s LIMIT %(limit)s"
     _LOG.debug("get_history: %s", sql)
 
+    entries: ty.List[model.AnyEntry]
+    if shape == SHAPE_LIST:
+        with db.cursor(tuples=True) as cur:
+            cur.execute(sql, params)
+            entries = list(_yield_items(cur))
+
+        return entries, total
+
+    if source_id:
+        user_sources = {source_id: sources.get(db, source_id, user_id=user_id)}
+    else:
+        user_sources = sources.get_all_dict(db, user_id, group_id=group_id)
+
     with db.cursor() as cur:
         cur.execute(sql, params)
         entries = list(_yield_entries(cur, user_sources))
@@ -202,6 +316,8 @@ def get_total_count(
         unread: count only unread entries or all
     Returns:
         number of entries
+
+    Numbers are summed from precomputed sources statistics (see `stats`).
     """
     if not user_id and not source_id and not group_id:
         raise ValueError("missing user_id/source_id/group_id")
@@ -212,25 +328,26 @@ def get_total_count(
         "user_id": user_id,
     }
 
+    col = "st.unread" if unread else "st.total"
+    sql = f"SELECT coalesce(sum({col}), 0) FROM source_stats st "
     if source_id:
-        sql = "SELECT count(1) FROM entries WHERE source_id=%(source_id)s "
+        sql += "WHERE st.source_id=%(source_id)s"
     elif group_id:
-        sql = (
-            "SELECT count(1) FROM entries e "
-            "JOIN sources s ON e.source_id = s.id "
-            "WHERE s.group_id=%(group_id)s "
+        sql += (
+            "JOIN sources s ON st.source_id = s.id "
+            "WHERE s.group_id=%(group_id)s"
         )
     else:
-        sql = "SELECT count(1) FROM entries WHERE user_id=%(user_id)s"
-
-    if unread:
-        sql += f" AND read_mark={model.EntryReadMark.UNREAD}"
+        sql += (
+            "JOIN sources s ON st.source_id = s.id "
+            "WHERE s.user_id=%(user_id)s"
+        )
 
     _LOG.debug("get_total_count(%r): %s", args, sql)
 
     with db.cursor() as cur:
         cur.execute(sql, args)
-        return cur.fetchone()[0]  # type: ignore
+        return int(cur.fetchone()[0])  # type: ignore
 
 
 _ORDER_SQL = {
@@ -261,7 +378,8 @@ def find(
     offset: ty.Optional[int] = None,
     limit: ty.Optional[int] = None,
     order: ty.Optional[str] = None,
-) -> model.Entries:
+    shape: str = SHAPE_FULL,
+) -> model.AnyEntries:
     """Find entries for user/source/group unread or all.
     Limit and offset work only for getting all entries.
 
@@ -274,6 +392,7 @@ def find(
         offset: get entries from `offset` index
         limit: get only `limit` number of entries
         order: optional sorting
+        shape: columns to load (SHAPE_FULL, SHAPE_LIST)
     """
     args = {
         "limit": limit,
@@ -282,6 +401,7 @@ def find(
         "source_id": source_id,
         "user_id": user_id,
         "order": _get_order_sql(order),
+        "shape": shape,
     }
     if unread:
         args["read"] = model.EntryReadMark.UNREAD
@@ -289,6 +409,13 @@ def find(
     sql = _build_find_sql(args)
     _LOG.debug("find(%r): %s", args, sql)
 
+    if shape == SHAPE_LIST:
+        with db.cursor(tuples=True) as cur:
+            cur.execute(sql, args)
+            yield from _yield_items(cur)
+
+        return
+
     user_sources = sources.get_all_dict(db, user_id, group_id=group_id)
 
     with db.cursor() as cur:
@@ -305,7 +432,8 @@ def find_fulltext(
     group_id: ty.Optional[int] = None,
     source_id: ty.Optional[int] = None,
     order: ty.Optional[str] = None,
-) -> model.Entries:
+    shape: str = SHAPE_FULL,
+) -> model.AnyEntries:
     """Find entries for user by full-text search on title or title and content.
     Search in source (if given source_id) or in group (if given group_id)
     or in all entries given user
@@ -317,12 +445,14 @@ def find_fulltext(
         group_id: optional sources group id to filter entries
         source_id: optional source to filter entries
         order: optional sorting
+        shape: columns to load (SHAPE_FULL, SHAPE_LIST)
     """
     args = {
         "user_id": user_id,
         "group_id": group_id,
         "source_id": source_id,
         "order": _get_order_sql(order),
+        "shape": shape,
     }
     if title_only:
         args["title_query"] = query.replace(" ", "+") + ":*"
@@ -332,31 +462,66 @@ def find_fulltext(
     sql = _build_find_sql(args)
     _LOG.debug("find_fulltext: %s", sql)
 
-    user_sources = sources.get_all_dict(db, user_id, group_id=group_id)
+    items = shape == SHAPE_LIST
+    user_sources = (
+        {} if items else sources.get_all_dict(db, user_id, group_id=group_id)
+    )
 
-    with db.cursor() as cur:
+    with db.cursor(tuples=items) as cur:
         try:
             cur.execute(sql, args)
         except psycopg2.errors.SyntaxError as err:
             _LOG.error("find_fulltext syntax error: %s", err)
             raise dbc.QuerySyntaxError() from err
-        yield from _yield_entries(cur, user_sources)
 
+        if items:
+            yield from _yield_items(cur)
+        else:
+            yield from _yield_entries(cur, user_sources)
 
-def find_for_feed(db: DB, user_id: int, group_id: int) -> model.Entries:
+
+def find_for_feed(
+    db: DB, user_id: int, group_id: int
+) -> ty.Iterator[model.EntryListItem]:
     """Find all entries by group feed."""
-    user_sources = sources.get_all_dict(db, user_id, group_id=group_id)
     args = {
         "group_id": group_id,
         "user_id": user_id,
         "order": "e.id DESC",
         "limit": 100,
+        "items": True,
     }
     sql = _build_find_sql(args)
 
-    with db.cursor() as cur:
+    with db.cursor(tuples=True) as cur:
         cur.execute(sql, args)
-        yield from _yield_entries(cur, user_sources)
+        yield from _yield_items(cur)
+
+
+_FIND_FOR_MAIL_SQL = (
+    "SELECT "
+    + _get_item_columns(SHAPE_FULL)
+    + "FROM entries e\n"
+    + "\n".join(_ITEM_JOINS)
+    + """
+WHERE e.user_id = %(user_id)s
+    AND e.read_mark = %(read_mark)s
+    AND coalesce(s.mail_report, 1) != 0
+    AND coalesce(sg.mail_report, 1) != 0
+ORDER BY sg.name, sg.id, s.name, s.id, e.updated
+"""
+)
+
+
+def find_for_mail(db: DB, user_id: int) -> ty.Iterator[model.EntryListItem]:
+    """Find all unread entries for user that should be reported by mail.
+
+    Entries are ordered by group and source.
+    """
+    args = {"user_id": user_id, "read_mark": model.EntryReadMark.UNREAD}
+    with db.cursor(tuples=True) as cur:
+        cur.execute(_FIND_FOR_MAIL_SQL, args)
+        yield from _yield_items(cur)
 
 
 _GET_ENTRY_SQL = """
@@ -421,6 +586,7 @@ VALUES (%(entry__source_id)s, %(entry__updated)s, %(entry__created)s,
 ON CONFLICT (oid) DO NOTHING
 RETURNING id
 """
+_INSERT_ENTRY_STMT = DB.register_statement("entries_insert", _INSERT_ENTRY_SQL)
 
 _UPDATE_ENTRY_SQL = """
 UPDATE entries
@@ -446,7 +612,7 @@ def save(db: DB, entry: model.Entry) -> model.Entry:
     row = entry.to_row()
     with db.cursor() as cur:
         if entry.id is None:
-            cur.execute(_INSERT_ENTRY_SQL, row)
+            db.execute(cur, _INSERT_ENTRY_STMT, row)
             entry.id = cur.fetchone()[0]
         else:
             cur.execute(_UPDATE_ENTRY_SQL, row)
@@ -488,7 +654,7 @@ def save_many(db: DB, entries: model.Entries) -> None:
     rows = map(model.Entry.to_row, entries)
 
     with db.cursor() as cur:
-        cur.executemany(_INSERT_ENTRY_SQL, rows)
+        db.executemany(cur, _INSERT_ENTRY_STMT, rows)
 
     _save_entry_icon(db, entries)
 
@@ -525,7 +691,11 @@ def delete_old(
             (user_id, max_datetime),
         )
         deleted_oids = cur.rowcount
-        return (deleted_entries, deleted_oids)
+
+    if deleted_entries:
+        stats.refresh_user(db, user_id)
+
+    return (deleted_entries, deleted_oids)
 
 
 def mark_star(db: DB, user_id: int, entry_id: int, star: bool = True) -> int:
@@ -579,6 +749,156 @@ def check_oids(db: DB, oids: ty.List[str], source_id: int) -> ty.Set[str]:
     return set(new_oids)
 
 
+class MarkReadResult(ty.NamedTuple):
+    """Result of changing read marks."""
+
+    # number of changed entries
+    changed: int
+    # source id -> change of number of unread entries in source
+    unread_deltas: ty.Dict[int, int]
+
+    @property
+    def unread_delta(self) -> int:
+        """Change of number of all unread entries."""
+        return sum(self.unread_deltas.values())
+
+
+# max value of integer column; used for open ranges
+_MAX_ID = 2**31 - 1
+
+_MARK_READ_MANY_SQL = """
+WITH old AS (
+    SELECT e.id, e.source_id, e.read_mark
+    FROM entries e
+    WHERE e.user_id = %(user_id)s
+        AND {read_mark_cond}
+        AND ({ids_cond})
+        {scope_cond}
+    FOR UPDATE OF e
+), changed AS (
+    UPDATE entries e
+    SET read_mark = %(read_mark)s
+    FROM old
+    WHERE e.id = old.id
+    RETURNING old.source_id, old.read_mark
+)
+SELECT source_id,
+    count(*),
+    count(*) FILTER (WHERE read_mark = %(unread)s)
+FROM changed
+GROUP BY source_id
+"""
+
+
+def _build_mark_read_sql(
+    args: ty.Dict[str, ty.Any],
+    ids: ty.Optional[ty.Iterable[int]],
+    ranges: ty.Optional[ty.Iterable[ty.Tuple[ty.Optional[int], ...]]],
+    source_ids: ty.Optional[ty.Iterable[int]],
+    group_ids: ty.Optional[ty.Iterable[int]],
+    unread_only: bool,
+) -> str:
+    """Build sql for `mark_read_many`; fill `args` with query parameters."""
+    ids_cond = []
+    if ids:
+        args["ids"] = list(ids)
+        ids_cond.append("e.id = ANY(%(ids)s)")
+
+    # one condition per range so each may use primary key index
+    for idx, (min_id, max_id) in enumerate(ranges or ()):
+        args[f"min_id{idx}"] = max(min_id or 0, 0)
+        args[f"max_id{idx}"] = (
+            _MAX_ID if max_id is None or max_id < 0 else max_id
+        )
+        ids_cond.append(f"e.id BETWEEN %(min_id{idx})s AND %(max_id{idx})s")
+
+    if not ids_cond:
+        raise ValueError("missing ids/ranges")
+
+    scope_cond = []
+    if source_ids:
+        args["source_ids"] = list(source_ids)
+        scope_cond.append("e.source_id = ANY(%(source_ids)s)")
+
+    if group_ids:
+        args["group_ids"] = list(group_ids)
+        scope_cond.append(
+            "e.source_id IN (SELECT s.id FROM sources s "
+            "WHERE s.group_id = ANY(%(group_ids)s))"
+        )
+
+    return _MARK_READ_MANY_SQL.format(
+        read_mark_cond=(
+            "e.read_mark = %(unread)s"
+            if unread_only
+            else "e.read_mark != %(read_mark)s"
+        ),
+        ids_cond=" OR ".join(ids_cond),
+        scope_cond=(
+            "AND (" + " OR ".join(scope_cond) + ")" if scope_cond else ""
+        ),
+    )
+
+
+# pylint: disable=too-many-arguments
+def mark_read_many(
+    db: DB,
+    user_id: int,
+    ids: ty.Optional[ty.Iterable[int]] = None,
+    ranges: ty.Optional[ty.Iterable[ty.Tuple[ty.Optional[int], ...]]] = None,
+    source_ids: ty.Optional[ty.Iterable[int]] = None,
+    group_ids: ty.Optional[ty.Iterable[int]] = None,
+    read: model.EntryReadMark = model.EntryReadMark.READ,
+    unread_only: bool = False,
+) -> MarkReadResult:
+    """Change read mark of many entries in one statement.
+
+    Entries are selected by `ids` and/or id ranges (`ranges` - list of
+    (`min_id`, `max_id`) including; `None` or negative value mean open range)
+    and optionally limited to sources `source_ids` or sources in groups
+    `group_ids`. When `unread_only` change only unread entries.
+
+    Precomputed sources statistics are updated by returned deltas.
+
+    Args:
+        db: database obj
+        user_id: user id (required)
+        ids: list of entries id
+        ranges: list of entries id ranges
+        source_ids: optional list of sources to limit entries
+        group_ids: optional list of groups to limit entries
+        read: status to set
+        unread_only: change only unread entries
+    Return:
+        number of changed entries and per-source change of number of unread
+        entries
+    """
+    if not user_id:
+        raise ValueError("missing user_id")
+
+    args: ty.Dict[str, ty.Any] = {
+        "user_id": user_id,
+        "read_mark": read.value,
+        "unread": model.EntryReadMark.UNREAD.value,
+    }
+    sql = _build_mark_read_sql(
+        args, ids, ranges, source_ids, group_ids, unread_only
+    )
+    _LOG.debug("mark_read_many args=%r", args)
+
+    changed = 0
+    deltas = {}
+    with db.cursor(tuples=True) as cur:
+        cur.execute(sql, args)
+        for source_id, cnt, was_unread in cur:
+            changed += cnt
+            now_unread = cnt if read == model.EntryReadMark.UNREAD else 0
+            deltas[source_id] = now_unread - was_unread
+
+    stats.apply_unread_deltas(db, deltas)
+    return MarkReadResult(changed, deltas)
+
+
 # pylint: disable=too-many-arguments
 def mark_read(
     db: DB,
@@ -606,8 +926,6 @@ def mark_read(
     Return:
         number of changed entries
     """
-    if not user_id:
-        raise ValueError("missing user_id")
     if not (entry_id or max_id or ids):
         raise ValueError("missing entry_id/max_id/ids")
 
@@ -619,27 +937,14 @@ def mark_read(
         read,
         user_id,
     )
-    with db.cursor() as cur:
-        if entry_id:
-            cur.execute(
-                "UPDATE entries SET read_mark=%s WHERE id=%s AND user_id=%s",
-                (read.value, entry_id, user_id),
-            )
-        elif ids:
-            cur.execute(
-                "UPDATE entries SET read_mark=%s "
-                "WHERE id=ANY(%s) AND user_id=%s",
-                (read.value, ids, user_id),
-            )
-        elif max_id:
-            cur.execute(
-                "UPDATE entries SET read_mark=%s "
-                "WHERE id<=%s AND id>=%s AND user_id=%s",
-                (read.value, max_id, min_id or 0, user_id),
-            )
-        changed = cur.rowcount
+    if entry_id:
+        ids = [entry_id]
+    elif not ids:
+        return mark_read_many(
+            db, user_id, ranges=[(min_id, max_id)], read=read
+        ).changed
 
-    return changed  # type: ignore
+    return mark_read_many(db, user_id, ids=ids, read=read).changed
 
 
 def mark_all_read(
@@ -678,7 +983,12 @@ def mark_all_read(
                 ),
             )
 
-        return cur.rowcount  # type: ignore
+        changed = cur.rowcount
+
+    if changed:
+        stats.refresh_user(db, user_id)
+
+    return changed  # type: ignore
 
 
 _GET_RELATED_RM_ENTRY_SQL = """
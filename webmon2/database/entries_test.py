@@ -0,0 +1,65 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for loading entries list items.
+"""
+import unittest
+
+from . import entries
+
+
+def _row(id_, source_id, group_id):
+    return (
+        (id_, source_id, None, None, 0, 0, f"title {id_}", None, None, 0)
+        + ("html", "<p>content</p>")
+        + (f"source {source_id}", group_id, f"group {group_id}", None, "url")
+    )
+
+
+class TestYieldItems(unittest.TestCase):
+    def test_shared_refs(self):
+        items = list(
+            entries._yield_items(
+                [_row(1, 10, 1), _row(2, 11, 1), _row(3, 10, 1)]
+            )
+        )
+        self.assertEqual([item.id for item in items], [1, 2, 3])
+        self.assertIs(items[0].source, items[2].source)
+        self.assertIsNot(items[0].source, items[1].source)
+        self.assertIs(items[0].source.group, items[1].source.group)
+
+        item = items[1]
+        self.assertEqual(item.source.name, "source 11")
+        self.assertEqual(item.source.group.name, "group 1")
+        self.assertEqual(item.source.get_setting("url"), "url")
+        self.assertIsNone(item.source.get_setting("web_url"))
+        self.assertEqual(item.content_type, "html")
+        self.assertEqual(item.human_title(), "title 2")
+        self.assertFalse(item.is_long_content())
+
+
+class TestBuildMarkReadSql(unittest.TestCase):
+    def test_ids_and_ranges(self):
+        args = {}
+        sql = entries._build_mark_read_sql(
+            args, [1, 2], [(None, 10), (20, -1)], None, [3], True
+        )
+        self.assertEqual(args["ids"], [1, 2])
+        self.assertEqual((args["min_id0"], args["max_id0"]), (0, 10))
+        self.assertEqual(
+            (args["min_id1"], args["max_id1"]), (20, entries._MAX_ID)
+        )
+        self.assertEqual(args["group_ids"], [3])
+        self.assertNotIn("source_ids", args)
+        self.assertIn("e.read_mark = %(unread)s", sql)
+        self.assertIn("e.id BETWEEN %(min_id1)s AND %(max_id1)s", sql)
+
+    def test_missing_ids(self):
+        with self.assertRaises(ValueError):
+            entries._build_mark_read_sql({}, None, [], [1], None, False)
@@ -39,16 +39,18 @@ def get_names(db: DB, user_id: int) -> ty.List[ty.Tuple[int, str]]:
 
 _GET_SOURCE_GROUPS_SQL = """
 SELECT sg.id, sg.name, sg.user_id, sg.feed, sg.mail_report,
-    (
-        SELECT count(1)
-        FROM entries e
-        JOIN sources s ON e.source_id = s.id
-        WHERE e.read_mark = %(read_mark)s AND s.group_id = sg.id
-    ) AS unread,
-    (
-        SELECT count(1) FROM sources s WHERE s.group_id = sg.id
-    ) AS sources_count
+    coalesce(gst.unread, 0) AS unread,
+    coalesce(gst.sources_count, 0) AS sources_count
 FROM source_groups sg
+LEFT JOIN (
+    SELECT s.group_id,
+        sum(coalesce(st.unread, 0))::integer AS unread,
+        count(*) AS sources_count
+    FROM sources s
+    LEFT JOIN source_stats st ON st.source_id = s.id
+    WHERE s.user_id = %(user_id)s
+    GROUP BY s.group_id
+) gst ON gst.group_id = sg.id
 WHERE sg.user_id = %(user_id)s
 ORDER BY sg.name
 """
@@ -60,10 +62,7 @@ def get_all(db: DB, user_id: int) -> ty.List[model.SourceGroup]:
         raise ValueError("missing user_id")
 
     with db.cursor() as cur:
-        cur.execute(
-            _GET_SOURCE_GROUPS_SQL,
-            {"user_id": user_id, "read_mark": model.EntryReadMark.UNREAD},
-        )
+        cur.execute(_GET_SOURCE_GROUPS_SQL, {"user_id": user_id})
         groups = [
             model.SourceGroup(
                 id=id,
@@ -165,13 +164,13 @@ def get_last_update(db: DB, group_id: int) -> ty.Optional[datetime]:
     """Find last update time for entries in group"""
     with db.cursor() as cur:
         cur.execute(
-            "SELECT max(datetime(coalesce(updated, created))) "
+            "SELECT max(coalesce(updated, created)) "
             "FROM entries "
             "WHERE source_id IN (SELECT id FROM sources WHERE group_id= %s)",
             (group_id,),
         )
         row = cur.fetchone()
-        return datetime.fromisoformat(row[0]) if row and row[0] else None
+        return row[0] if row and row[0] else None
 
 
 _INSERT_GROUP_SQL = """
@@ -230,11 +229,11 @@ def _generate_group_feed(db: DB) -> str:
 
 
 _GET_NEXT_UNREAD_GROUP_SQL = """
-SELECT group_id
-FROM sources s
-JOIN entries e ON e.source_id = s.id
-WHERE e.read_mark = %s AND s.user_id = %s
-ORDER BY e.id
+SELECT s.group_id
+FROM source_stats st
+JOIN sources s ON s.id = st.source_id
+WHERE s.user_id = %s AND st.unread > 0
+ORDER BY st.first_unread
 LIMIT 1
 """
 
@@ -246,74 +245,11 @@ def get_next_unread_group(db: DB, user_id: int) -> ty.Optional[int]:
         group id or None if not Found
     """
     with db.cursor() as cur:
-        cur.execute(
-            _GET_NEXT_UNREAD_GROUP_SQL, (model.EntryReadMark.UNREAD, user_id)
-        )
+        cur.execute(_GET_NEXT_UNREAD_GROUP_SQL, (user_id,))
         row = cur.fetchone()
         return row[0] if row else None
 
 
-_MARK_READ_SQL = """
-UPDATE entries
-SET read_mark=%(read_mark)s
-WHERE source_id IN (SELECT id FROM sources WHERE group_id=%(group_id)s)
-    AND (id<=%(max_id)s OR %(max_id)s<0) AND id>=%(min_id)s
-    AND read_mark=%(unread)s AND user_id=%(user_id)s
-"""
-_MARK_READ_BY_IDS_SQL = """
-UPDATE entries
-SET read_mark=%(read_mark)s
-WHERE id=ANY(%(ids)s) AND read_mark=%(unread)s AND user_id=%(user_id)s
-"""
-
-
-# pylint: disable=too-many-arguments
-def mark_read(
-    db: DB,
-    user_id: int,
-    group_id: int,
-    max_id: ty.Optional[int] = None,
-    min_id: ty.Optional[int] = None,
-    ids: ty.Optional[ty.List[int]] = None,
-) -> int:
-    """Mark entries in given `group_id` read.
-    If `ids` is given mark entries from this list; else if `max_id` is given
-    - mark entries in range `min_id` to `max_id` including.
-
-    `ids` or (`max_id` and `min_id`) is required.
-
-    Args:
-        db: database obj
-        group_id: group id (required)
-        min_id, max_id: entries id range
-        ids: list of entries id to set
-    Return:
-        number of changed entries
-    """
-    if not group_id:
-        raise ValueError("missing group_id")
-
-    if not ((min_id and max_id) or ids):
-        raise ValueError("missing min/max id or ids")
-
-    args = {
-        "group_id": group_id,
-        "min_id": min_id,
-        "max_id": max_id,
-        "user_id": user_id,
-        "ids": ids,
-        "read_mark": model.EntryReadMark.READ,
-        "unread": model.EntryReadMark.UNREAD,
-    }
-    with db.cursor() as cur:
-        if ids:
-            cur.execute(_MARK_READ_BY_IDS_SQL, args)
-        else:
-            cur.execute(_MARK_READ_SQL, args)
-
-        return cur.rowcount  # type: ignore
-
-
 def update_state(db: DB, group_id: int, last_modified: datetime) -> str:
     """Save (update or insert) group last modified information.
 
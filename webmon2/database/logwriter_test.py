@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for buffered user logs writer.
+"""
+import threading
+import unittest
+
+from webmon2 import model
+
+from . import _logwriter
+
+
+def _log(idx):
+    return model.UserLog(user_id=1, content=str(idx))
+
+
+class TestLogWriter(unittest.TestCase):
+    def test_batch_size(self):
+        batches = []
+        writer = _logwriter.LogWriter(
+            batches.append, batch_size=2, interval=60
+        )
+        writer.start()
+        for idx in range(5):
+            self.assertTrue(writer.put(_log(idx)))
+
+        writer.stop(5)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(
+            [log.content for batch in batches for log in batch],
+            ["0", "1", "2", "3", "4"],
+        )
+
+    def test_interval(self):
+        saved = threading.Event()
+        batches = []
+
+        def save(batch):
+            batches.append(batch)
+            saved.set()
+
+        writer = _logwriter.LogWriter(save, batch_size=100, interval=0.05)
+        writer.start()
+        writer.put(_log(1))
+        self.assertTrue(saved.wait(5))
+        self.assertEqual(len(batches[0]), 1)
+        writer.stop(5)
+
+    def test_drop_when_full(self):
+        writer = _logwriter.LogWriter(lambda batch: None, max_queue=1)
+        self.assertTrue(writer.put(_log(1)))
+        self.assertFalse(writer.put(_log(2)))
+
+    def test_save_error(self):
+        def save(batch):
+            raise RuntimeError("error")
+
+        writer = _logwriter.LogWriter(save, batch_size=1)
+        writer.start()
+        writer.put(_log(1))
+        writer.stop(5)
+        self.assertFalse(writer.is_alive())
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for blocking connections pool.
+"""
+import threading
+import time
+import types
+import unittest
+
+from psycopg2 import extensions
+
+from . import _pool
+
+
+class _Conn:
+    closed = False
+    info = types.SimpleNamespace(
+        transaction_status=extensions.TRANSACTION_STATUS_IDLE
+    )
+
+    def close(self):
+        self.closed = True
+
+
+class _Pool(_pool.BlockingConnectionPool):
+    def _open(self):
+        return _Conn()
+
+
+class TestBlockingConnectionPool(unittest.TestCase):
+    def test_timeout(self):
+        cpool = _Pool(0, 1, timeout=0.05)
+        cpool.getconn()
+        start = time.monotonic()
+        with self.assertRaises(_pool.PoolTimeoutError):
+            cpool.getconn()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(cpool.waiting, 0)
+
+    def test_wait_for_returned(self):
+        cpool = _Pool(1, 1, timeout=5)
+        conn = cpool.getconn()
+        timer = threading.Timer(0.05, cpool.putconn, (conn,))
+        timer.start()
+        self.assertIs(cpool.getconn(), conn)
+        timer.join()
+
+    def test_max_waiting(self):
+        cpool = _Pool(0, 1, timeout=5, max_waiting=0)
+        cpool.getconn()
+        start = time.monotonic()
+        with self.assertRaises(_pool.PoolTimeoutError):
+            cpool.getconn()
+
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_open_and_restore_without_lock(self):
+        cpool = _Pool(1, 2, timeout=5)
+        conns = []
+
+        class _CheckedConn(_Conn):
+            def rollback(self):
+                assert not cpool._lock.locked()
+
+        def open_():
+            assert not cpool._lock.locked()
+            conn = _CheckedConn()
+            conn.info = types.SimpleNamespace(
+                transaction_status=extensions.TRANSACTION_STATUS_INTRANS
+            )
+            conns.append(conn)
+            return conn
+
+        cpool._open = open_
+        # first connection was opened on pool creation
+        conn1, conn2 = cpool.getconn(), cpool.getconn()
+        self.assertEqual(conns, [conn2])
+        # conn2 is kept after rollback, conn1 is over minconn
+        cpool.putconn(conn2)
+        cpool.putconn(conn1)
+        self.assertFalse(conn2.closed)
+        self.assertTrue(conn1.closed)
+        self.assertIs(cpool.getconn(), conn2)
+
+    def test_drop_closed(self):
+        cpool = _Pool(1, 1, timeout=0.05)
+        conn = cpool.getconn()
+        cpool.putconn(conn)
+        conn.closed = True
+        self.assertIsNot(cpool.getconn(), conn)
@@ -0,0 +1,48 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for prepared statements.
+"""
+import unittest
+
+from . import _prepared
+
+
+class TestMakeStatement(unittest.TestCase):
+    def test_positional(self):
+        stmt = _prepared.make_statement(
+            "test1", "SELECT * FROM t WHERE a=%s AND b LIKE 'x%%' AND c=%s"
+        )
+        self.assertEqual(
+            stmt.prepare_sql,
+            "PREPARE test1 AS SELECT * FROM t WHERE a=$1 AND b LIKE 'x%' "
+            "AND c=$2",
+        )
+        self.assertEqual(stmt.execute_sql, "EXECUTE test1 (%s, %s)")
+
+    def test_named(self):
+        stmt = _prepared.make_statement(
+            "test2", "UPDATE t SET a=%(a)s WHERE b=%(b)s OR c=%(a)s"
+        )
+        self.assertEqual(
+            stmt.prepare_sql,
+            "PREPARE test2 AS UPDATE t SET a=$1 WHERE b=$2 OR c=$1",
+        )
+        self.assertEqual(stmt.execute_sql, "EXECUTE test2 (%(a)s, %(b)s)")
+
+    def test_no_params(self):
+        stmt = _prepared.make_statement("test3", "SELECT 1")
+        self.assertEqual(stmt.execute_sql, "EXECUTE test3")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            _prepared.make_statement("test-4", "SELECT 1")
+
+        with self.assertRaises(ValueError):
+            _prepared.make_statement("test5", "SELECT %s, %(a)s")
@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for queries statistics.
+"""
+import datetime
+import unittest
+
+from . import _querystats as qs
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_fingerprint(self):
+        self.assertEqual(
+            qs.fingerprint(
+                "SELECT id -- comment\n"
+                "FROM entries /* multi\nline */ WHERE user_id=%s\n"
+                "  AND title = 'it''s' AND id IN (1, 2,3) LIMIT 10"
+            ),
+            "select id from entries where user_id=? "
+            "and title = ? and id in (?) limit ?",
+        )
+
+    def test_fingerprint_named_params(self):
+        self.assertEqual(
+            qs.fingerprint("update x set a=%(a)s, b = 1.5 where s2=%(id)s"),
+            "update x set a=?, b = ? where s2=?",
+        )
+
+    def test_same_fingerprint(self):
+        self.assertEqual(
+            qs.fingerprint("select * from t where id in (1,2,3)"),
+            qs.fingerprint("select *\nfrom t where id in (%s)"),
+        )
+
+
+class TestSlowQueries(unittest.TestCase):
+    def test_keep_slowest(self):
+        queries = qs._SlowQueries(3)  # pylint: disable=protected-access
+        now = datetime.datetime.now()
+        for duration in (0.5, 0.1, 0.7, 0.2, 0.9, 0.3):
+            if duration > queries.min_duration():
+                queries.add(qs.SlowQuery(duration, now, "", "", 0, ""))
+
+        self.assertEqual(queries.min_duration(), 0.5)
+        self.assertEqual(
+            [query.duration for query in queries.get()], [0.9, 0.7, 0.5]
+        )
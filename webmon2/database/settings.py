@@ -28,6 +28,7 @@ SELECT s.key AS setting__key,
 FROM settings s
 LEFT JOIN user_settings us ON us.key = s.key AND us.user_id=%s
 """
+_GET_ALL_STMT = DB.register_statement("settings_get_all", _GET_ALL_SQL)
 
 
 def get_all(db: DB, user_id: int) -> ty.List[model.Setting]:
@@ -36,7 +37,7 @@ def get_all(db: DB, user_id: int) -> ty.List[model.Setting]:
         raise ValueError("missing user_id")
 
     with db.cursor() as cur:
-        cur.execute(_GET_ALL_SQL, (user_id,))
+        db.execute(cur, _GET_ALL_STMT, (user_id,))
         return [model.Setting.from_row(row) for row in cur]
 
 
@@ -49,12 +50,13 @@ FROM settings s
 LEFT JOIN user_settings us ON us.key = s.key AND us.user_id=%s
 WHERE s.key=%s
 """
+_GET_STMT = DB.register_statement("settings_get", _GET_SQL)
 
 
 def get(db: DB, key: str, user_id: int) -> ty.Optional[model.Setting]:
     """Get one setting for given user"""
     with db.cursor() as cur:
-        cur.execute(_GET_SQL, (user_id, key))
+        db.execute(cur, _GET_STMT, (user_id, key))
         row = cur.fetchone()
 
     return model.Setting.from_row(row) if row else None
@@ -16,7 +16,7 @@ import typing as ty
 from webmon2 import model
 
 from . import _dbcommon as dbc
-from . import binaries, groups
+from . import binaries, groups, stats
 from ._db import DB
 
 _ = ty
@@ -70,13 +70,10 @@ SELECT s.id AS source__id, s.group_id AS source__group_id,
     ss.error AS source_state__error,
     ss.props AS source_state__props,
     ss.icon AS source_state__icon,
-    (
-        SELECT count(1)
-        FROM entries
-        WHERE source_id=s.id AND read_mark=0
-    ) AS unread
+    coalesce(st.unread, 0) AS unread
 FROM sources s
 JOIN source_state ss ON ss.source_id = s.id
+LEFT JOIN source_stats st ON st.source_id = s.id
 WHERE s.user_id=%(user_id)s"""
 
 
@@ -147,6 +144,28 @@ def get_all(
         return [_build_source(row, user_groups) for row in cur]
 
 
+_ITER_SOURCES_SQL = """
+SELECT id AS source__id, group_id AS source__group_id,
+    kind AS source__kind, name AS source__name, interval AS source__interval,
+    settings AS source__settings, filters AS source__filters,
+    user_id AS source__user_id, status AS source__status,
+    mail_report AS source__mail_report, default_score AS source__default_score
+FROM sources
+WHERE user_id=%(user_id)s
+ORDER BY group_id, name
+"""
+
+
+def iter_all(db: DB, user_id: int) -> ty.Iterator[model.Source]:
+    """Iterate over all user sources ordered by group; sources are loaded
+    without state and group using server-side cursor.
+    """
+    with db.named_cursor() as cur:
+        cur.execute(_ITER_SOURCES_SQL, {"user_id": user_id})
+        for row in cur:
+            yield model.Source.from_row(row)
+
+
 def get_all_dict(
     db: DB,
     user_id: int,
@@ -190,6 +209,7 @@ SELECT id AS source__id, group_id AS source__group_id,
 FROM sources
 WHERE id=%s
 """
+_GET_SOURCE_STMT = DB.register_statement("sources_get", _GET_SOURCE_SQL)
 
 
 def get(
@@ -210,7 +230,7 @@ def get(
         with_group: load source group info
     """
     with db.cursor() as cur:
-        cur.execute(_GET_SOURCE_SQL, (id_,))
+        db.execute(cur, _GET_SOURCE_STMT, (id_,))
         row = cur.fetchone()
 
     if row is None:
@@ -269,6 +289,7 @@ def save(db: DB, source: model.Source) -> model.Source:
             state = model.SourceState.new(source.id)
             state.status = model.SourceStateStatus.NEW
             save_state(db, state, source.user_id)
+            stats.refresh(db, (source.id,))
         else:
             cur.execute(_UPDATE_SOURCE_SQL, row)
 
@@ -398,12 +419,13 @@ SELECT source_id AS source_state__source_id,
 FROM source_state
 WHERE source_id=%s
 """
+_GET_STATE_STMT = DB.register_statement("sources_get_state", _GET_STATE_SQL)
 
 
 def get_state(db: DB, source_id: int) -> ty.Optional[model.SourceState]:
     """Get state for given source"""
     with db.cursor() as cur:
-        cur.execute(_GET_STATE_SQL, (source_id,))
+        db.execute(cur, _GET_STATE_STMT, (source_id,))
         row = cur.fetchone()
 
     return model.SourceState.from_row(row) if row else None
@@ -418,6 +440,12 @@ VALUES (%(source_state__source_id)s, %(source_state__next_update)s,
     %(source_state__status)s, %(source_state__error)s, %(source_state__props)s,
     %(source_state__icon)s, %(source_state__last_check)s)
 """
+_INSERT_STATE_STMT = DB.register_statement(
+    "sources_insert_state", _INSERT_STATE_SQL
+)
+_DELETE_STATE_STMT = DB.register_statement(
+    "sources_delete_state", "DELETE FROM source_state WHERE source_id=%s"
+)
 
 _UPDATE_STATE_SQL = """
 UPDATE source_state
@@ -442,10 +470,12 @@ def save_state(
     _LOG.debug("save_state: %s", state)
     row = model.SourceState.to_row(state)
     with db.cursor() as cur:
-        cur.execute(
-            "delete from source_state where source_id=%s", (state.source_id,)
-        )
-        cur.execute(_INSERT_STATE_SQL, row)
+        db.execute(cur, _DELETE_STATE_STMT, (state.source_id,))
+        db.execute(cur, _INSERT_STATE_STMT, row)
+
+    stats.set_error(
+        db, state.source_id, state.status == model.SourceStateStatus.ERROR
+    )
 
     if state.icon_data and state.icon:
         content_type, data = state.icon_data
@@ -455,21 +485,57 @@ def save_state(
 
 
 _GET_SOURCES_TO_FETCH_SQL = f"""
-SELECT s.id
+SELECT s.id,
+    count(*) OVER (PARTITION BY s.kind, s.settings) AS similar
 FROM source_state ss
 JOIN sources s ON s.id = ss.source_id
 JOIN users u ON s.user_id = u.id
 WHERE ss.next_update <= now()
     AND s.status = {model.SourceStatus.ACTIVE}
     AND u.active
+ORDER BY s.kind, s.settings, ss.last_update NULLS FIRST
 """
 
 
 def get_sources_to_fetch(db: DB) -> ty.List[int]:
     """Find sources with next update state in past"""
+    return [id_ for id_, _similar in get_sources_to_fetch_grouped(db)]
+
+
+def get_sources_to_fetch_grouped(db: DB) -> ty.List[ty.Tuple[int, bool]]:
+    """Find sources with next update state in past.
+
+    Sources with the same kind and settings are returned one after another,
+    ordered by last update (oldest first).
+
+    Return:
+        list of (source id, True if there are other sources to fetch with
+        the same kind and settings)
+    """
     with db.cursor() as cur:
         cur.execute(_GET_SOURCES_TO_FETCH_SQL)
-        return [row[0] for row in cur]
+        return [(row[0], row[1] > 1) for row in cur]
+
+
+_GET_BY_KINDS_SQL = """
+SELECT id AS source__id, group_id AS source__group_id,
+    kind AS source__kind, name AS source__name, interval AS source__interval,
+    settings AS source__settings, filters AS source__filters,
+    user_id AS source__user_id, status AS source__status,
+    mail_report AS source__mail_report, default_score AS source__default_score
+FROM sources
+WHERE id = ANY(%(ids)s) AND kind = ANY(%(kinds)s)
+"""
+
+
+def get_by_kinds(
+    db: DB, ids: ty.List[int], kinds: ty.List[str]
+) -> ty.List[model.Source]:
+    """Get sources with given `ids` and one of `kinds`; sources are loaded
+    without state and group."""
+    with db.cursor() as cur:
+        cur.execute(_GET_BY_KINDS_SQL, {"ids": ids, "kinds": kinds})
+        return [model.Source.from_row(row) for row in cur]
 
 
 _REFRESH_SQL = """
@@ -537,51 +603,6 @@ def refresh_errors(db: DB, user_id: int) -> int:
         return cur.rowcount  # type: ignore
 
 
-_MARK_READ_SQL = """
-UPDATE entries
-SET read_mark=%(read_mark)s
-WHERE source_id=%(source_id)s
-    AND (id<=%(max_id)s OR %(max_id)s<0) AND id>=%(min_id)s
-    AND read_mark=%(unread)s AND user_id=%(user_id)s
-"""
-
-_MARK_READ_BY_IDS_SQL = """
-UPDATE entries
-SET read_mark=%(read_mark)s
-WHERE source_id=%(source_id)s
-    AND id=ANY(%(ids)s)
-    AND read_mark=%(unread)s AND user_id=%(user_id)s
-"""
-
-
-# pylint: disable=too-many-arguments
-def mark_read(
-    db: DB,
-    user_id: int,
-    source_id: int,
-    max_id: ty.Optional[int] = None,
-    min_id: ty.Optional[int] = None,
-    ids: ty.Optional[ty.Iterable[int]] = None,
-) -> int:
-    """Mark source read"""
-    args = {
-        "source_id": source_id,
-        "max_id": max_id,
-        "min_id": min_id,
-        "user_id": user_id,
-        "ids": ids,
-        "read_mark": model.EntryReadMark.READ,
-        "unread": model.EntryReadMark.UNREAD,
-    }
-    with db.cursor() as cur:
-        if ids:
-            cur.execute(_MARK_READ_BY_IDS_SQL, args)
-        else:
-            cur.execute(_MARK_READ_SQL, args)
-
-        return cur.rowcount  # type: ignore
-
-
 def get_filter_state(
     db: DB, source_id: int, filter_name: str
 ) -> ty.Optional[ty.Dict[str, ty.Any]]:
@@ -666,14 +687,20 @@ def find_prev_entry_id(
         return row[0] if row else None
 
 
+_FIND_NEXT_UNREAD_SQL = """
+SELECT s.id
+FROM source_stats st
+JOIN sources s ON s.id = st.source_id
+WHERE s.user_id = %s AND st.unread > 0
+ORDER BY st.first_unread
+LIMIT 1
+"""
+
+
 def find_next_unread(db: DB, user_id: int) -> ty.Optional[int]:
+    """Find source with unread entries (with the oldest unread entry)."""
     with db.cursor() as cur:
-        cur.execute(
-            "SELECT e.source_id "
-            "FROM entries e "
-            "WHERE e.user_id = %s AND e.read_mark=%s",
-            (user_id, model.EntryReadMark.UNREAD),
-        )
+        cur.execute(_FIND_NEXT_UNREAD_SQL, (user_id,))
         row = cur.fetchone()
         return row[0] if row else None
 
@@ -0,0 +1,147 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Precomputed sources statistics (number of unread and all entries, first
+unread entry, date of last entry, error status).
+
+Statistics are recomputed only for changed sources: by worker after saving
+loaded entries and by functions that delete entries. Changing read marks
+only adjust number of unread entries by deltas returned by update.
+Groups statistics are sums of statistics of its sources.
+
+Before recomputing statistics rows are locked, so entries are counted in
+snapshot taken after concurrent transactions that changed read marks (and
+applied its deltas) are committed; such transactions started later wait
+and apply deltas on recomputed values.
+"""
+
+import logging
+import typing as ty
+
+from ._db import DB
+
+_ = ty
+_LOG = logging.getLogger(__name__)
+
+_REFRESH_SQL = """
+INSERT INTO source_stats (source_id, unread, total, first_unread,
+    last_entry, error, updated)
+SELECT s.id,
+    coalesce(e.unread, 0),
+    coalesce(e.total, 0),
+    e.first_unread,
+    e.last_entry,
+    coalesce(ss.status = 'error', false),
+    now()
+FROM sources s
+LEFT JOIN source_state ss ON ss.source_id = s.id
+LEFT JOIN (
+    SELECT source_id,
+        count(*) FILTER (WHERE read_mark = 0) AS unread,
+        count(*) AS total,
+        min(id) FILTER (WHERE read_mark = 0) AS first_unread,
+        max(coalesce(updated, created)) AS last_entry
+    FROM entries
+    WHERE {entries_where}
+    GROUP BY source_id
+) e ON e.source_id = s.id
+WHERE {sources_where}
+ON CONFLICT (source_id) DO UPDATE
+SET unread = EXCLUDED.unread,
+    total = EXCLUDED.total,
+    first_unread = EXCLUDED.first_unread,
+    last_entry = EXCLUDED.last_entry,
+    error = EXCLUDED.error,
+    updated = EXCLUDED.updated
+"""
+
+_LOCK_SOURCES_SQL = """
+SELECT source_id FROM source_stats
+WHERE source_id = ANY(%(ids)s)
+ORDER BY source_id
+FOR UPDATE
+"""
+
+_LOCK_USER_SQL = """
+SELECT st.source_id
+FROM source_stats st
+JOIN sources s ON s.id = st.source_id
+WHERE s.user_id = %(user_id)s
+ORDER BY st.source_id
+FOR UPDATE OF st
+"""
+
+_REFRESH_SOURCES_SQL = _REFRESH_SQL.format(
+    entries_where="source_id = ANY(%(ids)s)",
+    sources_where="s.id = ANY(%(ids)s)",
+)
+
+_REFRESH_USER_SQL = _REFRESH_SQL.format(
+    entries_where="user_id = %(user_id)s",
+    sources_where="s.user_id = %(user_id)s",
+)
+
+
+def refresh(db: DB, source_ids: ty.Iterable[int]) -> None:
+    """Recompute statistics for sources `source_ids`."""
+    ids = sorted(set(source_ids))
+    if not ids:
+        return
+
+    _LOG.debug("refresh: %r", ids)
+    with db.cursor() as cur:
+        cur.execute(_LOCK_SOURCES_SQL, {"ids": ids})
+        cur.execute(_REFRESH_SOURCES_SQL, {"ids": ids})
+
+
+def refresh_user(db: DB, user_id: int) -> None:
+    """Recompute statistics for all sources of `user_id`."""
+    _LOG.debug("refresh_user: %r", user_id)
+    with db.cursor() as cur:
+        cur.execute(_LOCK_USER_SQL, {"user_id": user_id})
+        cur.execute(_REFRESH_USER_SQL, {"user_id": user_id})
+
+
+def set_error(db: DB, source_id: int, error: bool) -> None:
+    """Update error status of source."""
+    with db.cursor() as cur:
+        cur.execute(
+            "UPDATE source_stats SET error=%s, updated=now() "
+            "WHERE source_id=%s AND error != %s",
+            (error, source_id, error),
+        )
+
+
+_APPLY_UNREAD_DELTAS_SQL = """
+UPDATE source_stats st
+SET unread = greatest(st.unread + d.delta, 0),
+    first_unread = (
+        SELECT min(e.id) FROM entries e
+        WHERE e.source_id = st.source_id AND e.read_mark = 0
+    ),
+    updated = now()
+FROM unnest(%(ids)s::integer[], %(deltas)s::integer[]) d(source_id, delta)
+WHERE st.source_id = d.source_id
+"""
+
+
+def apply_unread_deltas(db: DB, deltas: ty.Dict[int, int]) -> None:
+    """Update number of unread entries by `deltas` (source id -> change of
+    number of unread entries) without recounting all entries of sources."""
+    deltas = {sid: delta for sid, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    _LOG.debug("apply_unread_deltas: %r", deltas)
+    ids = sorted(deltas)
+    with db.cursor() as cur:
+        cur.execute(
+            _APPLY_UNREAD_DELTAS_SQL,
+            {"ids": ids, "deltas": [deltas[sid] for sid in ids]},
+        )
@@ -15,6 +15,7 @@ import typing as ty
 
 from webmon2 import model
 
+from . import _querystats
 from ._db import DB
 
 _LOG = logging.getLogger(__name__)
@@ -69,11 +70,14 @@ select id as session__id, expiry as session__expiry, data as session__data
 from sessions
 where id = %s
 """
+_GET_SESSION_STMT = DB.register_statement(
+    "system_get_session", _GET_SESSION_SQL
+)
 
 
 def get_session(db: DB, session_id: int) -> ty.Optional[model.Session]:
     with db.cursor() as cur:
-        cur.execute(_GET_SESSION_SQL, (session_id,))
+        db.execute(cur, _GET_SESSION_STMT, (session_id,))
         if row := cur.fetchone():
             return model.Session.from_row(row)
 
@@ -104,3 +108,58 @@ def delete_expired_sessions(db: DB) -> int:
     with db.cursor() as cur:
         cur.execute("delete from sessions where expiry <= now()")
         return cur.rowcount
+
+
+def save_source_timing(
+    db: DB, source_id: int, fetch_time: float, process_time: float
+) -> None:
+    """Save time (in seconds) of fetching and processing source."""
+    with db.cursor() as cur:
+        cur.execute(
+            "INSERT INTO source_fetch_log "
+            "(source_id, fetch_time, process_time) VALUES (%s, %s, %s)",
+            (source_id, fetch_time, process_time),
+        )
+
+
+_GET_SLOWEST_SOURCES_SQL = """
+SELECT s.id, s.name, s.kind, u.login, count(*) AS cnt,
+    avg(l.fetch_time) AS fetch_avg,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY l.fetch_time) AS fetch_p95,
+    avg(l.process_time) AS process_avg,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY l.process_time)
+        AS process_p95
+FROM source_fetch_log l
+JOIN sources s ON s.id = l.source_id
+JOIN users u ON u.id = s.user_id
+WHERE l.ts > now() - %(days)s * interval '1 day'
+GROUP BY s.id, s.name, s.kind, u.login
+ORDER BY avg(l.fetch_time + l.process_time) DESC
+LIMIT %(limit)s
+"""
+
+
+def get_slowest_sources(
+    db: DB, days: int = 7, limit: int = 50
+) -> ty.List[ty.Dict[str, ty.Any]]:
+    """Get sources with the highest average fetch + processing time in last
+    `days`."""
+    with db.cursor() as cur:
+        cur.execute(_GET_SLOWEST_SOURCES_SQL, {"days": days, "limit": limit})
+        return [dict(row) for row in cur]
+
+
+def delete_old_source_timing(db: DB, days: int = 7) -> int:
+    """Delete source timing older than `days`."""
+    with db.cursor() as cur:
+        cur.execute(
+            "DELETE FROM source_fetch_log "
+            "WHERE ts < now() - %s * interval '1 day'",
+            (days,),
+        )
+        return cur.rowcount
+
+
+def get_slow_queries() -> ty.List[_querystats.SlowQuery]:
+    """Get slowest queries executed since application start."""
+    return _querystats.SLOW_QUERIES.get()
@@ -9,13 +9,17 @@
 """
 Access & manage users in db
 """
+import atexit
 import logging
 import typing as ty
 
+from psycopg2 import extras
+
 from webmon2 import model
 
 from . import _dbcommon as dbc
 from ._db import DB
+from ._logwriter import LogWriter
 
 _LOG = logging.getLogger(__name__)
 
@@ -225,19 +229,78 @@ INSERT INTO user_logs (user_id, ts, content, related)
 VALUES (%(user_logs__user_id)s, %(user_logs__ts)s, %(user_logs__content)s,
   %(user_logs__related)s)
 """
+_PUT_LOG_STMT = DB.register_statement("users_put_log", _PUT_LOG_SQL)
+
+
+_SAVE_LOGS_SQL = """
+INSERT INTO user_logs (user_id, ts, content, related)
+VALUES %s
+"""
+_SAVE_LOGS_TEMPLATE = """(%(user_logs__user_id)s, %(user_logs__ts)s,
+  %(user_logs__content)s, %(user_logs__related)s)"""
+
+# buffered writer used by `put_log`; when not started logs are saved directly
+_LOG_WRITER: ty.Optional[LogWriter] = None
 
 
 def save_log(db: DB, log: model.UserLog) -> None:
     """Save UserLog into database."""
     with db.cursor() as cur:
-        cur.execute(_PUT_LOG_SQL, log.to_row())
+        db.execute(cur, _PUT_LOG_STMT, log.to_row())
+
+
+def save_logs(db: DB, logs: ty.Iterable[model.UserLog]) -> None:
+    """Save many UserLogs into database in one query."""
+    rows = [log.to_row() for log in logs]
+    if not rows:
+        return
+
+    with db.cursor() as cur:
+        extras.execute_values(
+            cur,
+            _SAVE_LOGS_SQL,
+            rows,
+            template=_SAVE_LOGS_TEMPLATE,
+            page_size=len(rows),
+        )
 
 
 def put_log(db: DB, user_id: int, content: str, **related: ty.Any) -> None:
-    """Add entry to user log."""
+    """Add entry to user log.
+
+    When log writer is started log is saved later, in batch, outside of
+    current transaction.
+    """
     log = model.UserLog(user_id=user_id, content=content, related=related)
-    with db.cursor() as cur:
-        cur.execute(_PUT_LOG_SQL, log.to_row())
+    if _LOG_WRITER is None or not _LOG_WRITER.put(log):
+        save_log(db, log)
+
+
+def _save_logs_batch(logs: ty.List[model.UserLog]) -> None:
+    with DB.get() as db:
+        save_logs(db, logs)
+        db.commit()
+
+
+def start_log_writer(
+    batch_size: int = 100, interval: float = 5.0, max_queue: int = 10000
+) -> None:
+    """Start buffered writer of user logs used by `put_log`."""
+    global _LOG_WRITER  # pylint: disable=global-statement
+    if _LOG_WRITER is not None:
+        return
+
+    _LOG_WRITER = LogWriter(_save_logs_batch, batch_size, interval, max_queue)
+    _LOG_WRITER.start()
+    atexit.register(stop_log_writer)
+
+
+def stop_log_writer(timeout: float = 10.0) -> None:
+    """Save buffered logs and stop log writer."""
+    global _LOG_WRITER  # pylint: disable=global-statement
+    writer, _LOG_WRITER = _LOG_WRITER, None
+    if writer is not None:
+        writer.stop(timeout)
 
 
 _GET_LOG_SQL = """
@@ -259,13 +322,20 @@ def get_logs(db: DB, user_id: int) -> ty.Iterable[model.UserLog]:
 
 _DELETE_OLD_LOGS_SQL = """
 DELETE FROM user_logs
-WHERE user_id=%s
-    and ts < now() - interval '7 days'
+WHERE ctid = ANY(ARRAY(
+    SELECT ctid FROM user_logs
+    WHERE ts < now() - %(days)s * interval '1 day'
+    LIMIT %(limit)s
+))
 """
 
 
-def delete_old_log(db: DB, user_id: int) -> int:
-    """Delete all user logs older than 7 days."""
+def delete_old_logs(db: DB, days: int = 7, limit: int = 10000) -> int:
+    """Delete up to `limit` logs (of all users) older than `days`.
+
+    Return number of deleted logs; call until it is lower than `limit` and
+    commit between calls to keep transactions short.
+    """
     with db.cursor() as cur:
-        cur.execute(_DELETE_OLD_LOGS_SQL, (user_id,))
+        cur.execute(_DELETE_OLD_LOGS_SQL, {"days": days, "limit": limit})
         return cur.rowcount
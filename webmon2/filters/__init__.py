@@ -9,12 +9,19 @@
 """
 Filters
 """
+
+import functools
+import hashlib
+import importlib
+import json
 import logging
 import typing as ty
 
-from webmon2 import common, database, model
+from prometheus_client import Counter
+
+from webmon2 import common, database, model, tracing
 
-from ._abstract import AbstractFilter
+from ._abstract import FILTERS, AbstractFilter
 
 _LOG = logging.getLogger(__name__)
 __all__ = (
@@ -24,32 +31,74 @@ __all__ = (
     "filters_name",
     "filters_info",
     "AbstractFilter",
+    "FILTERS",
+    "get_filter_class",
+    "load_plugins",
+    "get_pipeline",
+    "invalidate_pipeline",
 )
 
+_PIPELINES_BUILT = Counter(
+    "webmon2_filter_pipelines_built",
+    "Number of filter pipelines created (pipeline cache misses)",
+)
 
-def _load_filters() -> None:
-    # pylint: disable=unused-import,import-outside-toplevel
-    from . import (
-        diff,
-        fix_urls,
-        grep,
-        history,
-        html2text,
-        join,
-        score,
-        sort,
-        split_re,
-        strip,
-        wrap,
-    )
 
+# filter name -> module that define filter class; modules are imported on
+# first use
+_FILTERS_MODULES = {
+    "ndiff": "diff",
+    "fix_urls": "fix_urls",
+    "grep": "grep",
+    "remove_visited": "history",
+    "html2text": "html2text",
+    "join": "join",
+    "score": "score",
+    "sort": "sort",
+    "get-elements-by-re": "split_re",
+    "get-elements-by-css": "split_text",
+    "get-elements-by-xpath": "split_text",
+    "get-elements-by-id": "split_text",
+    "strip": "strip",
+    "compact": "strip",
+    "head": "strip",
+    "wrap": "wrap",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _import_module(name: str) -> bool:
     try:
-        from . import split_text
+        importlib.import_module("." + name, __name__)
     except ImportError as err:
-        _LOG.warning("module not found: %s", err)
+        _LOG.warning("load filter module %s error: %s", name, err)
+        return False
+
+    return True
 
 
-_load_filters()
+def load_plugins() -> None:
+    """Import all filters modules and filters defined in entry points."""
+    for name in dict.fromkeys(_FILTERS_MODULES.values()):
+        _import_module(name)
+
+    FILTERS.load_entry_points()
+
+
+def _registered_filters() -> ty.List[ty.Tuple[str, ty.Any]]:
+    """Get all registered filters; built-in first in definition order."""
+    load_plugins()
+    order = {name: idx for idx, name in enumerate(_FILTERS_MODULES)}
+    return sorted(
+        FILTERS.items(), key=lambda item: order.get(item[0], len(order))
+    )
+
+
+def get_filter_class(name: str) -> ty.Optional[ty.Type[AbstractFilter]]:
+    if module := _FILTERS_MODULES.get(name):
+        _import_module(module)
+
+    return FILTERS.get(name)
 
 
 class UnknownFilterException(Exception):
@@ -63,7 +112,7 @@ def get_filter(conf: ty.Dict[str, ty.Any]) -> ty.Optional[AbstractFilter]:
         _LOG.error("missing filter name: %r", conf)
         return None
 
-    rcls = common.find_subclass(AbstractFilter, name)
+    rcls = get_filter_class(name)
     _LOG.debug("found filter %r for %s", rcls, name)
     if rcls:
         fltr: AbstractFilter = rcls(conf)
@@ -72,33 +121,88 @@ def get_filter(conf: ty.Dict[str, ty.Any]) -> ty.Optional[AbstractFilter]:
     raise UnknownFilterException()
 
 
+# validated filters for source id; value is (configuration hash, filters)
+_PIPELINES: common.LRUCache[
+    int, ty.Tuple[str, ty.List[AbstractFilter]]
+] = common.LRUCache(1000)
+
+
+def _conf_hash(filters_conf: ty.List[ty.Dict[str, ty.Any]]) -> str:
+    data = json.dumps(filters_conf, sort_keys=True, default=str)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def _build_pipeline(
+    filters_conf: ty.List[ty.Dict[str, ty.Any]],
+) -> ty.List[AbstractFilter]:
+    _PIPELINES_BUILT.inc()
+    pipeline = []
+    for filter_conf in filters_conf:
+        fltr = get_filter(filter_conf)
+        if fltr:
+            fltr.validate()
+            pipeline.append(fltr)
+
+    return pipeline
+
+
+def get_pipeline(
+    source_id: int, filters_conf: ty.List[ty.Dict[str, ty.Any]]
+) -> ty.List[AbstractFilter]:
+    """Get validated filters for source.
+
+    Filters are created once and cached for source as long as its filters
+    configuration is not changed.
+    """
+    conf_hash = _conf_hash(filters_conf)
+    cached = _PIPELINES.get(source_id)
+    if cached and cached[0] == conf_hash:
+        return cached[1]
+
+    pipeline = _build_pipeline(filters_conf)
+    _PIPELINES.put(source_id, (conf_hash, pipeline))
+    return pipeline
+
+
+def invalidate_pipeline(source_id: int) -> None:
+    """Drop cached filters for source."""
+    _PIPELINES.pop(source_id)
+
+
 def filter_by(
     filters_conf: ty.List[ty.Dict[str, ty.Any]],
     entries: model.Entries,
     prev_state: model.SourceState,
     curr_state: model.SourceState,
     db: database.DB,
+    tracer: ty.Optional[tracing.Tracer] = None,
+    source_id: ty.Optional[int] = None,
 ) -> model.Entries:
-    """Apply filters by configuration to entries list."""
-
-    for filter_conf in filters_conf:
-        fltr = get_filter(filter_conf)
-        if fltr:
-            fltr.db = db
-            fltr.validate()
-            entries = fltr.filter(entries, prev_state, curr_state)
+    """Apply filters by configuration to entries list.
+
+    When `source_id` is given, filters are taken from pipelines cache.
+    When `tracer` is given, time spent in each filter is measured.
+    """
+    if source_id:
+        pipeline = get_pipeline(source_id, filters_conf)
+    else:
+        pipeline = _build_pipeline(filters_conf)
+
+    for fltr in pipeline:
+        fltr.db = db
+        entries = fltr.filter(entries, prev_state, curr_state)
+        if tracer:
+            entries = tracer.wrap("filter", entries, fltr.name)
 
     return entries
 
 
 def filters_name() -> ty.List[str]:
-    return [
-        name for name, scls in common.get_subclasses_with_name(AbstractFilter)
-    ]
+    return [name for name, scls in _registered_filters()]
 
 
 def filters_info() -> ty.List[ty.Tuple[str, str, str]]:
     return [
         (name, scls.short_info, scls.long_info)
-        for name, scls in common.get_subclasses_with_name(AbstractFilter)
+        for name, scls in _registered_filters()
     ]
@@ -16,6 +16,9 @@ import typing as ty
 from webmon2 import common, database, model
 
 _ = ty
+# registered filters classes; third-party filters can be also defined as
+# `webmon2.filters` entry points
+FILTERS: common.Registry["AbstractFilter"] = common.Registry("webmon2.filters")
 
 
 class AbstractFilter:
@@ -26,6 +29,10 @@ class AbstractFilter:
     long_info = ""
     params = []  # type: ty.List[common.SettingDef]
 
+    def __init_subclass__(cls, **kwargs: ty.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        FILTERS.register(cls)
+
     def __init__(self, config: model.ConfDict) -> None:
         super().__init__()
         self.db: ty.Optional[database.DB] = None
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# pylint: skip-file
+# type: ignore
+"""
+Copyright (c) Karol Będkowski, 2016-2023
+
+This file is part of webmon.\
+Licence: GPLv2+
+"""
+
+import unittest
+
+from webmon2 import filters
+
+
+class TestPipelineCache(unittest.TestCase):
+    def setUp(self):
+        filters.invalidate_pipeline(1)
+
+    def test_reuse(self):
+        conf = [{"name": "strip"}, {"name": "grep", "pattern": "a.*"}]
+        pipeline = filters.get_pipeline(1, conf)
+        self.assertEqual([f.name for f in pipeline], ["strip", "grep"])
+        self.assertIs(filters.get_pipeline(1, conf), pipeline)
+        # the same configuration in new objects
+        conf2 = [{"name": "strip"}, {"pattern": "a.*", "name": "grep"}]
+        self.assertIs(filters.get_pipeline(1, conf2), pipeline)
+
+    def test_conf_changed(self):
+        conf = [{"name": "grep", "pattern": "a.*"}]
+        pipeline = filters.get_pipeline(1, conf)
+        conf[0]["pattern"] = "b.*"
+        pipeline2 = filters.get_pipeline(1, conf)
+        self.assertIsNot(pipeline2, pipeline)
+        self.assertIs(filters.get_pipeline(1, conf), pipeline2)
+
+    def test_invalidate(self):
+        conf = [{"name": "strip"}]
+        pipeline = filters.get_pipeline(1, conf)
+        filters.invalidate_pipeline(1)
+        self.assertIsNot(filters.get_pipeline(1, conf), pipeline)
+
+
+if __name__ == "__main__":
+    unittest.main()
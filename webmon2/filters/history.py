@@ -14,11 +14,13 @@ import typing as ty
 
 from flask_babel import lazy_gettext
 
-from webmon2 import database, model
+from webmon2 import common, database, model
 
 from ._abstract import AbstractFilter
 
 _ = ty
+# number of entries checked in one query
+_CHUNK_SIZE = 100
 
 
 class History(AbstractFilter):
@@ -38,18 +40,15 @@ class History(AbstractFilter):
     ) -> model.Entries:
         assert self.db
 
-        entries = list(entries)
-        if not entries:
-            return
-
-        oids = [entry.calculate_oid() for entry in entries]
-        new_oids = set()  # type: ty.Set[str]
-        new_oids = database.entries.check_oids(
-            self.db, oids, curr_state.source_id
-        )
-        for entry in entries:
-            if entry.oid in new_oids:
-                yield entry
+        # check entries in chunks to not keep all entries in memory
+        for chunk in common.chunked(entries, _CHUNK_SIZE):
+            oids = [entry.calculate_oid() for entry in chunk]
+            new_oids = database.entries.check_oids(
+                self.db, oids, curr_state.source_id
+            )
+            for entry in chunk:
+                if entry.oid in new_oids:
+                    yield entry
 
     def _filter(self, entry: model.Entry) -> model.Entries:
         pass
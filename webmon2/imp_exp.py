@@ -61,15 +61,40 @@ def _dump_sources(
         )
 
 
+def _iter_json_list(
+    encoder: json.JSONEncoder, items: ty.Iterable[ty.Any]
+) -> ty.Iterator[str]:
+    yield "["
+    for idx, item in enumerate(items):
+        if idx:
+            yield ", "
+
+        yield from encoder.iterencode(item)
+
+    yield "]"
+
+
+def iter_export(db: database.DB, user_id: int) -> ty.Iterator[str]:
+    """Export user groups, settings and sources as json document. Document
+    is generated incrementally."""
+    encoder = json.JSONEncoder()
+    yield '{"groups": '
+    yield from _iter_json_list(
+        encoder, _dump_groups(database.groups.get_all(db, user_id))
+    )
+    yield ', "settings": '
+    yield from _iter_json_list(
+        encoder, map(dump_object, database.settings.get_all(db, user_id))
+    )
+    yield ', "sources": '
+    yield from _iter_json_list(
+        encoder, _dump_sources(database.sources.iter_all(db, user_id))
+    )
+    yield "}"
+
+
 def dump_export(db: database.DB, user_id: int) -> str:
-    data = {
-        "groups": list(_dump_groups(database.groups.get_all(db, user_id))),
-        "settings": list(
-            map(dump_object, database.settings.get_all(db, user_id))
-        ),
-        "sources": list(_dump_sources(database.sources.get_all(db, user_id))),
-    }
-    return json.dumps(data)
+    return "".join(iter_export(db, user_id))
 
 
 def fill_object(
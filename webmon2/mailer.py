@@ -10,28 +10,42 @@
 Sending reports by mail functions
 """
 
+from __future__ import annotations
+
+import atexit
 import email.message
 import email.utils
+import hashlib
+import itertools
 import logging
-import os
 import re
+import shutil
 import smtplib
 import subprocess
 import tempfile
+import threading
 import typing as ty
 from configparser import ConfigParser
 from contextlib import suppress
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 
 import html2text as h2t
-from prometheus_client import Counter
+from prometheus_client import Counter, Histogram
 
 from webmon2 import common, database, formatters, model
 
 _LOG = logging.getLogger(__name__)
 _SENT_MAIL_COUNT = Counter("webmon2_mails_count", "Mail sent count")
+_RENDER_TIME = Histogram(
+    "webmon2_mail_render_seconds", "Mail report render time"
+)
+# keyring: "user" - key defined by user, "default" - default gpg keyring
+_ENCRYPT_TIME = Histogram(
+    "webmon2_mail_encrypt_seconds", "Mail report encrypt time", ["keyring"]
+)
+_SEND_TIME = Histogram("webmon2_mail_send_seconds", "Mail report send time")
 
 
 @dataclass
@@ -39,20 +53,120 @@ class Ctx:
     user_id: int
     conf: ty.Dict[str, ty.Any]
     timezone: ty.Optional[ZoneInfo] = None
+    # ids of entries included in report
+    entries_ids: ty.List[int] = field(default_factory=list)
+
+
+class SmtpConnection:
+    """SMTP connection shared by many messages. Connection is established
+    on first send and closed on `close` (or on exit from context)."""
+
+    def __init__(self, app_conf: ConfigParser) -> None:
+        self._conf = app_conf
+        self._smtp: ty.Optional[smtplib.SMTP] = None
+
+    def __enter__(self) -> SmtpConnection:
+        return self
+
+    def __exit__(self, *args: ty.Any) -> None:
+        self.close()
+
+    def send(self, msg: email.message.EmailMessage, mail_to: str) -> None:
+        """Send message; reconnect once when connection was closed by
+        server."""
+        try:
+            self._get_connection().sendmail(
+                msg["From"], [mail_to], msg.as_string()
+            )
+        except smtplib.SMTPServerDisconnected:
+            _LOG.debug("smtp disconnected; reconnecting")
+            self._smtp = None
+            self._get_connection().sendmail(
+                msg["From"], [mail_to], msg.as_string()
+            )
+
+    def close(self) -> None:
+        if self._smtp:
+            with suppress(Exception):
+                self._smtp.quit()
+
+            self._smtp = None
+
+    def _get_connection(self) -> smtplib.SMTP:
+        if self._smtp:
+            return self._smtp
+
+        app_conf = self._conf
+        ssl = app_conf.getboolean("smtp", "ssl")
+        smtp = smtplib.SMTP_SSL() if ssl else smtplib.SMTP()
+        if _LOG.isEnabledFor(logging.DEBUG):
+            smtp.set_debuglevel(True)
+
+        host = app_conf.get("smtp", "address")
+        port = app_conf.getint("smtp", "port")
+        _LOG.debug("host, port: %r, %r", host, port)
+        smtp.connect(host, port)
+        smtp.ehlo()
+        if app_conf.getboolean("smtp", "starttls") and not ssl:
+            smtp.starttls()
+
+        login = app_conf.get("smtp", "login")
+        if login:
+            smtp.login(login, app_conf.get("smtp", "password"))
+
+        self._smtp = smtp
+        return smtp
+
+
+@dataclass
+class Report:
+    """Mail report prepared for user."""
+
+    user: model.User
+    conf: ty.Dict[str, ty.Any]
+    # message to send; None if there is nothing to send
+    msg: ty.Optional[email.message.EmailMessage] = None
+    mail_to: str = ""
+    # ids of entries included in report
+    entries_ids: ty.List[int] = field(default_factory=list)
+
+
+def process(
+    db: database.DB,
+    user: model.User,
+    app_conf: ConfigParser,
+    smtp: ty.Optional[SmtpConnection] = None,
+) -> bool:
+    """Process unread entries for user and send report via mail.
+    Use `smtp` connection if given."""
+    report = prepare(db, user, app_conf)
+    if not report:
+        return False
 
+    if smtp:
+        return send(db, report, smtp)
 
-def process(db: database.DB, user: model.User, app_conf: ConfigParser) -> bool:
-    """Process unread entries for user and send report via mail"""
+    with SmtpConnection(app_conf) as new_smtp:
+        return send(db, report, new_smtp)
+
+
+def prepare(
+    db: database.DB, user: model.User, app_conf: ConfigParser
+) -> ty.Optional[Report]:
+    """Check is mail report should be send to `user` and prepare it
+    (render and encrypt if configured).
+
+    Return None when report should not be sent."""
     if not user.id:
         raise ValueError("require existing user")
 
     conf = database.settings.get_dict(db, user.id)
     if not conf.get("mail_enabled"):
         _LOG.debug("mail not enabled for user %d", user.id)
-        return False
+        return None
 
     if _is_silent_hour(conf):
-        return False
+        return None
 
     # it is time for send mail?
     last_send = database.users.get_state(
@@ -67,7 +181,7 @@ def process(db: database.DB, user: model.User, app_conf: ConfigParser) -> bool:
         )
         if last_send + interval > datetime.now(timezone.utc):
             _LOG.debug("still waiting for send mail")
-            return False
+            return None
 
     ctx = Ctx(
         user_id=user.id,
@@ -76,19 +190,52 @@ def process(db: database.DB, user: model.User, app_conf: ConfigParser) -> bool:
     if tzone := conf.get("timezone"):
         ctx.timezone = ZoneInfo(tzone)
 
+    report = Report(user, conf)
+
     try:
-        content = "".join(_process_groups(ctx, db))
+        with _RENDER_TIME.time():
+            content = "".join(_process_groups(ctx, db))
     except Exception as err:  # pylint: disable=broad-except
         _LOG.error("prepare mail for user %d error: %s", user.id, err)
-        return False
+        return None
 
-    if content and not _send_mail(conf, content, app_conf, user):
-        return False
+    if not content:
+        return report
+
+    mail_to = conf["mail_to"] or user.email
+    if not mail_to:
+        _LOG.error("email enabled for user %d but no email defined ", user.id)
+        return None
+
+    msg = _prepare_msg(conf, content)
+    msg["Subject"] = conf["mail_subject"]
+    msg["From"] = app_conf.get("smtp", "from")
+    msg["To"] = mail_to
+    msg["Date"] = email.utils.formatdate()
+
+    report.msg = msg
+    report.mail_to = mail_to
+    report.entries_ids = ctx.entries_ids
+    return report
+
+
+def send(db: database.DB, report: Report, smtp: SmtpConnection) -> bool:
+    """Send prepared `report` using `smtp` connection; mark reported
+    entries read (if configured) and update user mail state."""
+    user_id = report.user.id
+    assert user_id
+
+    if report.msg:
+        if not _send_mail(report, smtp):
+            return False
+
+        if report.conf.get("mail_mark_read") and report.entries_ids:
+            database.entries.mark_read(db, user_id, ids=report.entries_ids)
 
     _SENT_MAIL_COUNT.inc()
     database.users.set_state(
         db,
-        user.id,
+        user_id,
         "mail_last_send",
         datetime.now(timezone.utc).timestamp(),
     )
@@ -98,92 +245,64 @@ def process(db: database.DB, user: model.User, app_conf: ConfigParser) -> bool:
 
 def _process_groups(ctx: Ctx, db: database.DB) -> ty.Iterable[str]:
     """
-    Iterate over source groups for `user_id` and build mail body.
+    Load all unread entries for `user_id` (one query) and build mail body.
     """
-    for group in database.groups.get_all(db, ctx.user_id):
-        if group.mail_report == model.MailReportMode.NO_SEND:
-            _LOG.debug("group %s skipped", group.name)
-            continue
-
-        if not group.unread:
-            _LOG.debug("no unread entries in group %s", group.name)
-            continue
-
-        assert group.id
-        yield from _process_group(ctx, db, group.id)
+    entries = database.entries.find_for_mail(db, ctx.user_id)
+    for _group_id, group_entries in itertools.groupby(
+        entries, key=lambda entry: entry.source.group_id
+    ):
+        yield from _process_group(ctx, group_entries)
 
 
 def _process_group(
-    ctx: Ctx, db: database.DB, group_id: int
+    ctx: Ctx, entries: ty.Iterable[model.EntryListItem]
 ) -> ty.Iterator[str]:
     """
-    Process sources in `group_id` and build mail body part.
+    Build mail body part for `entries` from one group.
     """
-    _LOG.debug("processing group %d", group_id)
-    sources = [
-        source
-        for source in database.sources.get_all(db, ctx.user_id, group_id)
-        if source.unread and source.mail_report != model.MailReportMode.NO_SEND
-    ]
-    if not sources:
-        _LOG.debug("no unread sources in group %d", group_id)
+    entries = iter(entries)
+    first_entry = next(entries, None)
+    if not first_entry:
         return
 
-    assert sources[0].group
-    group_name = sources[0].group.name
+    group_name = first_entry.source.group.name
+    _LOG.debug("processing group %s", group_name)
     yield group_name
     yield "\n"
     yield "=" * len(group_name)
     yield "\n\n"
 
-    for source in sources:
-        yield from _proces_source(ctx, db, source.id)
+    for _source_id, source_entries in itertools.groupby(
+        itertools.chain((first_entry,), entries),
+        key=lambda entry: entry.source_id,
+    ):
+        yield from _proces_source(ctx, source_entries)
 
     yield "\n\n\n"
 
 
 def _proces_source(
-    ctx: Ctx, db: database.DB, source_id: int
+    ctx: Ctx, entries: ty.Iterable[model.EntryListItem]
 ) -> ty.Iterator[str]:
     """
-    Build mail content for `source_id`.
+    Build mail content for `entries` from one source.
     """
-    _LOG.debug("processing source %d", source_id)
-
-    entries = [
-        entry
-        for entry in database.entries.find(
-            db,
-            ctx.user_id,
-            source_id=source_id,
-        )
-        if model.MailReportMode.SEND
-        in (entry.source.mail_report, entry.source.group.mail_report)  # type: ignore
-        or (
-            entry.source.mail_report  # type: ignore
-            == entry.source.group.mail_report  # type: ignore
-            == model.MailReportMode.AS_GROUP_SOURCE
-        )
-    ]
-
-    if not entries:
-        _LOG.debug("no entries to send in source %d", source_id)
+    entries = iter(entries)
+    first_entry = next(entries, None)
+    if not first_entry:
         return
 
-    assert entries[0].source
-    source_name = entries[0].source.name
+    source_name = first_entry.source.name
+    _LOG.debug("processing source %s", source_name)
     yield source_name
     yield "\n"
     yield "-" * len(source_name)
     yield "\n\n"
 
-    for entry in entries:
+    for entry in itertools.chain((first_entry,), entries):
         _LOG.debug("processing entry id %dd", entry.id)
         yield from _render_entry_plain(ctx, entry)
-
-    if ctx.conf.get("mail_mark_read"):
-        ids = [entry.id for entry in entries]
-        database.entries.mark_read(db, ctx.user_id, ids=ids)
+        ctx.entries_ids.append(entry.id)
 
     yield "\n\n"
 
@@ -195,7 +314,9 @@ def _adjust_header(line: str, prefix: str = "###") -> str:
     return line
 
 
-def _render_entry_plain(ctx: Ctx, entry: model.Entry) -> ty.Iterator[str]:
+def _render_entry_plain(
+    ctx: Ctx, entry: model.EntryListItem
+) -> ty.Iterator[str]:
     """
     Render entry as markdown document.
     If entry content type is not plain or markdown try convert it to plain text.
@@ -272,94 +393,152 @@ def _prepare_msg(
     return msg
 
 
-def _send_mail(
-    conf: ty.Dict[str, ty.Any],
-    content: str,
-    app_conf: ConfigParser,
-    user: model.User,
-) -> bool:
-    _LOG.debug("send mail: %r", conf)
-    mail_to = conf["mail_to"] or user.email
-
-    if not mail_to:
-        _LOG.error("email enabled for user %d but no email defined ", user.id)
-        return False
-
+def _send_mail(report: Report, smtp: SmtpConnection) -> bool:
+    assert report.msg
+    user_id = report.user.id
     try:
-        msg = _prepare_msg(conf, content)
-        msg["Subject"] = conf["mail_subject"]
-        msg["From"] = app_conf.get("smtp", "from")
-        msg["To"] = mail_to
-        msg["Date"] = email.utils.formatdate()
-        ssl = app_conf.getboolean("smtp", "ssl")
-        smtp = smtplib.SMTP_SSL() if ssl else smtplib.SMTP()
-        if _LOG.isEnabledFor(logging.DEBUG):
-            smtp.set_debuglevel(True)
-
-        host = app_conf.get("smtp", "address")
-        port = app_conf.getint("smtp", "port")
-        _LOG.debug("host, port: %r, %r", host, port)
-        smtp.connect(host, port)
-        smtp.ehlo()
-        if app_conf.getboolean("smtp", "starttls") and not ssl:
-            smtp.starttls()
+        with _SEND_TIME.time():
+            smtp.send(report.msg, report.mail_to)
 
-        login = app_conf.get("smtp", "login")
-        if login:
-            smtp.login(login, app_conf.get("smtp", "password"))
-
-        smtp.sendmail(msg["From"], [mail_to], msg.as_string())
         _LOG.debug("mail send")
     except (smtplib.SMTPServerDisconnected, ConnectionRefusedError) as err:
-        _LOG.error("smtp connection error: %s; user %d", err, user.id)
+        _LOG.error("smtp connection error: %s; user %d", err, user_id)
+        smtp.close()
         return False
     except Exception:  # pylint: disable=broad-except
         _LOG.exception("send mail error")
+        smtp.close()
         return False
-    finally:
-        with suppress():
-            smtp.quit()
+
     return True
 
 
-def _encrypt(conf: ty.Dict[str, ty.Any], message: str) -> str:
-    args = ["/usr/bin/env", "gpg", "-e", "-a", "-r", conf["mail_to"]]
+class GpgKeyring:
+    """Private gpg keyring used to encrypt messages with keys defined by
+    users.
+
+    Keys are imported once (and identified by fingerprint), so next
+    messages reuse keyring and gpg-agent started for it instead of
+    importing key for each message.
+    """
 
-    if user_key := conf.get("gpg_key"):
-        keyfile_name = None
-        with tempfile.NamedTemporaryFile(delete=False) as keyfile:
-            keyfile.write(user_key.encode("UTF-8"))
-            keyfile_name = keyfile.name
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._homedir: ty.Optional[str] = None
+        # hash of key -> fingerprints
+        self._keys: ty.Dict[str, ty.List[str]] = {}
+
+    def encrypt(
+        self, message: str, mail_to: str, user_key: ty.Optional[str]
+    ) -> str:
+        """Encrypt `message` for `mail_to` using default keyring or, when
+        `user_key` is given, for all keys from `user_key`.
+
+        Keyring is shared by all users, so with `user_key` message is
+        encrypted to fingerprints of imported keys, not by `mail_to`
+        (which may match key of other user); user ids of the key do not
+        need to match `mail_to`.
+        """
+        if not user_key:
+            # use default keyring
+            args = ["/usr/bin/env", "gpg", "--batch", "-e", "-a"]
+            args.extend(("-r", mail_to))
+            return _do_encrypt(args, message)
+
+        args = self._gpg_args()
+        args.extend(("--trust-model", "always", "-e", "-a"))
+        for fpr in self._get_recipients(user_key):
+            args.extend(("-r", fpr))
+
+        return _do_encrypt(args, message)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._homedir:
+                with suppress(Exception):
+                    subprocess.run(
+                        ["/usr/bin/env", "gpgconf", "--homedir"]
+                        + [self._homedir, "--kill", "gpg-agent"],
+                        check=False,
+                        timeout=10,
+                        capture_output=True,
+                    )
+                shutil.rmtree(self._homedir, ignore_errors=True)
+                self._homedir = None
+                self._keys.clear()
+
+    def _gpg_args(self) -> ty.List[str]:
+        with self._lock:
+            if not self._homedir:
+                self._homedir = tempfile.mkdtemp(prefix="webmon2-gpg-")
+
+            return ["/usr/bin/env", "gpg", "--batch"] + [
+                "--homedir",
+                self._homedir,
+            ]
+
+    def _get_recipients(self, user_key: str) -> ty.List[str]:
+        key_hash = hashlib.sha256(user_key.encode("UTF-8")).hexdigest()
+        if fprs := self._keys.get(key_hash):
+            return fprs
+
+        args = self._gpg_args() + ["--status-fd", "1", "--import"]
+        with self._lock:
+            res = subprocess.run(
+                args,
+                input=user_key.encode("UTF-8"),
+                capture_output=True,
+                timeout=60,
+                check=False,
+            )
+            fprs = [
+                line.split()[3]
+                for line in res.stdout.decode("ascii", "replace").split("\n")
+                if line.startswith("[GNUPG:] IMPORT_OK ")
+            ]
+            if not fprs:
+                raise RuntimeError(
+                    "import key error: "
+                    + res.stderr.decode("utf-8", "replace")
+                )
 
-        args.extend(("-f", keyfile_name))
-        try:
-            return __do_encrypt(args, message)
-        finally:
-            os.unlink(keyfile.name)
+            self._keys[key_hash] = fprs
+
+        return fprs
+
+
+_GPG_KEYRING = GpgKeyring()
+atexit.register(_GPG_KEYRING.close)
 
-    return __do_encrypt(args, message)
 
+def _encrypt(conf: ty.Dict[str, ty.Any], message: str) -> str:
+    keyring = "user" if conf.get("gpg_key") else "default"
+    with _ENCRYPT_TIME.labels(keyring).time():
+        return _GPG_KEYRING.encrypt(
+            message, conf["mail_to"], conf.get("gpg_key")
+        )
 
-def __do_encrypt(args: ty.List[str], message: str) -> str:
-    with subprocess.Popen(
+
+def _do_encrypt(args: ty.List[str], message: str) -> str:
+    res = subprocess.run(
         args,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    ) as subp:
-        stdout, stderr = subp.communicate(message.encode("utf-8"))
-        if subp.wait(60) != 0:
-            _LOG.error(
-                "EMailOutput: encrypt error: %s; args: %r",
-                stderr,
-                args,
-            )
-            return stderr.decode("ascii")
+        input=message.encode("utf-8"),
+        capture_output=True,
+        timeout=60,
+        check=False,
+    )
+    if res.returncode != 0:
+        _LOG.error(
+            "EMailOutput: encrypt error: %s; args: %r",
+            res.stderr,
+            args,
+        )
+        return res.stderr.decode("ascii", "replace")
 
-        return stdout.decode("ascii")
+    return res.stdout.decode("ascii")
 
 
-def _get_entry_score_mark(entry: model.Entry) -> str:
+def _get_entry_score_mark(entry: model.EntryListItem) -> str:
     if entry.score < -5:
         return "▼▼ "
     if entry.score < 0:
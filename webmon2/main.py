@@ -19,8 +19,6 @@ import typing as ty
 from configparser import ConfigParser
 from contextlib import suppress
 
-from werkzeug.serving import is_running_from_reloader
-
 try:
     import stackprinter
 
@@ -43,16 +41,7 @@ try:
 except ImportError:
     HAS_SDNOTIFY = False
 
-from . import (
-    APP_NAME,
-    VERSION,
-    cli,
-    conf,
-    database,
-    logging_setup,
-    web,
-    worker,
-)
+from . import APP_NAME, VERSION, cli, conf, database, logging_setup
 
 __author__ = "Karol Będkowski"
 __copyright__ = "Copyright (c) Karol Będkowski, 2016-2022"
@@ -329,9 +318,20 @@ def _load_conf(args: argparse.Namespace) -> ConfigParser:
     return app_conf
 
 
+def _is_running_from_reloader() -> bool:
+    # same as werkzeug.serving.is_running_from_reloader; avoid importing
+    # werkzeug for commands other than serve
+    return os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
 def _serve(args: argparse.Namespace, app_conf: ConfigParser) -> None:
+    # web and worker modules import all web stack (flask, gevent) and
+    # plugins; load it only for serve command.
+    # pylint: disable=import-outside-toplevel
+    from . import web, worker
+
     if (
-        not is_running_from_reloader()
+        not _is_running_from_reloader()
         and app_conf.getint("main", "workers", fallback=2) > 0
     ):
         if HAS_SDNOTIFY and _SDN:
@@ -356,7 +356,7 @@ def _serve(args: argparse.Namespace, app_conf: ConfigParser) -> None:
 
 
 def _update_schema(app_conf: ConfigParser) -> None:
-    if is_running_from_reloader():
+    if _is_running_from_reloader():
         _LOG.error("cannot update schema when running from reloader")
     else:
         _LOG.info("update schema...")
@@ -377,8 +377,9 @@ def main() -> None:
     args = _parse_options()
     logging_setup.setup(args.log, args.debug, args.silent)
 
-    _check_libraries()
-    _load_user_classes()
+    if args.cmd in ("abilities", "serve", "shell"):
+        _check_libraries()
+        _load_user_classes()
 
     if args.cmd == "abilities":
         cli.show_abilities()
@@ -401,6 +402,9 @@ def main() -> None:
         False,
         app_conf.getint("main", "db_pool_min", fallback=2),
         app_conf.getint("main", "db_pool_max", fallback=20),
+        app_conf.getfloat("main", "db_pool_timeout", fallback=30.0),
+        app_conf.getint("main", "db_pool_max_waiting", fallback=100),
+        app_conf.getboolean("main", "db_prepared_statements", fallback=True),
     )
 
     if cli.process_cli(args, app_conf):
@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Startup (import time) regression tests.
+"""
+import os
+import subprocess
+import sys
+import unittest
+
+# max import time of webmon2.main in ms
+_STARTUP_BUDGET_MS = int(os.environ.get("WEBMON2_STARTUP_BUDGET_MS", "500"))
+
+# modules that should not be imported by cli commands
+_HEAVY_MODULES = (
+    "flask",
+    "gevent",
+    "werkzeug",
+    "github3",
+    "gitlab",
+    "feedparser",
+    "readability",
+    "lxml",
+    "html2text",
+    "webmon2.web",
+    "webmon2.worker",
+    "webmon2.sources.github",
+    "webmon2.filters.split_text",
+)
+
+
+def _import_time(module: str) -> tuple:
+    """Import `module` in new interpreter; return (cumulative import time
+    in ms, set of imported modules)."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    total = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+
+        _, cumulative, name = line[12:].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+
+        name = name.strip()
+        modules.add(name)
+        if name == module:
+            total = int(cumulative) // 1000
+
+    return total, modules
+
+
+class TestStartup(unittest.TestCase):
+    def test_main_imports(self):
+        total, modules = _import_time("webmon2.main")
+        heavy = [
+            mod
+            for mod in modules
+            if any(
+                mod == hmod or mod.startswith(hmod + ".")
+                for hmod in _HEAVY_MODULES
+            )
+        ]
+        self.assertEqual(heavy, [])
+        self.assertLess(total, _STARTUP_BUDGET_MS)
+
+    def test_lazy_plugins(self):
+        _, modules = _import_time("webmon2.sources, webmon2.filters")
+        self.assertNotIn("webmon2.sources.github", modules)
+        self.assertNotIn("webmon2.sources.rss", modules)
+        self.assertNotIn("webmon2.filters.split_text", modules)
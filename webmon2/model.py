@@ -21,7 +21,7 @@ from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
 from enum import Enum, IntEnum
 
-from webmon2 import common, formatters
+from webmon2 import common
 
 _LOG = logging.getLogger(__name__)
 
@@ -572,16 +572,7 @@ class Entry:  # pylint: disable=too-many-instance-attributes
         Return entry title; if it is not defined explicit try to get content
         limited do 50 characters.
         """
-        if self.title:
-            return self.title
-
-        if not self.content:
-            return "<no title>"
-
-        if len(self.content) > 50:
-            return self.content[:50] + "…"
-
-        return self.content
+        return _human_title(self.title, self.content)
 
     def is_long_content(self) -> bool:
         """
@@ -589,12 +580,7 @@ class Entry:  # pylint: disable=too-many-instance-attributes
 
         TODO: move it do `opts`.
         """
-        if self.content:
-            lines = self.content.count("\n")
-            characters = len(self.content)
-            return lines > 10 or characters > 400
-
-        return False
+        return _is_long_content(self.content)
 
     def _get_content_type(self) -> ty.Optional[str]:
         return self.get_opt("content-type")
@@ -612,7 +598,7 @@ class Entry:  # pylint: disable=too-many-instance-attributes
         """
         Get summary of entry content for preview.
         """
-        return formatters.entry_summary(self.content, self._get_content_type())
+        return _entry_summary(self.content, self._get_content_type())
 
     def validate(self) -> None:
         if not isinstance(self.updated, datetime):
@@ -681,6 +667,104 @@ class Entry:  # pylint: disable=too-many-instance-attributes
 Entries = ty.Iterable[Entry]
 
 
+def _human_title(title: ty.Optional[str], content: ty.Optional[str]) -> str:
+    if title:
+        return title
+
+    if not content:
+        return "<no title>"
+
+    if len(content) > 50:
+        return content[:50] + "…"
+
+    return content
+
+
+def _is_long_content(content: ty.Optional[str]) -> bool:
+    if content:
+        lines = content.count("\n")
+        characters = len(content)
+        return lines > 10 or characters > 400
+
+    return False
+
+
+def _entry_summary(
+    content: ty.Optional[str], content_type: ty.Optional[str]
+) -> ty.Optional[str]:
+    # formatters require lxml, readability etc; import it only when
+    # necessary
+    # pylint: disable=import-outside-toplevel
+    from webmon2 import formatters
+
+    return formatters.entry_summary(content, content_type)
+
+
+class SourceGroupRef(ty.NamedTuple):
+    """Read-only reference to source group (for entries lists)."""
+
+    id: int
+    name: str
+
+
+class SourceRef(ty.NamedTuple):
+    """Read-only reference to source with only values displayed on entries
+    lists. One object is shared by all entries of source in one result."""
+
+    id: int
+    name: str
+    group_id: int
+    group: SourceGroupRef
+    web_url: ty.Optional[str]
+    url: ty.Optional[str]
+
+    def get_setting(self, key: str) -> ty.Any:
+        """Get one of loaded settings (`web_url`, `url`)."""
+        if key in ("web_url", "url"):
+            return getattr(self, key)
+
+        return None
+
+
+class EntryListItem(ty.NamedTuple):
+    """Read-only, compact view of entry for rendering lists, feeds and
+    mails. Has the same attributes as `Entry` used by these views.
+
+    Fields are in order of columns loaded from database (see
+    `database.entries`) so item can be created directly from row.
+    """
+
+    id: int
+    source_id: int
+    updated: ty.Optional[datetime]
+    created: ty.Optional[datetime]
+    read_mark: int
+    star_mark: int
+    title: ty.Optional[str]
+    url: ty.Optional[str]
+    icon: ty.Optional[str]
+    score: int
+    content_type: ty.Optional[str]
+    content: ty.Optional[str]
+    source: SourceRef
+
+    def human_title(self) -> str:
+        """See `Entry.human_title`."""
+        return _human_title(self.title, self.content)
+
+    def is_long_content(self) -> bool:
+        """See `Entry.is_long_content`."""
+        return _is_long_content(self.content)
+
+    def get_summary(self) -> ty.Optional[str]:
+        """See `Entry.get_summary`."""
+        return _entry_summary(self.content, self.content_type)
+
+
+AnyEntry = ty.Union[Entry, EntryListItem]
+AnyEntries = ty.Iterable[AnyEntry]
+
+
 @dataclass
 class Setting:
     key: str
@@ -15,7 +15,9 @@ import logging
 import typing as ty
 from contextlib import suppress
 from xml.etree.ElementTree import Element
+from xml.sax.saxutils import quoteattr
 
+import lxml.etree
 from defusedxml import ElementTree as etree
 from lxml.builder import E  # pylint: disable=no-name-in-module
 
@@ -58,21 +60,41 @@ def load_data(db: database.DB, content: bytes, user_id: int) -> None:
             _LOG.debug("import opml - new source: %s", source)
 
 
+def iter_dump_data(db: database.DB, user_id: int) -> ty.Iterator[str]:
+    """Export user sources as opml document. Document is generated
+    incrementally."""
+    groups = {
+        group.id: group for group in database.groups.get_all(db, user_id)
+    }
+    yield "<opml><head><title>subscriptions</title></head><body>"
+    for group_id, group_sources in itertools.groupby(
+        database.sources.iter_all(db, user_id), lambda src: src.group_id
+    ):
+        group = groups.get(group_id)
+        if not group:
+            continue
+
+        group_started = False
+        for source in group_sources:
+            node = _dump_source(source)
+            if node is None:
+                continue
+
+            if not group_started:
+                group_started = True
+                name = quoteattr(group.name)
+                yield f"<outline text={name} title={name}>"
+
+            yield lxml.etree.tostring(node, encoding="unicode")
+
+        if group_started:
+            yield "</outline>"
+
+    yield "</body></opml>"
+
+
 def dump_data(db: database.DB, user_id: int) -> str:
-    groups = database.groups.get_all(db, user_id)
-    gnodes = []
-    for group in groups:
-        items = (
-            _dump_source(source)
-            for source in database.sources.get_all(db, user_id, group.id)
-        )
-        items_filtered = list(filter(lambda x: x is not None, items))
-        if items_filtered:
-            gnodes.append(
-                E.outline(*items_filtered, text=group.name, title=group.name)
-            )
-    root = E.opml(E.head(E.title("subscriptions")), E.body(*gnodes))
-    return etree.tostring(root)  # type: ignore
+    return "".join(iter_dump_data(db, user_id))
 
 
 def _dump_source(source: model.Source) -> ty.Optional[Element]:
@@ -0,0 +1,101 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Simple statistical (sampling) profiler.
+
+Profiler periodically collects stacks of all threads (including currently
+running greenlet in main thread) and returns them in "collapsed" format
+that is accepted by flamegraph.pl, speedscope, etc.
+"""
+from __future__ import annotations
+
+import logging
+import os.path
+import sys
+import threading
+import time
+import typing as ty
+from collections import Counter
+
+_LOG = logging.getLogger(__name__)
+
+# max profiling time in seconds
+MAX_DURATION = 120
+# only one profiler may be running at the time
+_LOCK = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Other profiling is already running."""
+
+
+def _frame_name(frame: ty.Any) -> str:
+    code = frame.f_code
+    fname = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({fname}:{code.co_firstlineno})"
+
+
+def _collapse_stack(thread_name: str, frame: ty.Any) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_name(frame))
+        frame = frame.f_back
+
+    stack.append(thread_name)
+    stack.reverse()
+    return ";".join(stack)
+
+
+def sample(duration: float, interval: float = 0.01) -> ty.Counter[str]:
+    """Sample stacks of all threads every `interval` seconds during
+    `duration` seconds.
+
+    Return counter of collapsed stacks.
+
+    Raises:
+        ProfilerBusyError: when other profiling is running
+    """
+    # pylint: disable=consider-using-with
+    if not _LOCK.acquire(blocking=False):
+        raise ProfilerBusyError()
+
+    try:
+        return _sample(min(duration, MAX_DURATION), interval)
+    finally:
+        _LOCK.release()
+
+
+def _sample(duration: float, interval: float) -> ty.Counter[str]:
+    _LOG.info("profiling started; duration=%s", duration)
+    stacks: ty.Counter[str] = Counter()
+    own_id = threading.get_ident()
+    end = time.monotonic() + duration
+    samples = 0
+    while time.monotonic() < end:
+        names = {thr.ident: thr.name for thr in threading.enumerate()}
+        # pylint: disable=protected-access
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+
+            name = names.get(thread_id) or str(thread_id)
+            stacks[_collapse_stack(name.replace(";", ":"), frame)] += 1
+
+        samples += 1
+        time.sleep(interval)
+
+    _LOG.info("profiling finished; samples=%d", samples)
+    return stacks
+
+
+def format_collapsed(stacks: ty.Counter[str]) -> str:
+    """Format stacks as collapsed stacks file (one `stack count` per line)."""
+    return "".join(
+        f"{stack} {count}\n" for stack, count in sorted(stacks.items())
+    )
@@ -0,0 +1,47 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for profiler module.
+"""
+import threading
+import time
+import unittest
+
+from . import profiler
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_sample(self):
+        stop = threading.Event()
+        thr = threading.Thread(
+            target=_busy_loop, args=(stop,), name="busy;thread"
+        )
+        thr.start()
+        try:
+            stacks = profiler.sample(0.1, 0.01)
+        finally:
+            stop.set()
+            thr.join()
+
+        busy = [stack for stack in stacks if stack.startswith("busy:thread;")]
+        self.assertTrue(busy)
+        self.assertTrue(
+            any("_busy_loop (profiler_test.py:" in stack for stack in busy)
+        )
+
+        result = profiler.format_collapsed(stacks)
+        for line in result.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            self.assertGreater(int(count), 0)
+            self.assertIn(stack, stacks)
@@ -0,0 +1,18 @@
+/*
+ * 0000034.sql
+ * Copyright (C) 2023 Karol Będkowski
+ *
+ * Distributed under terms of the GPLv3 license.
+ */
+
+-- time of fetching and processing sources
+CREATE TABLE source_fetch_log (
+    source_id       integer NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    ts              timestamptz NOT NULL DEFAULT now(),
+    fetch_time      real NOT NULL,
+    process_time    real NOT NULL
+);
+
+CREATE INDEX source_fetch_log_idx ON source_fetch_log(ts, source_id);
+
+-- vim:et
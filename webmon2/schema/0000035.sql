@@ -0,0 +1,49 @@
+/*
+ * 0000035.sql
+ * Copyright (C) 2023 Karol Będkowski
+ *
+ * Distributed under terms of the GPLv3 license.
+ */
+
+-- precomputed statistics of sources; updated after changes of entries
+CREATE TABLE source_stats (
+    source_id       integer PRIMARY KEY REFERENCES sources(id) ON DELETE CASCADE,
+    -- number of unread entries
+    unread          integer NOT NULL DEFAULT 0,
+    -- number of all entries
+    total           integer NOT NULL DEFAULT 0,
+    -- id of first unread entry
+    first_unread    integer,
+    -- date of last entry
+    last_entry      timestamptz,
+    -- is source state in error
+    error           boolean NOT NULL DEFAULT false,
+    updated         timestamptz NOT NULL DEFAULT now()
+);
+
+-- for counting all entries of source
+CREATE INDEX IF NOT EXISTS entries_source_idx ON entries(source_id);
+
+INSERT INTO source_stats (source_id, unread, total, first_unread, last_entry,
+    error)
+SELECT s.id,
+    coalesce(e.unread, 0),
+    coalesce(e.total, 0),
+    e.first_unread,
+    e.last_entry,
+    coalesce(ss.status = 'error', false)
+FROM sources s
+LEFT JOIN source_state ss ON ss.source_id = s.id
+LEFT JOIN (
+    SELECT source_id,
+        count(*) FILTER (WHERE read_mark = 0) AS unread,
+        count(*) AS total,
+        min(id) FILTER (WHERE read_mark = 0) AS first_unread,
+        max(coalesce(updated, created)) AS last_entry
+    FROM entries
+    GROUP BY source_id
+) e ON e.source_id = s.id;
+
+ANALYZE source_stats;
+
+-- vim:et
@@ -0,0 +1,11 @@
+/*
+ * 0000036.sql
+ * Copyright (C) 2023 Karol Będkowski
+ *
+ * Distributed under terms of the GPLv3 license.
+ */
+
+INSERT INTO settings (key, value, value_type)
+VALUES ('mark_read_on_scroll', 'false', 'bool');
+
+-- vim:et
@@ -0,0 +1,11 @@
+/*
+ * 0000037.sql
+ * Copyright (C) 2023 Karol Będkowski
+ *
+ * Distributed under terms of the GPLv3 license.
+ */
+
+-- old logs are deleted for all users at once
+CREATE INDEX user_logs_ts_idx ON user_logs (ts);
+
+-- vim:et
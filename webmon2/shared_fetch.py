@@ -0,0 +1,250 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Sharing loaded data between sources with the same fetch key.
+
+Many users may subscribe the same feed or repository. In one fetch round
+such sources are loaded once (by first source, the "leader") and loaded
+entries are copied to other sources ("followers") that then are processed
+by own filters, scoring etc.
+
+Follower may use loaded data only when its state is not older than state
+of leader (leader loaded all entries that follower may not have seen yet);
+otherwise it loads data by itself. Follower also loads data by itself when
+leader does not finish loading in `wait_timeout` seconds.
+
+Changes of source configuration found by leader (i.e. new url after
+permanent redirect) are applied also to followers.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import typing as ty
+from dataclasses import dataclass
+from datetime import datetime
+
+from prometheus_client import Counter
+
+from webmon2 import model
+
+if ty.TYPE_CHECKING:
+    from webmon2.sources import AbstractSource
+
+_LOG = logging.getLogger(__name__)
+
+_SHARED_LOADS = Counter(
+    "webmon2_shared_fetch_loads",
+    "Number of sources loaded for sharing with other sources",
+)
+_SHARED_HITS = Counter(
+    "webmon2_shared_fetch_hits",
+    "Number of sources that used data loaded by other source",
+)
+_SHARED_TIMEOUTS = Counter(
+    "webmon2_shared_fetch_timeouts",
+    "Number of sources that not get data from other source in time",
+)
+
+# limit(entries) - stop loading entries when exceed limits
+LimitFunc = ty.Callable[[model.Entries], model.Entries]
+
+
+@dataclass
+class _FetchResult:
+    # name of leader source (used as title in some entries)
+    source_name: str
+    # last update of leader state before load
+    since: ty.Optional[datetime]
+    status: ty.Optional[model.SourceStateStatus]
+    error: ty.Optional[str]
+    props: ty.Dict[str, ty.Any]
+    icon: ty.Optional[str]
+    icon_data: ty.Optional[model.IconData]
+    entries: ty.List[model.Entry]
+    # settings and interval changed by leader (`updated_source`)
+    settings_update: model.ConfDict
+    interval: ty.Optional[str]
+
+    def usable_for(self, state: model.SourceState) -> bool:
+        """Check is result contain all entries that may be new for source
+        with `state`."""
+        if self.since is None:
+            return True
+
+        last_update = state.last_update
+        return last_update is not None and last_update >= self.since
+
+
+class SharedFetches:
+    """Results of loading shareable sources in one fetch round.
+
+    Only sources from `candidates` (sources that may have the same
+    fetch key as other sources to fetch) are shared, so results are not
+    kept for unique sources. Object should be dropped after round.
+    """
+
+    def __init__(
+        self, candidates: ty.Iterable[int], wait_timeout: float = 120.0
+    ) -> None:
+        self._candidates = set(candidates)
+        # max time of waiting for leader
+        self._wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        # fetch key -> event set when leader finished loading
+        self._pending: ty.Dict[str, threading.Event] = {}
+        self._results: ty.Dict[str, _FetchResult] = {}
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def load(
+        self,
+        src: AbstractSource,
+        source: model.Source,
+        limit: ty.Optional[LimitFunc] = None,
+    ) -> ty.Tuple[model.SourceState, model.Entries]:
+        """Load `source` using `src` or take data loaded for other source
+        with the same fetch key.
+
+        `limit` is applied on entries loaded by leader before they are
+        kept for other sources.
+        """
+        assert source.state
+        key = src.fetch_key() if source.id in self._candidates else None
+        if not key:
+            return src.load(source.state)
+
+        with self._lock:
+            event = self._pending.get(key)
+            leader = event is None
+            if event is None:
+                event = self._pending[key] = threading.Event()
+
+        if leader:
+            return self._load_leader(key, event, src, source, limit)
+
+        if not event.wait(self._wait_timeout):
+            _SHARED_TIMEOUTS.inc()
+            _LOG.info(
+                "source %d: shared data not loaded in time; loading",
+                source.id,
+            )
+            return src.load(source.state)
+
+        result = self._results.get(key)
+        if result is None or not result.usable_for(source.state):
+            _LOG.debug("source %d: shared data not usable", source.id)
+            return src.load(source.state)
+
+        _SHARED_HITS.inc()
+        _LOG.debug("source %d: using shared data", source.id)
+        if result.settings_update or result.interval:
+            src.apply_update(result.settings_update, result.interval)
+
+        return _adopt(result, source)
+
+    def _load_leader(
+        self,
+        key: str,
+        event: threading.Event,
+        src: AbstractSource,
+        source: model.Source,
+        limit: ty.Optional[LimitFunc],
+    ) -> ty.Tuple[model.SourceState, model.Entries]:
+        assert source.state
+        # source settings may be modified in place by `src`
+        settings = dict(source.settings or {})
+        interval = source.interval
+        try:
+            new_state, entries = src.load(source.state)
+            if limit is not None:
+                entries = limit(entries)
+
+            entries = list(entries)
+            settings_update, new_interval = _source_update(
+                src, settings, interval
+            )
+            _SHARED_LOADS.inc()
+            # worker modify state and entries so keep copy
+            self._results[key] = _FetchResult(
+                source_name=source.name,
+                since=source.state.last_update,
+                status=new_state.status,
+                error=new_state.error,
+                props=dict(new_state.props or {}),
+                icon=new_state.icon,
+                icon_data=new_state.icon_data,
+                entries=[entry.clone() for entry in entries],
+                settings_update=settings_update,
+                interval=new_interval,
+            )
+        finally:
+            event.set()
+
+        return new_state, entries
+
+
+def _source_update(
+    src: AbstractSource, settings: model.ConfDict, interval: ty.Optional[str]
+) -> ty.Tuple[model.ConfDict, ty.Optional[str]]:
+    """Find changes in source configuration made by `src` during loading;
+    `settings` and `interval` are configuration before loading.
+
+    Return changed settings and new interval (or None when not changed).
+    """
+    updated = src.updated_source
+    if not updated:
+        return {}, None
+
+    settings_update = {
+        key: value
+        for key, value in (updated.settings or {}).items()
+        if settings.get(key) != value
+    }
+    new_interval = updated.interval if updated.interval != interval else None
+    return settings_update, new_interval
+
+
+def _adopt(
+    result: _FetchResult, source: model.Source
+) -> ty.Tuple[model.SourceState, ty.List[model.Entry]]:
+    """Create state and entries for `source` from shared result."""
+    assert source.state
+    state = source.state
+    if result.status == model.SourceStateStatus.ERROR:
+        return state.new_error(result.error or "error"), []
+
+    if result.status == model.SourceStateStatus.NOT_MODIFIED:
+        new_state = state.new_not_modified()
+    else:
+        new_state = state.new_ok()
+
+    new_state.update_props(result.props)
+    # icons are stored per user so copy it only with data
+    if not new_state.icon and result.icon_data:
+        new_state.icon = result.icon
+        new_state.icon_data = result.icon_data
+
+    entries = []
+    for shared_entry in result.entries:
+        entry = shared_entry.clone()
+        entry.source_id = source.id
+        entry.user_id = source.user_id
+        entry.oid = None
+        if entry.title == result.source_name:
+            entry.title = source.name
+
+        if entry.icon == result.icon:
+            entry.icon = new_state.icon
+
+        entries.append(entry)
+
+    return new_state, entries
@@ -0,0 +1,154 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+# pylint: skip-file
+# type: ignore
+
+"""
+Tests for shared_fetch module.
+"""
+
+import datetime
+import threading
+import unittest
+
+from . import model, shared_fetch
+
+_NOW = datetime.datetime(2023, 5, 1, tzinfo=datetime.timezone.utc)
+
+
+class _FakeSource:
+    def __init__(self, source, key="key"):
+        self._source = source
+        self._key = key
+        self.loaded = 0
+        self.updated_source = None
+        self.new_url = None
+
+    def apply_update(self, settings, interval=None):
+        self.updated_source = self._source.clone()
+        self.updated_source.settings = {**self._source.settings, **settings}
+
+    def fetch_key(self):
+        return self._key
+
+    def load(self, state):
+        self.loaded += 1
+        if self.new_url:
+            # source update settings in place
+            self._source.settings["url"] = self.new_url
+            self.updated_source = self._source.clone()
+
+        new_state = state.new_ok(etag="abc")
+        entry = model.Entry.for_source(self._source)
+        entry.title = self._source.name
+        entry.content = "content"
+        return new_state, iter([entry])
+
+
+def _source(id_, user_id, last_update=None):
+    source = model.Source(
+        user_id=user_id, name=f"s{id_}", kind="rss", group_id=1
+    )
+    source.id = id_
+    source.settings = {"url": "http://example.com/"}
+    source.state = model.SourceState.new(id_)
+    source.state.last_update = last_update
+    return source
+
+
+class TestSharedFetches(unittest.TestCase):
+    def test_share(self):
+        shared = shared_fetch.SharedFetches([1, 2])
+        leader, follower = _source(1, 1), _source(2, 2, _NOW)
+        lsrc, fsrc = _FakeSource(leader), _FakeSource(follower)
+
+        state, entries = shared.load(lsrc, leader)
+        self.assertEqual(len(list(entries)), 1)
+        state, entries = shared.load(fsrc, follower)
+        self.assertEqual(lsrc.loaded, 1)
+        self.assertEqual(fsrc.loaded, 0)
+
+        self.assertEqual(state.source_id, 2)
+        self.assertEqual(state.status, model.SourceStateStatus.OK)
+        self.assertEqual(state.get_prop("etag"), "abc")
+        (entry,) = entries
+        self.assertEqual(entry.source_id, 2)
+        self.assertEqual(entry.user_id, 2)
+        self.assertEqual(entry.title, "s2")
+
+    def test_follower_older(self):
+        shared = shared_fetch.SharedFetches([1, 2])
+        leader, follower = _source(1, 1, _NOW), _source(2, 2)
+        shared.load(_FakeSource(leader), leader)
+        fsrc = _FakeSource(follower)
+        shared.load(fsrc, follower)
+        self.assertEqual(fsrc.loaded, 1)
+
+    def test_not_candidate(self):
+        shared = shared_fetch.SharedFetches([1])
+        leader, other = _source(1, 1), _source(2, 2, _NOW)
+        shared.load(_FakeSource(leader), leader)
+        osrc = _FakeSource(other)
+        shared.load(osrc, other)
+        self.assertEqual(osrc.loaded, 1)
+
+    def test_different_key(self):
+        shared = shared_fetch.SharedFetches([1, 2])
+        leader, other = _source(1, 1), _source(2, 2, _NOW)
+        shared.load(_FakeSource(leader), leader)
+        osrc = _FakeSource(other, "other")
+        shared.load(osrc, other)
+        self.assertEqual(osrc.loaded, 1)
+
+    def test_leader_timeout(self):
+        shared = shared_fetch.SharedFetches([1, 2], wait_timeout=0.05)
+        leader, follower = _source(1, 1), _source(2, 2, _NOW)
+        lsrc, fsrc = _FakeSource(leader), _FakeSource(follower)
+        started, release = threading.Event(), threading.Event()
+        load = lsrc.load
+
+        def slow_load(state):
+            started.set()
+            release.wait(5)
+            return load(state)
+
+        lsrc.load = slow_load
+        thread = threading.Thread(target=shared.load, args=(lsrc, leader))
+        thread.start()
+        started.wait(5)
+        shared.load(fsrc, follower)
+        release.set()
+        thread.join()
+        self.assertEqual(fsrc.loaded, 1)
+
+    def test_limit(self):
+        shared = shared_fetch.SharedFetches([1, 2])
+        leader, follower = _source(1, 1), _source(2, 2, _NOW)
+        state, entries = shared.load(
+            _FakeSource(leader), leader, lambda entries: iter(())
+        )
+        self.assertEqual(list(entries), [])
+        state, entries = shared.load(_FakeSource(follower), follower)
+        self.assertEqual(list(entries), [])
+
+    def test_updated_source(self):
+        shared = shared_fetch.SharedFetches([1, 2])
+        leader, follower = _source(1, 1), _source(2, 2, _NOW)
+        lsrc, fsrc = _FakeSource(leader), _FakeSource(follower)
+        lsrc.new_url = "http://example.com/new"
+        shared.load(lsrc, leader)
+        shared.load(fsrc, follower)
+        self.assertEqual(fsrc.loaded, 0)
+        self.assertEqual(
+            fsrc.updated_source.settings["url"], "http://example.com/new"
+        )
+        self.assertEqual(follower.settings["url"], "http://example.com/")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,14 +9,17 @@
 """
 Data sources
 """
+
 from __future__ import annotations
 
+import functools
+import importlib
 import logging
 import typing as ty
 
-from webmon2 import common, model
+from webmon2 import model
 
-from .abstract import AbstractSource
+from .abstract import SOURCES, AbstractSource
 
 _LOG = logging.getLogger(__name__)
 __all__ = (
@@ -25,31 +28,48 @@ __all__ = (
     "sources_name",
     "sources_info",
     "AbstractSource",
+    "SOURCES",
+    "load_plugins",
+    "prefetch",
+    "prefetch_kinds",
 )
 
 
-def _load_plugins() -> None:
-    # pylint: disable=unused-import,import-outside-toplevel
-
-    from . import dummy, file_input, jamendo, web
-
+# source kind -> module that define source class; modules are imported on
+# first use
+_SOURCES_MODULES = {
+    "dummy": "dummy",
+    "file": "file_input",
+    "jamendo_albums": "jamendo",
+    "jamendo_tracks": "jamendo",
+    "url": "web",
+    "github_commits": "github",
+    "github_tags": "github",
+    "github_releases": "github",
+    "rss": "rss",
+    "gitlab_commits": "gitlab",
+    "gitlab_tags": "gitlab",
+    "gitlab_releases": "gitlab",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _import_module(name: str) -> bool:
     try:
-        from . import github
-    except ImportError:
-        _LOG.warning("github3 module not found")
+        importlib.import_module("." + name, __name__)
+    except ImportError as err:
+        _LOG.warning("load source module %s error: %s", name, err)
+        return False
 
-    try:
-        from . import rss
-    except ImportError:
-        _LOG.warning("feedparser module not found")
+    return True
 
-    try:
-        from . import gitlab
-    except ImportError:
-        _LOG.warning("gitlab module not found")
 
+def load_plugins() -> None:
+    """Import all sources modules and sources defined in entry points."""
+    for name in dict.fromkeys(_SOURCES_MODULES.values()):
+        _import_module(name)
 
-_load_plugins()
+    SOURCES.load_entry_points()
 
 
 class UnknownInputException(Exception):
@@ -60,7 +80,7 @@ def get_source(
     source: model.Source, sys_settings: model.ConfDict
 ) -> AbstractSource:
     """Get input class according to configuration"""
-    scls = common.find_subclass(AbstractSource, source.kind)
+    scls = get_source_class(source.kind)
     if scls:
         src = scls(source, sys_settings)
         return src  # type: ignore
@@ -68,19 +88,54 @@ def get_source(
     raise UnknownInputException()
 
 
+def _registered_sources() -> ty.List[ty.Tuple[str, ty.Any]]:
+    """Get all registered sources; built-in first in definition order."""
+    load_plugins()
+    order = {name: idx for idx, name in enumerate(_SOURCES_MODULES)}
+    return sorted(
+        SOURCES.items(), key=lambda item: order.get(item[0], len(order))
+    )
+
+
 def get_source_class(kind: str) -> ty.Optional[ty.Type[AbstractSource]]:
-    scls = common.find_subclass(AbstractSource, kind)
-    return scls
+    if module := _SOURCES_MODULES.get(kind):
+        _import_module(module)
 
+    return SOURCES.get(kind)
 
-def sources_name() -> ty.List[str]:
+
+def prefetch_kinds() -> ty.List[str]:
+    """Get kinds of sources that implement `prefetch`."""
     return [
-        name for name, scls in common.get_subclasses_with_name(AbstractSource)
+        name
+        for name, scls in _registered_sources()
+        if _prefetch_impl(scls) is not _prefetch_impl(AbstractSource)
     ]
 
 
+def _prefetch_impl(scls: ty.Type[AbstractSource]) -> ty.Any:
+    return scls.prefetch.__func__  # type: ignore
+
+
+def prefetch(srcs: ty.Iterable[AbstractSource]) -> None:
+    """Call `prefetch` for sources grouped by its implementation."""
+    by_impl: ty.Dict[ty.Any, ty.List[AbstractSource]] = {}
+    for src in srcs:
+        by_impl.setdefault(_prefetch_impl(type(src)), []).append(src)
+
+    for group in by_impl.values():
+        try:
+            type(group[0]).prefetch(group)
+        except Exception:  # pylint: disable=broad-except
+            _LOG.exception("prefetch %s error", type(group[0]))
+
+
+def sources_name() -> ty.List[str]:
+    return [name for name, scls in _registered_sources()]
+
+
 def sources_info() -> ty.List[ty.Tuple[str, str, str]]:
     return [
         (name, scls.short_info, scls.long_info)
-        for name, scls in common.get_subclasses_with_name(AbstractSource)
+        for name, scls in _registered_sources()
     ]
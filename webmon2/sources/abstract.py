@@ -10,6 +10,7 @@
 Abstract source definition
 """
 
+import json
 import logging
 import typing as ty
 
@@ -18,6 +19,9 @@ import requests
 from webmon2 import common, model
 
 _LOG = logging.getLogger(__name__)
+# registered sources classes; third-party sources can be also defined as
+# `webmon2.sources` entry points
+SOURCES: common.Registry["AbstractSource"] = common.Registry("webmon2.sources")
 
 
 class AbstractSource:
@@ -28,11 +32,18 @@ class AbstractSource:
     params = []  # type: ty.List[common.SettingDef]
     short_info = ""
     long_info = ""
+    # loaded data depend only on source parameters, so sources with the same
+    # `fetch_key` may share one load
+    shareable = False
 
     AGENT = (
         "Mozilla/5.0 (X11; Linux i686; rv:45.0) Gecko/20100101 Firefox/45.0"
     )
 
+    def __init_subclass__(cls, **kwargs: ty.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        SOURCES.register(cls)
+
     def __init__(
         self, source: model.Source, sys_settings: model.ConfDict
     ) -> None:
@@ -65,6 +76,18 @@ class AbstractSource:
         for name, error in self.validate_conf(self._conf):
             raise common.ParamError(f"parameter {name} error {error}")
 
+    def fetch_key(self) -> ty.Optional[str]:
+        """Get key identifying data loaded by this source (kind and
+        parameters, including credentials) or None when source can't
+        share loaded data with other sources."""
+        if not self.shareable:
+            return None
+
+        conf = {
+            param.name: self._conf.get(param.name) for param in self.params
+        }
+        return f"{self.name}:{json.dumps(conf, sort_keys=True, default=str)}"
+
     @property
     def updated_source(self) -> ty.Optional[model.Source]:
         """
@@ -72,6 +95,21 @@ class AbstractSource:
         """
         return self._updated_source
 
+    def apply_update(
+        self, settings: model.ConfDict, interval: ty.Optional[str] = None
+    ) -> None:
+        """Update source configuration with changes found by other source
+        that loaded the same data (see `shared_fetch`)."""
+        self._updated_source = self._updated_source or self._source.clone()
+        if settings:
+            self._updated_source.settings = {
+                **(self._updated_source.settings or {}),
+                **settings,
+            }
+
+        if interval:
+            self._updated_source.interval = interval
+
     @classmethod
     def validate_conf(
         cls, *confs: model.ConfDict
@@ -111,6 +149,15 @@ class AbstractSource:
         """Load data; return list of items (Result)."""
         raise NotImplementedError()
 
+    @classmethod
+    def prefetch(cls, srcs: ty.List["AbstractSource"]) -> None:
+        """Prepare loading of `srcs` in current fetch round; i.e. check
+        for updates many sources in one request.
+
+        `srcs` contains sources of all classes that share the same
+        implementation of `prefetch`.
+        """
+
     def _load_binary(
         self,
         url: str,
@@ -9,6 +9,9 @@
 """
 Inputs related to github
 """
+import copy
+import hashlib
+import json
 import logging
 import typing as ty
 from contextlib import suppress
@@ -29,18 +32,204 @@ from .abstract import AbstractSource
 _LOG = logging.getLogger(__name__)
 _GITHUB_MAX_AGE = 90  # 90 days
 _GITHUB_ICON = "https://github.com/favicon.ico"
+_GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+# number of repositories checked in one GraphQL query
+_GRAPHQL_BATCH_SIZE = 50
+# defer loading when number of remaining api requests drop below this value
+_RATE_LIMIT_RESERVE = 50
 _ = ty
 
+# GitHub clients for (user, token)
+_CLIENTS: common.LRUCache[
+    ty.Tuple[str, str], github3.GitHub
+] = common.LRUCache(100)
+# Other caches are keyed by account - user and hash of token (see
+# `_account`), so data loaded with token of one user is not available for
+# other users.
+# repositories for (account, owner, repository); reused for conditional
+# requests
+_REPOSITORIES: common.LRUCache[
+    ty.Tuple[str, str, str], Repository
+] = common.LRUCache(1000)
+# last change time of repositories for (account, owner, repository) loaded
+# by `prefetch`
+_REPOSITORIES_CHANGES: common.LRUCache[
+    ty.Tuple[str, str, str], datetime
+] = common.LRUCache(5000, ttl=600)
+# remaining requests and limit reset time for "account:resource"
+_RATE_LIMITS: common.LRUCache[str, ty.Tuple[int, datetime]] = common.LRUCache(
+    1000
+)
+
+
+def _account(user: str, token: str) -> str:
+    """Get key identifying GitHub account used by source."""
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+    return f"{user}:{token_hash}"
+
+
+def _track_rate_limit(account: str, headers: ty.Mapping[str, str]) -> None:
+    """Remember rate limit information from response `headers`."""
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset = headers.get("X-RateLimit-Reset")
+    if remaining is None or reset is None:
+        return
+
+    resource = headers.get("X-RateLimit-Resource") or "core"
+    with suppress(ValueError):
+        _RATE_LIMITS.put(
+            f"{account}:{resource}",
+            (
+                int(remaining),
+                datetime.fromtimestamp(int(reset), timezone.utc),
+            ),
+        )
+
+
+def _rate_limit_reset(
+    account: str, resource: str = "core"
+) -> ty.Optional[datetime]:
+    """Get time of rate limit reset when there is too few remaining
+    requests for `account`."""
+    limit = _RATE_LIMITS.get(f"{account}:{resource}")
+    if limit:
+        remaining, reset = limit
+        if remaining < _RATE_LIMIT_RESERVE and reset > datetime.now(
+            timezone.utc
+        ):
+            return reset
+
+    return None
+
+
+def _get_client(user: str, token: str) -> github3.GitHub:
+    """Get (cached) GitHub client for `user` and `token`."""
+    client = _CLIENTS.get((user, token))
+    if client is None:
+        if user and token:
+            client = github3.login(username=user, token=token)
+        else:
+            client = github3.GitHub()
+
+        account = _account(user, token)
+
+        def track(response: ty.Any, *_args: ty.Any, **_kwargs: ty.Any) -> None:
+            _track_rate_limit(account, response.headers)
+
+        client.session.hooks["response"].append(track)
+        _CLIENTS.put((user, token), client)
+
+    return client
+
+
+def _check_repositories(
+    client: github3.GitHub, repositories: ty.List[ty.Tuple[str, str]]
+) -> ty.Dict[ty.Tuple[str, str], datetime]:
+    """Get last change time of (owner, name) `repositories` in one GraphQL
+    query. Not found repositories are skipped."""
+    parts = [
+        f"r{idx}: repository(owner: {json.dumps(owner)}, "
+        f"name: {json.dumps(name)}) {{ pushedAt updatedAt }}"
+        for idx, (owner, name) in enumerate(repositories)
+    ]
+    query = "query { " + " ".join(parts) + " }"
+    response = client.session.post(
+        _GITHUB_GRAPHQL_URL, json={"query": query}, timeout=30
+    )
+    response.raise_for_status()
+    data = response.json().get("data") or {}
+    result = {}
+    for idx, repository in enumerate(repositories):
+        node = data.get(f"r{idx}")
+        if not node:
+            continue
+
+        dates = [
+            datetime.fromisoformat(val.replace("Z", "+00:00"))
+            for val in (node.get("pushedAt"), node.get("updatedAt"))
+            if val
+        ]
+        if dates:
+            result[repository] = max(dates)
+
+    return result
+
 
 class GitHubAbstractSource(AbstractSource):
     """Support functions for GitHub"""
 
+    shareable = True
+
     def __init__(
         self, source: model.Source, sys_settings: model.ConfDict
     ) -> None:
         super().__init__(source, sys_settings)
         self._update_source()
 
+    @classmethod
+    def prefetch(cls, srcs: ty.List[AbstractSource]) -> None:
+        """Check for changes all repositories in batches using GraphQL api.
+
+        Only sources with configured token are checked.
+        """
+        by_client: ty.Dict[ty.Tuple[str, str], ty.Set[ty.Tuple[str, str]]] = {}
+        for src in srcs:
+            conf = src._conf  # pylint: disable=protected-access
+            user, token = conf.get("github_user"), conf.get("github_token")
+            if user and token and conf.get("owner") and conf.get("repository"):
+                by_client.setdefault((user, token), set()).add(
+                    (conf["owner"], conf["repository"])
+                )
+
+        for (user, token), repositories in by_client.items():
+            account = _account(user, token)
+            if _rate_limit_reset(account, "graphql"):
+                _LOG.info("github: graphql rate limit exceeded for %s", user)
+                continue
+
+            client = _get_client(user, token)
+            repos = sorted(repositories)
+            for idx in range(0, len(repos), _GRAPHQL_BATCH_SIZE):
+                batch = repos[idx : idx + _GRAPHQL_BATCH_SIZE]
+                try:
+                    changes = _check_repositories(client, batch)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOG.warning("github: check repositories error %s", err)
+                    break
+
+                for (owner, name), changed in changes.items():
+                    _REPOSITORIES_CHANGES.put((account, owner, name), changed)
+
+    def _github_not_modified(
+        self, state: model.SourceState
+    ) -> ty.Optional[model.SourceState]:
+        """Check is loading necessary without calling REST api.
+
+        Return new state when loading should be skipped because repository
+        is not changed since last update (according to data loaded by
+        `prefetch`) or rate limit is near exceeded.
+        """
+        conf = self._conf
+        user = conf.get("github_user") or ""
+        account = _account(user, conf.get("github_token") or "")
+        if reset := _rate_limit_reset(account):
+            _LOG.info(
+                "github: rate limit exceeded for %r; source %d deferred",
+                user,
+                self._source.id,
+            )
+            new_state = state.new_not_modified()
+            new_state.next_update = reset
+            return new_state
+
+        changed = _REPOSITORIES_CHANGES.get(
+            (account, conf["owner"], conf["repository"])
+        )
+        if changed and state.last_update and changed <= state.last_update:
+            return state.new_not_modified()
+
+        return None
+
     @staticmethod
     def _github_check_repo_updated(
         repository: Repository, last_updated: ty.Optional[datetime]
@@ -61,17 +250,27 @@ class GitHubAbstractSource(AbstractSource):
         return last_updated.strftime("%Y-%m-%dT%H:%M:%SZ")
 
     def _github_get_repository(self, conf: model.ConfDict) -> Repository:
-        """Create repository object according to configuration."""
+        """Get repository object according to configuration.
+
+        Repositories are cached and refreshed by conditional requests.
+        Cached object may be used by other workers, so refreshed is its
+        copy, that replace it in cache.
+        """
+        user = conf.get("github_user") or ""
+        token = conf.get("github_token") or ""
+        key = (_account(user, token), conf["owner"], conf["repository"])
         try:
-            if conf.get("github_user") and conf.get("github_token"):
-                github = github3.login(
-                    username=conf.get("github_user"),
-                    token=conf.get("github_token"),
+            cached = _REPOSITORIES.get(key)
+            if cached is None:
+                github = _get_client(user, token)
+                repository = github.repository(
+                    conf["owner"], conf["repository"]
                 )
             else:
-                github = github3.GitHub()
+                repository = copy.copy(cached)
+                repository.refresh(conditional=True)
 
-            repository = github.repository(conf["owner"], conf["repository"])
+            _REPOSITORIES.put(key, repository)
 
         except Exception as err:
             raise common.InputError(
@@ -159,6 +358,9 @@ class GithubInput(GitHubAbstractSource):
         self, state: model.SourceState
     ) -> ty.Tuple[model.SourceState, model.Entries]:
         """Return commits."""
+        if new_state := self._github_not_modified(state):
+            return new_state, []
+
         repository = self._github_get_repository(self._conf)
         data_since = self._github_check_repo_updated(
             repository, state.last_update
@@ -291,6 +493,9 @@ class GithubTagsSource(GitHubAbstractSource):
         self, state: model.SourceState
     ) -> ty.Tuple[model.SourceState, model.Entries]:
         """Return commits."""
+        if new_state := self._github_not_modified(state):
+            return new_state, []
+
         conf = self._conf
         repository = self._github_get_repository(conf)
         if not self._github_check_repo_updated(repository, state.last_update):
@@ -427,6 +632,9 @@ class GithubReleasesSource(GitHubAbstractSource):
         self, state: model.SourceState
     ) -> ty.Tuple[model.SourceState, model.Entries]:
         """Return releases."""
+        if new_state := self._github_not_modified(state):
+            return new_state, []
+
         repository = self._github_get_repository(self._conf)
         if not self._github_check_repo_updated(repository, state.last_update):
             new_state = state.new_not_modified(etag=repository.etag)
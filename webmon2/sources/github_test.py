@@ -0,0 +1,170 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+# pylint: skip-file
+# type: ignore
+
+"""
+Tests for github sources using local stub of GitHub api.
+"""
+
+import http.server
+import json
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from webmon2 import model
+
+from . import github
+
+_CHANGED = "2023-05-01T10:00:00Z"
+
+
+class _StubHandler(http.server.BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        query = json.loads(body)["query"]
+        self.requests.append(("POST", self.path, query))
+        data = {}
+        for idx in range(query.count("repository(")):
+            alias = f"r{idx}"
+            if f'{alias}: repository(owner: "missing"' in query:
+                data[alias] = None
+            else:
+                data[alias] = {"pushedAt": _CHANGED, "updatedAt": _CHANGED}
+
+        self._reply(200, {"data": data}, "graphql")
+
+    def do_GET(self):
+        self.requests.append(("GET", self.path, None))
+        self._reply(500, {"message": "unexpected REST call"}, "core")
+
+    def _reply(self, status, data, resource):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "4000")
+        self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+        self.send_header("X-RateLimit-Resource", resource)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _source(owner, user):
+    source = model.Source(
+        user_id=1, name="repo", kind="github_releases", group_id=1
+    )
+    source.id = 1
+    source.interval = "1h"
+    source.settings = {"owner": owner, "repository": "repo"}
+    return github.GithubReleasesSource(
+        source, {"github_user": user, "github_token": "token"}
+    )
+
+
+class TestGithubApi(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), _StubHandler
+        )
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{cls.server.server_address[1]}/graphql"
+        cls.patch = mock.patch.object(github, "_GITHUB_GRAPHQL_URL", url)
+        cls.patch.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patch.stop()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _StubHandler.requests.clear()
+
+    def test_check_repositories(self):
+        client = github._get_client("user1", "token")
+        res = github._check_repositories(
+            client, [("owner", "repo"), ("missing", "repo")]
+        )
+        self.assertEqual(
+            res,
+            {("owner", "repo"): datetime(2023, 5, 1, 10, tzinfo=timezone.utc)},
+        )
+        self.assertEqual(len(_StubHandler.requests), 1)
+        remaining, _reset = github._RATE_LIMITS.get(
+            github._account("user1", "token") + ":graphql"
+        )
+        self.assertEqual(remaining, 4000)
+
+    def test_prefetch_batches(self):
+        srcs = [
+            _source(f"owner{idx}", "user2")
+            for idx in range(github._GRAPHQL_BATCH_SIZE + 1)
+        ]
+        github.GithubReleasesSource.prefetch(srcs)
+        self.assertEqual(len(_StubHandler.requests), 2)
+        self.assertTrue(all(req[0] == "POST" for req in _StubHandler.requests))
+
+    def test_load_not_modified(self):
+        src = _source("owner", "user3")
+        github.GithubReleasesSource.prefetch([src])
+        state = model.SourceState.new(1)
+        state.last_update = datetime(2023, 6, 1, tzinfo=timezone.utc)
+        new_state, entries = src.load(state)
+        self.assertEqual(
+            new_state.status, model.SourceStateStatus.NOT_MODIFIED
+        )
+        self.assertEqual(entries, [])
+        # only graphql query, no REST calls
+        self.assertEqual([r[0] for r in _StubHandler.requests], ["POST"])
+
+    def test_rate_limit_defer(self):
+        reset = int(time.time()) + 600
+        github._track_rate_limit(
+            github._account("user4", "token"),
+            {"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": str(reset)},
+        )
+        src = _source("owner", "user4")
+        state = model.SourceState.new(1)
+        new_state, entries = src.load(state)
+        self.assertEqual(
+            new_state.status, model.SourceStateStatus.NOT_MODIFIED
+        )
+        self.assertEqual(
+            new_state.next_update,
+            datetime.fromtimestamp(reset, timezone.utc),
+        )
+        self.assertEqual(_StubHandler.requests, [])
+
+    def test_accounts_separated(self):
+        src = _source("owner", "user5")
+        github.GithubReleasesSource.prefetch([src])
+        self.assertIsNotNone(
+            github._REPOSITORIES_CHANGES.get(
+                (github._account("user5", "token"), "owner", "repo")
+            )
+        )
+        # the same user with other token do not see prefetched data
+        self.assertIsNone(
+            github._REPOSITORIES_CHANGES.get(
+                (github._account("user5", "other"), "owner", "repo")
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -27,6 +27,21 @@ _GITLAB_DEFAULT_URL = "https://gitlab.com/"
 _FAVICON = "favicon.ico"
 _ = ty
 
+# GitLab clients for (url, token)
+_CLIENTS: common.LRUCache[ty.Tuple[str, str], gitlab.Gitlab] = common.LRUCache(
+    100
+)
+
+
+def _get_client(url: str, token: str) -> gitlab.Gitlab:
+    """Get (cached) GitLab client for `url` and `token`."""
+    client = _CLIENTS.get((url, token))
+    if client is None:
+        client = gitlab.Gitlab(url, token)  # type: ignore
+        _CLIENTS.put((url, token), client)
+
+    return client
+
 
 def _get_gitlab_url(source: model.Source) -> str:
     glurl = None
@@ -43,6 +58,7 @@ class AbstractGitLabSource(AbstractSource):
     """Support functions for GitLab"""
 
     # pylint: disable=too-few-public-methods
+    shareable = True
     params = AbstractSource.params + [
         common.SettingDef(
             "project",
@@ -102,7 +118,7 @@ class AbstractGitLabSource(AbstractSource):
         token = conf.get("gitlab_token")
         if url and token:
             try:
-                gitl = gitlab.Gitlab(url, token)  # type: ignore
+                gitl = _get_client(url, token)
                 _LOG.debug("gitlab: %r", gitl)
                 return gitl.projects.get(conf["project"])  # type: ignore
 
@@ -19,6 +19,7 @@ import urllib.parse
 
 import requests
 from flask_babel import gettext, lazy_gettext
+from requests.adapters import HTTPAdapter
 
 from webmon2 import common, model
 
@@ -34,6 +35,23 @@ _JAMENDO_ICON = (
     "https://cdn-www.jamendo.com/Client/assets/toolkit/images/"
     "icon/apple-touch-icon-180x180.1558632652000.png"
 )
+_JAMENDO_API = "https://api.jamendo.com/v3.0/"
+# connect and read timeout for api requests
+_TIMEOUT = (10, 60)
+# number of items requested in one page and maximal number of pages
+_PAGE_SIZE = 50
+_MAX_PAGES = 10
+
+
+@common.cache
+def _get_session() -> requests.Session:
+    """Get session shared by all Jamendo sources (keep-alive connections
+    pool)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=1)
+    session.mount("https://", adapter)
+    session.headers["User-agent"] = AbstractSource.AGENT
+    return session
 
 
 # pylint: disable=too-few-public-methods
@@ -56,52 +74,98 @@ class JamendoAbstractSource(AbstractSource):
     # pylint: disable=too-many-return-statements
     def _make_request(self, url: str) -> ty.Tuple[int, ty.Any]:
         _LOG.debug("make request: %s", url)
-        headers = {
-            "User-agent": "Mozilla/5.0 (X11; Linux i686; rv:45.0) "
-            "Gecko/20100101 Firefox/45.0",
-            "Connection": "close",
-        }
-        with requests.Session() as sess:
-            response = None
-            try:
-                # sess.mount("https://", ForceTLSV1Adapter())
-                response = sess.request(url=url, method="GET", headers=headers)
-                response.raise_for_status()
+        response = None
+        try:
+            response = _get_session().get(url, timeout=_TIMEOUT)
+            response.raise_for_status()
 
-                if not response:
-                    raise Exception("No response")
+            if not response:
+                raise Exception("No response")
 
-                if response.status_code == 304:
-                    return 304, None
+            if response.status_code == 304:
+                return 304, None
 
-                if response.status_code != 200:
-                    msg = f"Response code: {response.status_code}"
-                    if response.text:
-                        msg += "\n" + response.text
+            if response.status_code != 200:
+                msg = f"Response code: {response.status_code}"
+                if response.text:
+                    msg += "\n" + response.text
 
-                    return 500, msg
+                return 500, msg
 
-                res = response.json()
-                try:
-                    if res["headers"]["status"] != "success":
-                        return 500, res["headers"]["error_message"]
-
-                except KeyError:
-                    return 500, "wrong answer"
-
-                if not res["results"]:
-                    return 304, None
+            res = response.json()
+            try:
+                if res["headers"]["status"] != "success":
+                    return 500, res["headers"]["error_message"]
+
+            except KeyError:
+                return 500, "wrong answer"
+
+            if not res["results"]:
+                return 304, None
+
+            return 200, res
+        except requests.exceptions.Timeout:
+            return 500, "timeout"
+        except Exception as err:  # pylint: disable=broad-except
+            return 500, str(err)
+        finally:
+            if response:
+                response.close()
+
+    def _load_items(
+        self,
+        endpoint: str,
+        last_update: datetime.datetime,
+        **params: ty.Any,
+    ) -> ty.Tuple[int, ty.Any]:
+        """Load items from `endpoint` ordered by release date (newest first)
+        page by page; stop on first item released before `last_update`.
+
+        Return:
+            (200, list of items), (304, None) when there is no new items
+            or (500, error message)
+        """
+        items: JsonResult = []
+        for page in range(_MAX_PAGES):
+            url = _build_request_url(
+                _JAMENDO_API + endpoint + "?",
+                client_id=self._conf["jamendo_client_id"],
+                format="json",
+                order="releasedate_desc",
+                limit=_PAGE_SIZE,
+                offset=page * _PAGE_SIZE,
+                artist_id=self._conf.get("artist_id"),
+                artist_name=self._conf.get("artist"),
+                **params,
+            )
+            status, res = self._make_request(url)
+            if status == 304:
+                break
+
+            if status != 200:
+                return status, res
+
+            results = res["results"]
+            for item in results:
+                if _get_release_date(item).date() < last_update.date():
+                    return (200, items) if items else (304, None)
+
+                items.append(item)
+
+            if len(results) < _PAGE_SIZE:
+                break
+
+        else:
+            # last page was full; older items are skipped
+            _LOG.warning(
+                "source %d: too many new items in %s; loaded %d items, "
+                "rest skipped",
+                self._source.id,
+                endpoint,
+                len(items),
+            )
 
-                return 200, res
-            except requests.exceptions.ReadTimeout:
-                return 500, "timeout"
-            except Exception as err:  # pylint: disable=broad-except
-                return 500, str(err)
-            finally:
-                if response:
-                    response.close()
-                    del response
-                    response = None
+        return (200, items) if items else (304, None)
 
     def _update_source(self) -> None:
         """
@@ -144,6 +208,10 @@ def _build_request_url(url: str, **params: ty.Any) -> str:
     )
 
 
+def _date_between(since: datetime.datetime) -> str:
+    return since.strftime("%Y-%m-%d") + "_" + time.strftime("%Y-%m-%d")
+
+
 def _jamendo_track_to_url(track_id: int) -> str:
     if not track_id:
         return ""
@@ -193,23 +261,12 @@ class JamendoAlbumsSource(JamendoAbstractSource):
         self, state: model.SourceState
     ) -> ty.Tuple[model.SourceState, ty.List[model.Entry]]:
         """Return one part - page content."""
-        conf = self._conf
         last_update = self._get_last_update(state)
-        url = _build_request_url(
-            "https://api.jamendo.com/v3.0/artists/albums?",
-            client_id=conf["jamendo_client_id"],
-            format="json",
-            order="album_releasedate_desc",
-            name=conf.get("artist"),
-            id=conf.get("artist_id"),
-            album_datebetween=last_update.strftime("%Y-%m-%d")
-            + "_"
-            + time.strftime("%Y-%m-%d"),
+        status, res = self._load_items(
+            "albums",
+            last_update,
+            datebetween=_date_between(last_update),
         )
-
-        _LOG.debug("load url=%s", url)
-
-        status, res = self._make_request(url)
         if status == 304:
             new_state = state.new_not_modified()
             if not new_state.icon:
@@ -222,7 +279,7 @@ class JamendoAlbumsSource(JamendoAbstractSource):
         if not new_state.icon:
             new_state.set_icon(self._load_binary(_JAMENDO_ICON))
 
-        entries = list(_jamendo_format_long_list(self._source, res["results"]))
+        entries = list(_jamendo_format_albums(self._source, res))
         for entry in entries:
             entry.icon = new_state.icon
 
@@ -251,22 +308,21 @@ class JamendoAlbumsSource(JamendoAbstractSource):
         raise NotImplementedError()
 
 
-def _jamendo_format_long_list(
-    source: model.Source, results: JsonResult
+def _jamendo_format_albums(
+    source: model.Source, albums: JsonResult
 ) -> model.Entries:
-    for result in results:
-        for album in result.get("albums") or []:
-            yield _create_entry(
-                source,
-                " ".join(
-                    (
-                        album["releasedate"],
-                        album["name"],
-                        _jamendo_album_to_url(album["id"]),
-                    )
-                ),
-                _get_release_date(album),
-            )
+    for album in albums:
+        yield _create_entry(
+            source,
+            " ".join(
+                (
+                    album["releasedate"],
+                    album["name"],
+                    _jamendo_album_to_url(album["id"]),
+                )
+            ),
+            _get_release_date(album),
+        )
 
 
 class JamendoTracksSource(JamendoAbstractSource):
@@ -294,21 +350,12 @@ class JamendoTracksSource(JamendoAbstractSource):
         self, state: model.SourceState
     ) -> ty.Tuple[model.SourceState, ty.List[model.Entry]]:
         """Return one part - page content."""
-        conf = self._conf
         last_update = self._get_last_update(state)
-        url = _build_request_url(
-            "https://api.jamendo.com/v3.0/artists/tracks?",
-            client_id=conf["jamendo_client_id"],
-            format="json",
-            order="track_releasedate_desc",
-            name=conf.get("artist"),
-            id=conf.get("artist_id"),
-            album_datebetween=last_update.strftime("%Y-%m-%d")
-            + "_"
-            + time.strftime("%Y-%m-%d"),
+        status, res = self._load_items(
+            "tracks",
+            last_update,
+            datebetween=_date_between(last_update),
         )
-
-        status, res = self._make_request(url)
         if status == 304:
             new_state = state.new_not_modified()
             if not new_state.icon:
@@ -323,7 +370,7 @@ class JamendoTracksSource(JamendoAbstractSource):
         if not new_state.icon:
             new_state.set_icon(self._load_binary(_JAMENDO_ICON))
 
-        entries = list(_jamendo_track_format(self._source, res["results"]))
+        entries = list(_jamendo_track_format(self._source, res))
         for entry in entries:
             entry.icon = new_state.icon
 
@@ -353,25 +400,23 @@ class JamendoTracksSource(JamendoAbstractSource):
 
 
 def _jamendo_track_format(
-    source: model.Source, results: JsonResult
+    source: model.Source, tracks: JsonResult
 ) -> model.Entries:
-    for result in results:
-        tracks = result.get("tracks")
-        if tracks:
-            yield _create_entry(
-                source,
-                "\n".join(
-                    " ".join(
-                        (
-                            track["releasedate"],
-                            track["name"],
-                            _jamendo_track_to_url(track["id"]),
-                        )
+    if tracks:
+        yield _create_entry(
+            source,
+            "\n".join(
+                " ".join(
+                    (
+                        track["releasedate"],
+                        track["name"],
+                        _jamendo_track_to_url(track["id"]),
                     )
-                    for track in tracks
-                ),
-                max(_get_release_date(trc) for trc in tracks),
-            )
+                )
+                for track in tracks
+            ),
+            max(_get_release_date(trc) for trc in tracks),
+        )
 
 
 def _get_release_date(data: ty.Dict[str, str]) -> datetime.datetime:
@@ -37,6 +37,7 @@ class RssSource(AbstractSource):
     """Load data from rss"""
 
     name = "rss"
+    shareable = True
     short_info = lazy_gettext("RSS/Atom channel")
     long_info = lazy_gettext(
         "Load data form RSS/Atom channel. Require define URL."
@@ -69,9 +70,8 @@ class RssSource(AbstractSource):
             new_state, entries = state.new_error(str(err)), []
 
         if new_state.status != model.SourceStateStatus.ERROR:
-            if entries and new_state.icon:
-                for entry in entries:
-                    entry.icon = new_state.icon
+            if new_state.icon:
+                entries = _set_icon(entries, new_state.icon)
 
             assert self._source.interval is not None
             # next update is bigger of now + interval or expire (if set)
@@ -88,7 +88,7 @@ class RssSource(AbstractSource):
 
     def _load(
         self, state: model.SourceState
-    ) -> ty.Tuple[model.SourceState, ty.List[model.Entry]]:
+    ) -> ty.Tuple[model.SourceState, model.Entries]:
         # pylint: disable=too-many-locals
         doc = feedparser.parse(
             self._conf["url"],
@@ -145,17 +145,21 @@ class RssSource(AbstractSource):
         else:
             new_state.del_prop("info")
 
+        entries = self._limit_items(entries)
+        del doc
+        doc = None
+        return new_state, self._load_entries(entries)
+
+    def _load_entries(
+        self, entries: ty.List[feedparser.FeedParserDict]
+    ) -> model.Entries:
+        """Convert feed entries; entries are created (and articles loaded)
+        lazily."""
         load_article = self._conf["load_article"]
         load_content = self._conf["load_content"]
         with requests.Session() as sess:
-            items = [
-                self._load_entry(entry, load_content, load_article, sess)
-                for entry in self._limit_items(entries)
-            ]
-
-        del doc
-        doc = None
-        return new_state, items
+            for entry in entries:
+                yield self._load_entry(entry, load_content, load_article, sess)
 
     def _limit_items(
         self, entries: ty.List[model.Entry]
@@ -317,6 +321,12 @@ class RssSource(AbstractSource):
             self._updated_source.settings["web_url"] = web_url
 
 
+def _set_icon(entries: model.Entries, icon: str) -> model.Entries:
+    for entry in entries:
+        entry.icon = icon
+        yield entry
+
+
 def _fail_error(
     state: model.SourceState, doc: feedparser.FeedParserDict, status: int
 ) -> ty.Tuple[model.SourceState, ty.List[model.Entry]]:
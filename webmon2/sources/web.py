@@ -31,6 +31,7 @@ class WebSource(AbstractSource):
     """Load data from web (http/https)"""
 
     name = "url"
+    shareable = True
     short_info = lazy_gettext("Web page")
     long_info = lazy_gettext("Load data form web page pointed by URL.")
     params = AbstractSource.params + [
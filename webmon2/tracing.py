@@ -0,0 +1,244 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tracing of source processing stages.
+
+Each stage of processing source (loading, filters, scoring, saving) is
+measured and reported in prometheus histograms. Optionally spans are written
+as OpenTelemetry (OTLP/JSON) compatible records to local file, one trace
+per line.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+import typing as ty
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from prometheus_client import Histogram
+
+_LOG = logging.getLogger(__name__)
+
+_STAGE_TIME = Histogram(
+    "webmon2_worker_stage_seconds",
+    "Time of source processing stages",
+    ["stage", "kind"],
+)
+_FILTER_TIME = Histogram(
+    "webmon2_worker_filter_seconds",
+    "Time spent in filters",
+    ["filter", "kind"],
+)
+
+_T = ty.TypeVar("_T")
+
+
+@dataclass
+class Span:
+    """Finished (or running) span."""
+
+    name: str
+    span_id: str
+    parent_id: ty.Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attributes: ty.Dict[str, ty.Any] = field(default_factory=dict)
+
+    def to_otlp(self, trace_id: str) -> ty.Dict[str, ty.Any]:
+        return {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [
+                _otlp_attribute(key, val)
+                for key, val in self.attributes.items()
+            ],
+        }
+
+
+def _otlp_attribute(key: str, value: ty.Any) -> ty.Dict[str, ty.Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _new_id(size: int = 8) -> str:
+    return os.urandom(size).hex()
+
+
+class SpanExporter:
+    """Write traces to file as OTLP/JSON `ExportTraceServiceRequest`
+    records; one trace per line."""
+
+    def __init__(self, filename: str) -> None:
+        self.filename = os.path.expanduser(filename)
+        self._lock = threading.Lock()
+
+    def export(self, trace_id: str, spans: ty.Iterable[Span]) -> None:
+        record = {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", "webmon2")
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": __name__},
+                            "spans": [
+                                span.to_otlp(trace_id) for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(record, separators=(",", ":"))
+        try:
+            with self._lock, open(
+                self.filename, "a", encoding="utf-8"
+            ) as ofile:
+                ofile.write(line)
+                ofile.write("\n")
+        except OSError as err:
+            _LOG.error("write trace to %s error: %s", self.filename, err)
+
+
+_EXPORTER: ty.Optional[SpanExporter] = None
+
+
+def configure(filename: ty.Optional[str]) -> None:
+    """Enable (when `filename` is given) or disable exporting spans."""
+    global _EXPORTER  # pylint: disable=global-statement
+    _EXPORTER = SpanExporter(filename) if filename else None
+    if filename:
+        _LOG.info("writing traces to %s", filename)
+
+
+class Tracer:
+    """Measure stages of processing one source.
+
+    Tracer is not thread-safe; it should be used only by thread that process
+    the source.
+    """
+
+    def __init__(self, name: str, kind: str, **attributes: ty.Any) -> None:
+        self.kind = kind
+        self.trace_id = _new_id(16)
+        self._exporter = _EXPORTER
+        self._spans: ty.List[Span] = []
+        self._root = Span(
+            name, _new_id(), None, time.time_ns(), attributes=attributes
+        )
+        self._root.attributes["source.kind"] = kind
+        # ids of currently open spans
+        self._stack: ty.List[str] = [self._root.span_id]
+        # time consumed by nested lazy stages; used to calculate exclusive
+        # time of wrapped iterators
+        self._nested: ty.List[float] = []
+        # total time of each stage
+        self.durations: ty.Dict[str, float] = defaultdict(float)
+
+    def _start_span(self, name: str, attributes: ty.Dict[str, ty.Any]) -> Span:
+        span = Span(
+            name,
+            _new_id(),
+            self._stack[-1],
+            time.time_ns(),
+            attributes=attributes,
+        )
+        if self._exporter:
+            self._spans.append(span)
+
+        return span
+
+    @contextmanager
+    def stage(self, name: str, **attributes: ty.Any) -> ty.Iterator[Span]:
+        """Measure block of code as stage `name`."""
+        span = self._start_span(name, attributes)
+        self._stack.append(span.span_id)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            duration = time.perf_counter() - start
+            self._stack.pop()
+            span.end_ns = time.time_ns()
+            self.durations[name] += duration
+            _STAGE_TIME.labels(name, self.kind).observe(duration)
+
+    def wrap(
+        self,
+        name: str,
+        iterable: ty.Iterable[_T],
+        filter_name: ty.Optional[str] = None,
+    ) -> ty.Iterator[_T]:
+        """Measure lazy stage (generator) `name`.
+
+        Time spent in stages that are consumed by `iterable` is excluded so
+        chained generators are not counted multiple times. When
+        `filter_name` is given time is also reported as filter time.
+        """
+        span = self._start_span(name, {})
+        if filter_name:
+            span.attributes["filter.name"] = filter_name
+
+        iterator = iter(iterable)
+        exclusive = 0.0
+        items = 0
+        try:
+            while True:
+                self._nested.append(0.0)
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed = time.perf_counter() - start
+                    nested = self._nested.pop()
+                    exclusive += elapsed - nested
+                    if self._nested:
+                        # report whole time to consumer
+                        self._nested[-1] += elapsed
+
+                items += 1
+                yield item
+        finally:
+            span.end_ns = time.time_ns()
+            span.attributes["exclusive_seconds"] = exclusive
+            span.attributes["items"] = items
+            self.durations[name] += exclusive
+            _STAGE_TIME.labels(name, self.kind).observe(exclusive)
+            if filter_name:
+                _FILTER_TIME.labels(filter_name, self.kind).observe(exclusive)
+
+    def finish(self, **attributes: ty.Any) -> None:
+        """Close trace and export collected spans."""
+        self._root.end_ns = time.time_ns()
+        self._root.attributes.update(attributes)
+        if self._exporter:
+            self._exporter.export(self.trace_id, [self._root, *self._spans])
@@ -0,0 +1,80 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for tracing module.
+"""
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from . import tracing
+
+
+def _slow(items, delay):
+    for item in items:
+        time.sleep(delay)
+        yield item
+
+
+class TestTracer(unittest.TestCase):
+    def tearDown(self):
+        tracing.configure(None)
+
+    def test_wrap_without_exporter(self):
+        tracer = tracing.Tracer("test", "test")
+        inner = tracer.wrap("inner", _slow(range(3), 0.02))
+        outer = tracer.wrap("outer", _slow(inner, 0.001))
+        self.assertEqual(list(outer), [0, 1, 2])
+        # without exporter spans are not collected
+        self.assertFalse(tracer._spans)  # pylint: disable=protected-access
+
+    def test_export(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "trace.json")
+            tracing.configure(filename)
+            tracer = tracing.Tracer("test", "rss", **{"source.id": 1})
+            with tracer.stage("load"):
+                inner = tracer.wrap("inner", _slow(range(3), 0.02))
+
+            outer = tracer.wrap("outer", _slow(inner, 0.001), "flt")
+            self.assertEqual(list(outer), [0, 1, 2])
+            tracer.finish()
+
+            with open(filename, encoding="utf-8") as ifile:
+                lines = ifile.readlines()
+
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        spans = record["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        # spans of lazy stages are started on first iteration
+        self.assertEqual(
+            [span["name"] for span in spans],
+            ["test", "load", "outer", "inner"],
+        )
+        root = spans[0]
+        self.assertEqual(
+            {span["traceId"] for span in spans}, {root["traceId"]}
+        )
+        self.assertEqual(spans[1]["parentSpanId"], root["spanId"])
+
+        attrs = {
+            span["name"]: {
+                attr["key"]: attr["value"] for attr in span["attributes"]
+            }
+            for span in spans
+        }
+        self.assertEqual(attrs["test"]["source.kind"], {"stringValue": "rss"})
+        inner_time = attrs["inner"]["exclusive_seconds"]["doubleValue"]
+        outer_time = attrs["outer"]["exclusive_seconds"]["doubleValue"]
+        self.assertGreaterEqual(inner_time, 0.06)
+        # time of inner generator is not included in outer
+        self.assertLess(outer_time, 0.04)
+        self.assertEqual(attrs["outer"]["filter.name"], {"stringValue": "flt"})
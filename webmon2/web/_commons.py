@@ -9,20 +9,24 @@
 """
 Common gui api functions
 """
+
 import math
 import secrets
 import typing as ty
 
 from flask import g, session
 
-from webmon2 import model
+from webmon2 import database, model
 from webmon2.database import DB
 
 PAGE_LIMIT = 25
 
 
 def preprate_entries_list(
-    entries: ty.List[model.Entry], page: int, total_entries: int, order: str
+    entries: ty.List[model.AnyEntry],
+    page: int,
+    total_entries: int,
+    order: str,
 ) -> ty.Dict[str, ty.Any]:
     last_page = math.ceil(total_entries / PAGE_LIMIT) - 1
     info = {
@@ -58,3 +62,27 @@ def generate_csrf_token() -> None:
     """
     session["_csrf_token"] = secrets.token_urlsafe(16)
     session.modified = True
+
+
+def parse_ids(value: ty.Optional[str]) -> ty.Optional[ty.List[int]]:
+    """Parse comma-separated list of entries id."""
+    if not value:
+        return None
+
+    return [int(id_) for id_ in value.split(",") if id_] or None
+
+
+def update_unread_count(delta: int) -> None:
+    """Apply change of number of unread entries to value counted before
+    request (instead of counting it again)."""
+    unread = getattr(g, "entries_unread_count", None)
+    if unread is not None and delta:
+        g.entries_unread_count = max(unread + delta, 0)
+
+
+def set_mark_read_on_scroll(db: DB, user_id: int, unread: bool) -> None:
+    """Enable marking entries read while scrolling list of unread entries
+    when user enabled it in settings."""
+    g.mark_read_on_scroll = unread and database.settings.get_value(
+        db, "mark_read_on_scroll", user_id, False
+    )
@@ -0,0 +1,77 @@
+#! /usr/bin/env python3
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Gevent-friendly waiting for database.
+
+Web requests are handled by greenlets in one thread; by default psycopg2
+and connection pool block whole thread (and all greenlets) while waiting
+for database. Installed functions (like psycogreen) switch to other
+greenlets while waiting. Workers run in normal threads without gevent loop,
+so for them waiting stay blocking.
+"""
+import logging
+import threading
+
+import gevent
+import psycopg2
+from gevent.socket import wait_read, wait_write
+from psycopg2 import extensions, extras
+
+from webmon2.database import DB
+
+_LOG = logging.getLogger(__name__)
+
+# interval of checking for free connection in pool
+_POOL_POLL_INTERVAL = 0.01
+
+
+def _in_gevent_loop() -> bool:
+    # greenlets spawned by gevent have hub as parent; main greenlets of
+    # threads have no parent
+    return gevent.getcurrent().parent is not None
+
+
+def wait_callback(conn: extensions.connection) -> None:
+    """psycopg2 wait callback that yield to other greenlets."""
+    if not _in_gevent_loop():
+        extras.wait_select(conn)
+        return
+
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+
+        if state == extensions.POLL_READ:
+            wait_read(conn.fileno())
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno())
+        else:
+            raise psycopg2.OperationalError(f"bad result from poll: {state}")
+
+
+def pool_wait(cond: threading.Condition, timeout: float) -> None:
+    """Wait for free connection in pool; let other greenlets run and return
+    connections."""
+    if not _in_gevent_loop():
+        cond.wait(timeout)
+        return
+
+    cond.release()
+    try:
+        gevent.sleep(min(timeout, _POOL_POLL_INTERVAL))
+    finally:
+        cond.acquire()
+
+
+def install() -> None:
+    """Install gevent-friendly waiting for psycopg2 and database pool."""
+    _LOG.info("installing gevent wait callback for database")
+    extensions.set_wait_callback(wait_callback)
+    DB.set_pool_wait_func(pool_wait)
@@ -9,7 +9,6 @@
 """
 Web gui application
 """
-
 import logging
 import os
 import time
@@ -46,6 +45,7 @@ from webmon2 import database, worker
 
 from . import _commons as c
 from . import (
+    _dbwait,
     _filters,
     appsession,
     atom,
@@ -125,7 +125,11 @@ def _create_app(debug: bool, web_root: str, conf: ConfigParser) -> Flask:
     app.config["app_conf"] = conf
     app.app_context().push()
 
-    app.session_interface = appsession.DBSessionInterface(True)  # type: ignore
+    app.session_interface = appsession.DBSessionInterface(  # type: ignore
+        True,
+        cache_size=conf.getint("web", "session_cache_size", fallback=1000),
+        cache_ttl=conf.getint("web", "session_cache_ttl", fallback=300),
+    )
     babel = flask_babel.Babel(app)
 
     _register_blueprints(app)
@@ -145,7 +149,9 @@ def _create_app(debug: bool, web_root: str, conf: ConfigParser) -> Flask:
         path = request.path
         # pages that not need valid user and don't need additional data like
         # locale setting
-        if path == "/favicon.ico" or path.startswith(("/metrics", "/atom")):
+        if path == "/favicon.ico" or path.startswith(
+            ("/metrics", "/atom", "/static/")
+        ):
             return None
 
         if not _check_csrf_token():
@@ -156,7 +162,7 @@ def _create_app(debug: bool, web_root: str, conf: ConfigParser) -> Flask:
             # user is logged
             # path that not need load additional data
             if (
-                path.startswith(("/binary/", "/static", "/entry/mark/"))
+                path.startswith(("/binary/", "/entry/mark/"))
                 or path == "/manifest.json"
             ):
                 return None
@@ -233,7 +239,10 @@ def _set_cache_contol_no_cache(resp: Response) -> None:
 
 def _check_csrf_token() -> bool:
     if request.method == "POST":
-        req_token = request.form.get("_csrf_token")
+        # json api requests send token in header
+        req_token = request.form.get("_csrf_token") or request.headers.get(
+            "X-CSRF-Token"
+        )
         sess_token = session.get("_csrf_token")
         if req_token != sess_token:
             _LOG.info("bad csrf token")
@@ -287,6 +296,8 @@ def start_app(args: Namespace, conf: ConfigParser) -> None:
     if args.debug:
         app.run(host=host, port=port, debug=True)
     else:
+        # let other greenlets run while waiting for database
+        _dbwait.install()
         pool = Pool(conf.getint("web", "pool", fallback=10))
         http_server = WSGIServer(
             (host, port),
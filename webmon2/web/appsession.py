@@ -13,15 +13,26 @@ Based on flask-session.
 
 """
 import pickle
-from datetime import datetime, timezone
+import typing as ty
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
 from uuid import uuid4
 
+from flask import request
 from flask.sessions import SessionInterface as FlaskSessionInterface
 from flask.sessions import SessionMixin
 from itsdangerous import BadSignature, Signer, want_bytes
 from werkzeug.datastructures import CallbackDict
 
-from webmon2 import database, model
+from webmon2 import common, database, model
+
+# requests to this paths not use session at all
+_SESSIONLESS_PATHS = ("/static/", "/favicon.ico", "/metrics")
+# requests to this paths only read session (from cache when possible); session
+# is never stored nor refreshed
+_READONLY_PATHS = ("/binary/", "/proxy/")
+# store session in database when expiry time changed more than this value
+_EXPIRY_REFRESH_THRESHOLD = timedelta(hours=1)
 
 
 class DBSession(CallbackDict, SessionMixin):
@@ -39,19 +50,44 @@ class DBSession(CallbackDict, SessionMixin):
         CallbackDict.__init__(self, initial, on_update)
 
 
+@dataclass
+class _CachedSession:
+    data: bytes
+    expiry: ty.Optional[datetime]
+
+    def is_expired(self) -> bool:
+        return self.expiry is not None and self.expiry <= datetime.now(
+            timezone.utc
+        )
+
+
 class DBSessionInterface(FlaskSessionInterface):
     """Uses database as a session backend.
 
+    Sessions are cached in memory (write-through) so most of requests not
+    touch database.
+
     :param use_signer: Whether to sign the session id cookie or not.
     :param permanent: Whether to use permanent session or not.
+    :param cache_size: max number of sessions kept in memory.
+    :param cache_ttl: how long (in seconds) session is kept in memory.
     """
 
-    def __init__(self, use_signer=False, permanent=True):
+    def __init__(
+        self, use_signer=False, permanent=True, cache_size=1000, cache_ttl=300
+    ):
         self.use_signer = use_signer
         self.permanent = permanent
         self.has_same_site_capability = hasattr(self, "get_cookie_samesite")
+        self._cache: common.LRUCache[str, _CachedSession] = common.LRUCache(
+            cache_size, cache_ttl
+        )
 
     def open_session(self, app, request):
+        if request.path.startswith(_SESSIONLESS_PATHS):
+            # null session
+            return None
+
         sid = request.cookies.get(app.session_cookie_name)
         if not sid:
             return DBSession(sid=_generate_sid(), permanent=self.permanent)
@@ -67,21 +103,12 @@ class DBSessionInterface(FlaskSessionInterface):
             except BadSignature:
                 return DBSession(sid=_generate_sid(), permanent=self.permanent)
 
-        with database.DB.get() as db:
-            saved_session = database.system.get_session(db, sid)
-            if saved_session and saved_session.expiry <= datetime.now(
-                timezone.utc
-            ):
-                # Delete expired session
-                database.system.delete_session(db, sid)
-                db.commit()
-                saved_session = None
-
+        saved_session = self._load_session(sid)
         if not saved_session:
             return DBSession(sid=sid, permanent=self.permanent)
 
         try:
-            data = pickle.loads(want_bytes(saved_session.data))
+            data = pickle.loads(saved_session.data)
             return DBSession(data, sid=sid)
         except pickle.UnpicklingError:
             return DBSession(sid=sid, permanent=self.permanent)
@@ -89,32 +116,40 @@ class DBSessionInterface(FlaskSessionInterface):
     def save_session(self, app, session, response):
         domain = self.get_cookie_domain(app)
         path = self.get_cookie_path(app)
-        with database.DB.get() as db:
 
-            if not session:
-                if session.modified:
+        if not session:
+            if session.modified:
+                self._cache.pop(session.sid)
+                with database.DB.get() as db:
                     database.system.delete_session(db, session.sid)
                     db.commit()
-                    response.delete_cookie(
-                        app.session_cookie_name, domain=domain, path=path
-                    )
-                return
-
-            saved_session = database.system.get_session(db, session.sid)
-            expires = self.get_expiration_time(app, session)
-            val = pickle.dumps(dict(session))
-            if saved_session:
-                saved_session.data = val
-                saved_session.expiry = expires
-            elif not session.modified:
-                db.commit()
-                return
-            else:
-                saved_session = model.Session(session.sid, expires, val)
 
-            database.system.save_session(db, saved_session)
+                response.delete_cookie(
+                    app.session_cookie_name, domain=domain, path=path
+                )
+            return
+
+        cached = self._cache.get(session.sid)
+        if not cached and not session.modified:
+            # not stored, not modified session - nothing to do
+            return
+
+        if request.path.startswith(_READONLY_PATHS):
+            return
+
+        expires = self.get_expiration_time(app, session)
+        val = pickle.dumps(dict(session))
+        if cached and not self._need_store(cached, val, expires):
+            return
+
+        with database.DB.get() as db:
+            database.system.save_session(
+                db, model.Session(session.sid, expires, val)
+            )
             db.commit()
 
+        self._cache.put(session.sid, _CachedSession(val, expires))
+
         if self.use_signer:
             session_id = _get_signer(app).sign(want_bytes(session.sid))
         else:
@@ -137,6 +172,45 @@ class DBSessionInterface(FlaskSessionInterface):
             **conditional_cookie_kwargs
         )
 
+    def _load_session(self, sid: str) -> ty.Optional[_CachedSession]:
+        """Get session from cache or, when not found, from database."""
+        cached = self._cache.get(sid)
+        if cached:
+            if not cached.is_expired():
+                return cached
+
+            self._cache.pop(sid)
+
+        with database.DB.get() as db:
+            saved_session = database.system.get_session(db, sid)
+            if not saved_session:
+                return None
+
+            cached = _CachedSession(
+                want_bytes(saved_session.data), saved_session.expiry
+            )
+            if cached.is_expired():
+                # Delete expired session
+                database.system.delete_session(db, sid)
+                db.commit()
+                return None
+
+        self._cache.put(sid, cached)
+        return cached
+
+    @staticmethod
+    def _need_store(
+        cached: _CachedSession, data: bytes, expires: ty.Optional[datetime]
+    ) -> bool:
+        """Check is session changed or its expiry time should be refreshed."""
+        if cached.data != data:
+            return True
+
+        if cached.expiry is None or expires is None:
+            return cached.expiry != expires
+
+        return expires - cached.expiry >= _EXPIRY_REFRESH_THRESHOLD
+
 
 def _generate_sid():
     return str(uuid4())
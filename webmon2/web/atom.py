@@ -13,20 +13,34 @@ Web gui
 """
 
 import logging
+import threading
+import time
 import typing as ty
 import urllib
 import xml.etree.ElementTree
+from dataclasses import dataclass
 from datetime import datetime, timezone
 
-from flask import Blueprint, Response, abort, request, url_for
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    abort,
+    current_app,
+    request,
+    url_for,
+)
 
-from webmon2 import database
+from webmon2 import common, database, model
 
 from . import _commons as c
 
 _LOG = logging.getLogger(__name__)
 BP = Blueprint("atom", __name__, url_prefix="/atom")
 
+# interval (in seconds) between checks for changes in cached feeds
+_REFRESH_INTERVAL = 60
+
 DEFAULT_ETREE = xml.etree.ElementTree
 ItemElement = ty.NewType("ItemElement", DEFAULT_ETREE.Element)
 
@@ -79,35 +93,25 @@ def start_rss(
     return rss
 
 
-@BP.route("/group/<key>")
-def group(key: str) -> Response:
-    if key == "off":
-        return abort(404)
+@dataclass
+class _CachedFeed:
+    user_id: int
+    # group state etag of this feed
+    etag: str
+    content: bytes
+    # url_root and link from request that created feed
+    url_root: str
+    link: str
 
-    db = c.get_db()
 
-    try:
-        grp = database.groups.get_by_feed(db, key)
-    except database.NotFound:
-        return abort(404)
+# cached, rendered feed for group id
+_FEED_CACHE: common.LRUCache[int, _CachedFeed] = common.LRUCache(100)
 
-    assert grp and grp.id
-    updated_etag = database.groups.get_state(db, grp.id)
-    _LOG.debug("updated_etag %r", updated_etag)
-    if not updated_etag:
-        return Response("Not modified", 304)
-
-    db.commit()
-    updated, etag = updated_etag
-
-    if request.if_modified_since and request.if_modified_since >= updated:
-        _LOG.debug("if_modified_since: %s", request.if_modified_since)
-        return Response("Not modified", 304)
-
-    if request.if_match and request.if_match.contains(etag):
-        _LOG.debug("if_matche: %s", request.if_match)
-        return Response("Not modified", 304)
 
+def _render_feed(
+    db: database.DB, grp: model.SourceGroup, updated: datetime, link: str
+) -> bytes:
+    assert grp.id
     rss_items = []
 
     for entry in database.entries.find_for_feed(db, grp.user_id, grp.id):
@@ -118,7 +122,7 @@ def group(key: str) -> Response:
 
         rss_items.append(
             gen_item(
-                title=entry.title or entry.source.group.name,  # type: ignore
+                title=entry.title or entry.source.group.name,
                 link=url,
                 description=body,
                 args={
@@ -134,15 +138,122 @@ def group(key: str) -> Response:
     rss_xml_element = start_rss(
         title="Webmon2 - " + grp.name,
         description="Webmon2 feed for group " + grp.name,
-        link=request.url,
+        link=link,
         items=rss_items,
         args={"pubDate": updated.isoformat()},
     )
 
-    response = Response(
-        xml.etree.ElementTree.tostring(rss_xml_element),
-        mimetype="application/atom+xml",
-    )
-    response.headers["ETag"] = etag
-    response.headers["Last-Modified"] = updated.isoformat()
+    return xml.etree.ElementTree.tostring(rss_xml_element)
+
+
+class FeedRefresher(threading.Thread):
+    """Background thread that re-render cached feeds when group state
+    (etag) changed, i.e. after new entries are loaded."""
+
+    _instance: ty.Optional["FeedRefresher"] = None
+    _lock = threading.Lock()
+
+    def __init__(self, app: Flask) -> None:
+        threading.Thread.__init__(self, daemon=True, name="feed-refresher")
+        self._app = app
+
+    @classmethod
+    def ensure_started(cls, app: Flask) -> None:
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = FeedRefresher(app)
+                cls._instance.start()
+
+    def run(self) -> None:
+        while True:
+            time.sleep(_REFRESH_INTERVAL)
+            try:
+                self._refresh()
+            except Exception as err:  # pylint: disable=broad-except
+                _LOG.exception("refresh feeds error: %s", err)
+
+    def _refresh(self) -> None:
+        for group_id in _FEED_CACHE.keys():
+            cached = _FEED_CACHE.get(group_id)
+            if not cached:
+                continue
+
+            with database.DB.get() as db:
+                try:
+                    grp = database.groups.get(db, group_id, cached.user_id)
+                except database.NotFound:
+                    _FEED_CACHE.pop(group_id)
+                    continue
+
+                updated_etag = database.groups.get_state(db, group_id)
+                db.commit()
+                if not updated_etag or updated_etag[1] == cached.etag:
+                    continue
+
+                updated, etag = updated_etag
+                _LOG.debug("refreshing feed for group %d", group_id)
+                with self._app.test_request_context(base_url=cached.url_root):
+                    content = _render_feed(db, grp, updated, cached.link)
+
+            _FEED_CACHE.put(
+                group_id,
+                _CachedFeed(
+                    cached.user_id, etag, content, cached.url_root, cached.link
+                ),
+            )
+
+
+@BP.route("/group/<key>")
+def group(key: str) -> Response:
+    if key == "off":
+        return abort(404)
+
+    db = c.get_db()
+
+    try:
+        grp = database.groups.get_by_feed(db, key)
+    except database.NotFound:
+        return abort(404)
+
+    assert grp and grp.id
+    updated_etag = database.groups.get_state(db, grp.id)
+    _LOG.debug("updated_etag %r", updated_etag)
+    if not updated_etag:
+        return Response("Not modified", 304)
+
+    db.commit()
+    updated, etag = updated_etag
+
+    if request.if_none_match:
+        # If-Modified-Since must be ignored when If-None-Match is sent
+        # (RFC 7232, 3.3)
+        if request.if_none_match.contains(etag):
+            _LOG.debug("if_none_match: %s", request.if_none_match)
+            return Response("Not modified", 304)
+
+    elif request.if_modified_since and request.if_modified_since >= (
+        # http dates have one second resolution
+        updated.replace(microsecond=0)
+    ):
+        _LOG.debug("if_modified_since: %s", request.if_modified_since)
+        return Response("Not modified", 304)
+
+    cached = _FEED_CACHE.get(grp.id)
+    if cached and cached.etag == etag:
+        content = cached.content
+    else:
+        content = _render_feed(db, grp, updated, request.url)
+        _FEED_CACHE.put(
+            grp.id,
+            _CachedFeed(
+                grp.user_id, etag, content, request.url_root, request.url
+            ),
+        )
+        FeedRefresher.ensure_started(
+            current_app._get_current_object()  # type: ignore
+        )
+
+    response = Response(content, mimetype="application/atom+xml")
+    response.set_etag(etag)
+    response.last_modified = updated
     return response
@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+# vim:fenc=utf-8
+#
+# Copyright © 2023 Karol Będkowski
+#
+# Distributed under terms of the GPLv3 license.
+
+"""
+Tests for gevent-friendly waiting for database.
+"""
+import threading
+import types
+import unittest
+
+import gevent
+from psycopg2 import extensions
+
+from webmon2.database import _pool
+
+from . import _dbwait
+
+
+class _Conn:
+    closed = False
+
+    def __init__(self):
+        self.info = types.SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_INTRANS
+        )
+
+    def rollback(self):
+        # green wait callback switch to other greenlets while waiting for
+        # database
+        gevent.sleep(0.001)
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+
+class _Pool(_pool.BlockingConnectionPool):
+    def _open(self):
+        gevent.sleep(0.001)
+        return _Conn()
+
+
+class TestGreenPool(unittest.TestCase):
+    def test_concurrent_greenlets(self):
+        cpool = _Pool(2, 4, timeout=10)
+        cpool.wait_func = _dbwait.pool_wait
+        errors = []
+
+        def client():
+            for _ in range(20):
+                conn = cpool.getconn()
+                conn.info.transaction_status = (
+                    extensions.TRANSACTION_STATUS_INTRANS
+                )
+                gevent.sleep(0)
+                cpool.putconn(conn)
+
+        def run():
+            try:
+                greenlets = [gevent.spawn(client) for _ in range(10)]
+                gevent.joinall(greenlets, raise_error=True)
+            except Exception as err:  # pylint: disable=broad-except
+                errors.append(err)
+
+        # greenlet blocked on pool lock block whole thread; run greenlets
+        # in separate thread to detect deadlock
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        thread.join(30)
+        self.assertFalse(thread.is_alive(), "deadlock")
+        self.assertEqual(errors, [])
+        self.assertEqual(cpool.waiting, 0)
+        self.assertLessEqual(len(cpool._pool), 2)
+        self.assertEqual(cpool._used, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
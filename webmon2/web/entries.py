@@ -16,6 +16,7 @@ import typing as ty
 
 from flask import (
     Blueprint,
+    abort,
     g,
     redirect,
     render_template,
@@ -23,6 +24,7 @@ from flask import (
     session,
     url_for,
 )
+from flask_babel import gettext
 
 from webmon2 import database, model
 
@@ -57,10 +59,17 @@ def entries(mode: str, page: int) -> ty.Any:
         )
     entries_ = list(
         database.entries.find(
-            db, user_id, limit=limit, offset=offset, unread=unread, order=order
+            db,
+            user_id,
+            limit=limit,
+            offset=offset,
+            unread=unread,
+            order=order,
+            shape=database.entries.SHAPE_LIST,
         )
     )
     data = c.preprate_entries_list(entries_, page, total_entries, order)
+    c.set_mark_read_on_scroll(db, user_id, unread)
     return render_template("entries.html", showed=mode, **data)
 
 
@@ -68,7 +77,11 @@ def entries(mode: str, page: int) -> ty.Any:
 def entries_starred() -> ty.Any:
     db = c.get_db()
     user_id = session["user"]
-    entries_ = list(database.entries.get_starred(db, user_id))
+    entries_ = list(
+        database.entries.get_starred(
+            db, user_id, shape=database.entries.SHAPE_LIST
+        )
+    )
     return render_template("starred.html", entries=entries_)
 
 
@@ -102,6 +115,7 @@ def entries_history() -> ty.Any:
         source_id=source_id,
         offset=page * c.PAGE_LIMIT,
         limit=c.PAGE_LIMIT,
+        shape=database.entries.SHAPE_LIST,
     )
 
     return render_template(
@@ -175,7 +189,13 @@ def entries_search() -> str:
         try:
             entries_ = list(
                 database.entries.find_fulltext(
-                    db, user_id, query, title_only, group_id, source_id
+                    db,
+                    user_id,
+                    query,
+                    title_only,
+                    group_id,
+                    source_id,
+                    shape=database.entries.SHAPE_LIST,
                 )
             )
         except database.QuerySyntaxError:
@@ -197,13 +217,86 @@ def entries_search() -> str:
 def entries_mark_read(mode: str) -> ty.Any:  # pylint: disable=unused-argument
     db = c.get_db()
     user_id = session["user"]  # type: int
-    ids = [int(id_) for id_ in request.form.get("ids", "").split(",")] or None
-    marked = database.entries.mark_read(
+    ids = c.parse_ids(request.form.get("ids"))
+    if ids:
+        res = database.entries.mark_read_many(db, user_id, ids=ids)
+    else:
+        res = database.entries.mark_read_many(
+            db,
+            user_id,
+            ranges=[
+                (int(request.args["min_id"]), int(request.args["max_id"]))
+            ],
+        )
+
+    db.commit()
+    return {"marked": res.changed}
+
+
+def _parse_ranges(
+    value: ty.Any,
+) -> ty.List[ty.Tuple[ty.Optional[int], ty.Optional[int]]]:
+    ranges = []
+    for rng in value or ():
+        min_id, max_id = rng
+        ranges.append(
+            (
+                None if min_id is None else int(min_id),
+                None if max_id is None else int(max_id),
+            )
+        )
+
+    return ranges
+
+
+@BP.route("/mark/batch", methods=["POST"])
+def entries_mark_batch_api() -> ty.Any:
+    """Change read mark of many entries; used to mark entries read while
+    scrolling list.
+
+    Request is json object with keys:
+    `ids` - list of entries id, `ranges` - list of [min_id, max_id],
+    `source_ids`, `group_ids` - optional lists to limit entries,
+    `value` - "read" (default) or "unread".
+    """
+    db = c.get_db()
+    user_id = session["user"]  # type: int
+    req = request.get_json(silent=True)
+    if not isinstance(req, dict):
+        return abort(400)
+
+    try:
+        ids = [int(id_) for id_ in req.get("ids") or ()]
+        ranges = _parse_ranges(req.get("ranges"))
+        source_ids = [int(id_) for id_ in req.get("source_ids") or ()]
+        group_ids = [int(id_) for id_ in req.get("group_ids") or ()]
+    except (TypeError, ValueError):
+        return abort(400)
+
+    if not ids and not ranges:
+        return {"marked": 0, "unread": None, "sources": {}}
+
+    unread = req.get("value") == "unread"
+    res = database.entries.mark_read_many(
         db,
         user_id,
-        max_id=int(request.args["max_id"]),
-        min_id=int(request.args["min_id"]),
         ids=ids,
+        ranges=ranges,
+        source_ids=source_ids,
+        group_ids=group_ids,
+        read=(
+            model.EntryReadMark.UNREAD if unread else model.EntryReadMark.READ
+        ),
+        unread_only=not unread,
     )
     db.commit()
-    return {"marked": marked}
+
+    return {
+        "marked": res.changed,
+        "unread": database.entries.get_total_count(db, user_id, unread=True),
+        "sources": {
+            str(source_id): delta
+            for source_id, delta in res.unread_deltas.items()
+        },
+        "title": gettext("Read") if unread else gettext("Unread"),
+    }
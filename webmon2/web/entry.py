@@ -13,7 +13,7 @@ Web gui
 import logging
 import typing as ty
 
-from flask import Blueprint, abort, g, render_template, request, session
+from flask import Blueprint, abort, render_template, request, session
 from flask_babel import gettext
 
 from webmon2 import database, model
@@ -38,16 +38,11 @@ def entry(entry_id: int) -> ty.Any:
         return abort(404)
 
     if entry_.read_mark == model.EntryReadMark.UNREAD:
-        database.entries.mark_read(
-            db,
-            user_id,
-            entry_id=entry_id,
-            read=model.EntryReadMark.MANUAL_READ,
+        res = database.entries.mark_read_many(
+            db, user_id, ids=[entry_id], read=model.EntryReadMark.MANUAL_READ
         )
         entry_.read_mark = model.EntryReadMark.MANUAL_READ
-        g.entries_unread_count = database.entries.get_total_count(
-            db, user_id, unread=True
-        )
+        c.update_unread_count(res.unread_delta)
         db.commit()
 
     next_entry = database.entries.find_next_entry_id(
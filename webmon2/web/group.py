@@ -139,6 +139,7 @@ def group_entries(
             unread=unread,
             limit=c.PAGE_LIMIT,
             offset=offset,
+            shape=database.entries.SHAPE_LIST,
         )
     )
 
@@ -147,6 +148,7 @@ def group_entries(
     )
     data = c.preprate_entries_list(entries, page, total_entries, order)
 
+    c.set_mark_read_on_scroll(db, user_id, unread)
     return render_template(
         "group_entries.html", group=sgroup, showed=mode, **data
     )
@@ -158,14 +160,17 @@ def group_mark_read(group_id: int) -> ty.Any:
     max_id = int(request.args.get("max_id", -1))
     min_id = int(request.args.get("min_id", -1))
     user_id = session["user"]
-    ids: ty.Optional[ty.List[int]] = None
-    r_ids = request.form.get("ids", "")
-    if r_ids:
-        ids = list(map(int, r_ids.split(","))) or None
-
-    marked = database.groups.mark_read(
-        db, user_id, group_id, min_id=min_id, max_id=max_id, ids=ids
+    ids = c.parse_ids(request.form.get("ids"))
+
+    res = database.entries.mark_read_many(
+        db,
+        user_id,
+        ids=ids,
+        ranges=None if ids else [(min_id, max_id)],
+        group_ids=[group_id],
+        unread_only=True,
     )
+    marked = res.changed
     db.commit()
 
     if request.args.get("go") == "next":
@@ -249,13 +254,11 @@ def group_entry(group_id: int, mode: str, entry_id: int) -> ty.Any:
 
     if entry.read_mark == model.EntryReadMark.UNREAD:
         # mark entry as read
-        database.entries.mark_read(
-            db,
-            user_id,
-            entry_id=entry_id,
-            read=model.EntryReadMark.MANUAL_READ,
+        res = database.entries.mark_read_many(
+            db, user_id, ids=[entry_id], read=model.EntryReadMark.MANUAL_READ
         )
         entry.read_mark = model.EntryReadMark.MANUAL_READ
+        c.update_unread_count(res.unread_delta)
         db.commit()
 
     unread = mode != "all"
@@ -10,33 +10,407 @@
 Proxy request via webmon application.
 """
 
+import hashlib
+import json
 import logging
+import os
+import tempfile
+import threading
+import time
 import typing as ty
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
 
 import requests
-from flask import Blueprint, Response
+from flask import Blueprint, Response, abort, current_app, request, send_file
+from werkzeug.datastructures import ResponseCacheControl
+from werkzeug.http import parse_cache_control_header, parse_date
+
+from webmon2 import common
 
 _LOG = logging.getLogger(__name__)
 BP = Blueprint("proxy", __name__, url_prefix="/proxy")
 
-_EXCLUDED_HEADERS = [
-    "content-encoding",
-    "content-length",
-    "transfer-encoding",
-    "connection",
-]
+# headers passed to client from proxied response
+_PASSED_HEADERS = ("content-type", "cache-control", "etag", "last-modified")
+# proxied content types
+_ALLOWED_TYPES = ("image/", "video/", "audio/")
+_CHUNK_SIZE = 65536
+# responses without known length are buffered in memory up to this size and
+# then in temporary file
+_SPOOL_SIZE = 1024 * 1024
+# how long (in seconds) cached responses without explicit lifetime are fresh
+_DEFAULT_MAX_AGE = 3600
+
+
+@dataclass
+class CacheMeta:
+    """Cached response metadata."""
+
+    url: str
+    content_type: str
+    size: int = 0
+    etag: ty.Optional[str] = None
+    last_modified: ty.Optional[str] = None
+    # timestamp when cached response expire
+    expires: float = 0.0
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires
+
+    def update_expires(self, headers: ty.Mapping[str, str]) -> bool:
+        """Update expire time according to response headers.
+        Return False when response should not be cached."""
+        cache_control = parse_cache_control_header(
+            headers.get("cache-control"), cls=ResponseCacheControl
+        )
+        if cache_control.no_store or cache_control.private:
+            return False
+
+        if cache_control.no_cache:
+            max_age = 0
+        elif cache_control.max_age is not None:
+            max_age = cache_control.max_age
+        elif expires := parse_date(headers.get("expires")):
+            max_age = int(expires.timestamp() - time.time())
+        else:
+            max_age = _DEFAULT_MAX_AGE
+
+        self.expires = time.time() + max(max_age, 0)
+        return True
+
+
+class DiskCache:
+    """Size-bounded LRU cache of proxied responses.
+
+    Each response is stored in two files named by hash of url: `<key>.data`
+    with content and `<key>.json` with `CacheMeta`.
+    """
+
+    def __init__(self, path: str, max_size: int) -> None:
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # key -> size; order by last access
+        self._index: ty.OrderedDict[str, int] = OrderedDict()
+        self._size = 0
+        common.create_missing_dir(path)
+        self._load_index()
+
+    def get(self, url: str) -> ty.Optional[ty.Tuple[CacheMeta, str]]:
+        """Find cached response for `url`; return metadata and path to
+        content file."""
+        key = self._key(url)
+        with self._lock:
+            if key not in self._index:
+                return None
+
+            self._index.move_to_end(key)
+            try:
+                with open(self._file(key, "json"), encoding="UTF-8") as ifile:
+                    meta = CacheMeta(**json.load(ifile))
+            except (IOError, ValueError, TypeError) as err:
+                _LOG.debug("load cache meta for %s error: %s", url, err)
+                self._size -= self._index.pop(key, 0)
+                self._remove_files(key)
+                return None
+
+        # content file may be evicted later; see `_send_cached`
+        return meta, self._file(key, "data")
+
+    def new_tempfile(self) -> ty.Tuple[ty.IO[bytes], str]:
+        fdesc, tmpname = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        return os.fdopen(fdesc, "wb"), tmpname
+
+    def put(self, meta: CacheMeta, tmpname: str) -> None:
+        """Put content from `tmpname` file into cache."""
+        key = self._key(meta.url)
+        os.replace(tmpname, self._file(key, "data"))
+        self.update_meta(meta)
+        with self._lock:
+            self._size += meta.size - self._index.pop(key, 0)
+            self._index[key] = meta.size
+            self._evict()
+
+    def update_meta(self, meta: CacheMeta) -> None:
+        key = self._key(meta.url)
+        tmp = self._file(key, "json.tmp")
+        with open(tmp, "w", encoding="UTF-8") as ofile:
+            json.dump(asdict(meta), ofile)
+
+        os.replace(tmp, self._file(key, "json"))
+
+    def remove(self, url: str) -> None:
+        key = self._key(url)
+        with self._lock:
+            self._size -= self._index.pop(key, 0)
+            self._remove_files(key)
+
+    def _evict(self) -> None:
+        while self._size > self.max_size and self._index:
+            key, size = self._index.popitem(last=False)
+            self._size -= size
+            self._remove_files(key)
+            _LOG.debug("removed %s from proxy cache", key)
+
+    def _load_index(self) -> None:
+        items = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if entry.name.endswith(".tmp"):
+                    # not finished downloads
+                    os.unlink(entry.path)
+                elif entry.name.endswith(".data"):
+                    stat = entry.stat()
+                    key = entry.name[:-5]
+                    items.append((stat.st_mtime, key, stat.st_size))
+
+        for _mtime, key, size in sorted(items):
+            self._index[key] = size
+            self._size += size
+
+        self._evict()
+
+    def _remove_files(self, key: str) -> None:
+        for ext in ("data", "json"):
+            try:
+                os.unlink(self._file(key, ext))
+            except FileNotFoundError:
+                pass
+
+    def _file(self, key: str, ext: str) -> str:
+        return os.path.join(self.path, key + "." + ext)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+@common.cache
+def _get_cache() -> ty.Optional[DiskCache]:
+    conf = current_app.config["app_conf"]
+    path = conf.get("web", "proxy_cache_dir", fallback="")
+    size = conf.getint("web", "proxy_cache_size", fallback=0)
+    if not path or size <= 0:
+        return None
+
+    return DiskCache(os.path.expanduser(path), size * 1024 * 1024)
+
+
+@common.cache
+def _max_size() -> int:
+    conf = current_app.config["app_conf"]
+    return conf.getint("web", "proxy_max_size", fallback=20) * 1024 * 1024
+
+
+def _send_cached(meta: CacheMeta, path: str) -> ty.Optional[Response]:
+    """Send cached content from `path`; return None when file was already
+    removed from cache."""
+    try:
+        # opened file is available even when evicted from cache meanwhile
+        ifile = open(path, "rb")  # pylint: disable=consider-using-with
+    except FileNotFoundError:
+        return None
+
+    stat = os.fstat(ifile.fileno())
+    resp = send_file(
+        ifile,
+        mimetype=meta.content_type,
+        etag=False,
+        last_modified=parse_date(meta.last_modified) or stat.st_mtime,
+        conditional=False,
+    )
+    resp.content_length = stat.st_size
+    # pass original (also weak) etag unchanged
+    resp.headers["ETag"] = (
+        meta.etag or f'"{int(stat.st_mtime)}-{stat.st_size}"'
+    )
+    resp = resp.make_conditional(
+        request, accept_ranges=True, complete_length=stat.st_size
+    )
+    if resp.status_code == 304:
+        ifile.close()
+
+    return resp
+
+
+def _buffer(
+    resp: requests.Response, max_size: int
+) -> ty.Optional[ty.Tuple[ty.IO[bytes], int]]:
+    """Read whole content of `resp` into temporary file; return file and
+    size of content or None when content is bigger than `max_size`."""
+    buf = tempfile.SpooledTemporaryFile(max_size=_SPOOL_SIZE)
+    size = 0
+    try:
+        for chunk in resp.iter_content(_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                buf.close()
+                return None
+
+            buf.write(chunk)
+    except Exception:
+        buf.close()
+        raise
+    finally:
+        resp.close()
+
+    buf.seek(0)
+    return buf, size  # type: ignore
+
+
+def _read_chunks(ifile: ty.IO[bytes]) -> ty.Iterator[bytes]:
+    while chunk := ifile.read(_CHUNK_SIZE):
+        yield chunk
+
+
+def _stream(
+    chunks: ty.Iterator[bytes],
+    close: ty.Callable[[], None],
+    meta: CacheMeta,
+    max_size: int,
+    cache: ty.Optional[DiskCache],
+) -> ty.Iterator[bytes]:
+    """Stream `chunks` to client and, if possible, to `cache`; call `close`
+    on finish."""
+    ofile, tmpname = cache.new_tempfile() if cache else (None, None)
+    completed = False
+    size = 0
+    try:
+        for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                # content is longer than declared content-length; client
+                # get incomplete response
+                _LOG.info("proxy: response for %s is too big", meta.url)
+                return
+
+            if ofile:
+                ofile.write(chunk)
+
+            yield chunk
+
+        completed = True
+    finally:
+        close()
+        if ofile and tmpname:
+            ofile.close()
+            if completed and cache:
+                meta.size = size
+                cache.put(meta, tmpname)
+            else:
+                os.unlink(tmpname)
+
+
+def _parse_content_length(headers: ty.Mapping[str, str]) -> ty.Optional[int]:
+    """Get content length from `headers`; None when it is missing or
+    invalid (then content is handled as of unknown length)."""
+    try:
+        length = int(headers.get("content-length") or "")
+    except ValueError:
+        return None
+
+    return length if length >= 0 else None
+
+
+def _request(path: str, headers: ty.Dict[str, str]) -> requests.Response:
+    try:
+        resp = requests.get(path, timeout=30, stream=True, headers=headers)
+    except requests.exceptions.RequestException as err:
+        _LOG.info("proxy request to %s error: %s", path, err)
+        abort(502)
+
+    _LOG.debug("proxy request result: status: %r", resp.status_code)
+    return resp
 
 
 @BP.route("/<path:path>", methods=["GET"])
 def proxy(path: str) -> ty.Any:
     _LOG.debug("proxy request to: %s", path)
 
-    resp = requests.get(path, timeout=30)
-    headers = [
+    cache = _get_cache()
+    cached = cache.get(path) if cache else None
+    headers = {}
+    if cached:
+        meta, cached_path = cached
+        if meta.is_fresh() and (sent := _send_cached(meta, cached_path)):
+            return sent
+
+        # revalidate
+        if meta.etag:
+            headers["If-None-Match"] = meta.etag
+        if meta.last_modified:
+            headers["If-Modified-Since"] = meta.last_modified
+
+    resp = _request(path, headers)
+
+    if cached and cache and resp.status_code == 304:
+        resp.close()
+        meta, cached_path = cached
+        if meta.update_expires(resp.headers):
+            cache.update_meta(meta)
+        else:
+            cache.remove(path)
+
+        if sent := _send_cached(meta, cached_path):
+            return sent
+
+        # cached content was evicted meanwhile
+        resp = _request(path, {})
+
+    if resp.status_code != 200:
+        resp.close()
+        return Response(status=resp.status_code)
+
+    content_type = resp.headers.get("content-type", "")
+    if not content_type.startswith(_ALLOWED_TYPES):
+        resp.close()
+        _LOG.info("proxy: invalid content type %r", content_type)
+        return abort(415)
+
+    max_size = _max_size()
+    content_length = _parse_content_length(resp.headers)
+    if content_length is not None and content_length > max_size:
+        resp.close()
+        return abort(413)
+
+    meta = CacheMeta(
+        url=path,
+        content_type=content_type,
+        etag=resp.headers.get("etag"),
+        last_modified=resp.headers.get("last-modified"),
+    )
+    if cache and not meta.update_expires(resp.headers):
+        cache.remove(path)
+        cache = None
+
+    resp_headers = [
         (name, value)
-        for (name, value) in resp.raw.headers.items()
-        if name.lower() not in _EXCLUDED_HEADERS
+        for (name, value) in resp.headers.items()
+        if name.lower() in _PASSED_HEADERS
     ]
 
-    _LOG.debug("proxy request result: status: %r", resp.status_code)
-    return Response(resp.content, resp.status_code, headers)
+    if content_length is not None and not resp.headers.get("content-encoding"):
+        # size is known; stream content
+        resp_headers.append(("Content-Length", str(content_length)))
+        chunks = resp.iter_content(_CHUNK_SIZE)
+        close = resp.close
+    else:
+        # size of (decoded) content is unknown; load it before sending
+        # headers to not send truncated content as successful response
+        buffered = _buffer(resp, max_size)
+        if buffered is None:
+            _LOG.info("proxy: response for %s is too big", path)
+            return abort(413)
+
+        buf, size = buffered
+        resp_headers.append(("Content-Length", str(size)))
+        chunks = _read_chunks(buf)
+        close = buf.close
+
+    return Response(
+        _stream(chunks, close, meta, max_size, cache),
+        200,
+        resp_headers,
+        direct_passthrough=True,
+    )
@@ -0,0 +1,137 @@
+# pylint: skip-file
+# type: ignore
+"""
+Copyright (c) Karol Będkowski, 2022
+
+This file is part of webmon.
+Licence: GPLv2+
+"""
+
+import os
+import tempfile
+import time
+import unittest
+
+from flask import Flask
+
+from . import proxy
+
+
+def _put(cache, url, content):
+    ofile, tmpname = cache.new_tempfile()
+    with ofile:
+        ofile.write(content)
+
+    meta = proxy.CacheMeta(url=url, content_type="image/png")
+    meta.size = len(content)
+    cache.put(meta, tmpname)
+
+
+class TestDiskCache(unittest.TestCase):
+    def test_put_get(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = proxy.DiskCache(tmpdir, 100)
+            self.assertIsNone(cache.get("http://a"))
+            _put(cache, "http://a", b"1234")
+            meta, path = cache.get("http://a")
+            self.assertEqual(meta.url, "http://a")
+            self.assertEqual(meta.size, 4)
+            with open(path, "rb") as ifile:
+                self.assertEqual(ifile.read(), b"1234")
+
+            # reload index from disk
+            cache = proxy.DiskCache(tmpdir, 100)
+            self.assertIsNotNone(cache.get("http://a"))
+
+    def test_evict(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = proxy.DiskCache(tmpdir, 10)
+            _put(cache, "http://a", b"1234")
+            _put(cache, "http://b", b"1234")
+            self.assertIsNotNone(cache.get("http://a"))
+            # "b" is least recently used
+            _put(cache, "http://c", b"1234")
+            self.assertIsNone(cache.get("http://b"))
+            self.assertIsNotNone(cache.get("http://a"))
+            self.assertIsNotNone(cache.get("http://c"))
+            self.assertEqual(len(os.listdir(tmpdir)), 4)
+
+
+class TestCacheMeta(unittest.TestCase):
+    def test_expires(self):
+        meta = proxy.CacheMeta(url="http://a", content_type="image/png")
+        self.assertTrue(meta.update_expires({"cache-control": "max-age=60"}))
+        self.assertTrue(meta.is_fresh())
+        self.assertTrue(meta.expires <= time.time() + 60)
+
+        self.assertTrue(meta.update_expires({"cache-control": "no-cache"}))
+        self.assertFalse(meta.is_fresh())
+
+        self.assertFalse(meta.update_expires({"cache-control": "no-store"}))
+
+
+class _Resp:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    def iter_content(self, _size):
+        return iter(self.chunks)
+
+    def close(self):
+        self.closed = True
+
+
+class TestBuffer(unittest.TestCase):
+    def test_buffer(self):
+        resp = _Resp([b"12", b"34"])
+        buf, size = proxy._buffer(resp, 4)
+        self.assertEqual(buf.read(), b"1234")
+        self.assertEqual(size, 4)
+        self.assertTrue(resp.closed)
+
+    def test_too_big(self):
+        resp = _Resp([b"12", b"345"])
+        self.assertIsNone(proxy._buffer(resp, 4))
+        self.assertTrue(resp.closed)
+
+
+class TestContentLength(unittest.TestCase):
+    def test_parse(self):
+        self.assertEqual(
+            proxy._parse_content_length({"content-length": "12"}), 12
+        )
+        self.assertIsNone(proxy._parse_content_length({}))
+        self.assertIsNone(
+            proxy._parse_content_length({"content-length": "1, 2"})
+        )
+        self.assertIsNone(
+            proxy._parse_content_length({"content-length": "-1"})
+        )
+
+
+class TestSendCached(unittest.TestCase):
+    def test_send(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = proxy.DiskCache(tmpdir, 100)
+            _put(cache, "http://a", b"1234")
+            meta, path = cache.get("http://a")
+            meta.etag = 'W/"x"'
+            with Flask(__name__).test_request_context():
+                resp = proxy._send_cached(meta, path)
+                self.assertEqual(resp.headers["ETag"], 'W/"x"')
+                self.assertEqual(resp.content_length, 4)
+                resp.close()
+
+    def test_evicted(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = proxy.DiskCache(tmpdir, 100)
+            _put(cache, "http://a", b"1234")
+            meta, path = cache.get("http://a")
+            os.unlink(path)
+            with Flask(__name__).test_request_context():
+                self.assertIsNone(proxy._send_cached(meta, path))
+
+
+if __name__ == "__main__":
+    unittest.main()
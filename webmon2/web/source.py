@@ -57,6 +57,7 @@ def source_delete(source_id: int) -> ty.Any:
 
     database.sources.delete(db, source_id)
     db.commit()
+    filters.invalidate_pipeline(source_id)
     flash(gettext("Source deleted"))
     return redirect(request.args.get("back") or url_for("root.sources"))
 
@@ -176,6 +177,7 @@ def source_entries(
             unread=unread,
             limit=c.PAGE_LIMIT,
             offset=offset,
+            shape=database.entries.SHAPE_LIST,
         )
     )
 
@@ -185,6 +187,7 @@ def source_entries(
 
     data = c.preprate_entries_list(entries, page, total_entries, "update")
 
+    c.set_mark_read_on_scroll(db, user_id, unread)
     return render_template(
         "source_entries.html", source=source, showed=mode, **data
     )
@@ -197,12 +200,17 @@ def source_mark_read(source_id: int) -> ty.Any:
     min_id = int(request.args.get("min_id", -1))
     max_id = int(request.args["max_id"])
     user_id = session["user"]
-    r_ids = request.args.get("ids")
-    ids = list(map(int, r_ids.split(","))) if r_ids else None
-
-    marked = database.sources.mark_read(
-        db, user_id, source_id, max_id=max_id, min_id=min_id, ids=ids
+    ids = c.parse_ids(request.form.get("ids") or request.args.get("ids"))
+
+    res = database.entries.mark_read_many(
+        db,
+        user_id,
+        ids=ids,
+        ranges=None if ids else [(min_id, max_id)],
+        source_ids=[source_id],
+        unread_only=True,
     )
+    marked = res.changed
     db.commit()
     if request.args.get("go") == "next":
         n_source_id = database.sources.find_next_unread(db, user_id)
@@ -337,6 +345,7 @@ def _save_filter(
 ) -> ty.Any:
     database.sources.update_filter(db, source_id, idx, conf)
     db.commit()
+    filters.invalidate_pipeline(source_id)
     flash("Filter saved")
     return redirect(url_for("source.source_filters", source_id=source_id))
 
@@ -347,6 +356,7 @@ def source_filter_move(source_id: int, idx: int, move: str) -> ty.Any:
     user_id = session["user"]
     database.sources.move_filter(db, user_id, source_id, idx, move)
     db.commit()
+    filters.invalidate_pipeline(source_id)
     return redirect(url_for("source.source_filters", source_id=source_id))
 
 
@@ -356,6 +366,7 @@ def source_filter_delete(source_id: int, idx: int) -> ty.Any:
     user_id = session["user"]
     database.sources.delete_filter(db, user_id, source_id, idx)
     db.commit()
+    filters.invalidate_pipeline(source_id)
     return redirect(url_for("source.source_filters", source_id=source_id))
 
 
@@ -376,13 +387,11 @@ def source_entry(source_id: int, mode: str, entry_id: int) -> ty.Any:
         return abort(404)
 
     if entry.read_mark == model.EntryReadMark.UNREAD:
-        database.entries.mark_read(
-            db,
-            user_id,
-            entry_id=entry_id,
-            read=model.EntryReadMark.MANUAL_READ,
+        res = database.entries.mark_read_many(
+            db, user_id, ids=[entry_id], read=model.EntryReadMark.MANUAL_READ
         )
         entry.read_mark = model.EntryReadMark.MANUAL_READ
+        c.update_unread_count(res.unread_delta)
         db.commit()
 
     unread = mode != "all"
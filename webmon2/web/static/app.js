@@ -124,6 +124,63 @@
 				});
 			};
 		});
+		let mark_batch_url = getMetaValue("_app_entries_mark_batch_api");
+		if (mark_batch_url && "IntersectionObserver" in window) {
+			// mark entries read when scrolled above view; ids are collected
+			// and send in batches
+			let pending = new Map();
+			let timer = null;
+
+			function updateUnreadCount(numCount) {
+				let val = (numCount > 0) ? "(" + numCount + ")" : "";
+				document.querySelectorAll(".entries_unread_cnt").forEach((field) => {
+					field.innerHTML = val;
+				});
+			}
+
+			function flushPending() {
+				timer = null;
+				if (pending.size == 0) return;
+				let articles = pending;
+				pending = new Map();
+				fetch(mark_batch_url, {
+					method: "POST",
+					headers: {
+						"Content-Type": "application/json",
+						"X-CSRF-Token": getMetaValue("_app_csrf"),
+					},
+					body: JSON.stringify({ids: Array.from(articles.keys()).map(Number)}),
+					keepalive: true,
+				}).then((resp) => {
+					return resp.json();
+				}).then((data) => {
+					articles.forEach((article) => {
+						article.dataset["state"] = "read";
+						let link = article.querySelector('a[data-action="mark_read"]');
+						if (link) link.innerText = data.title;
+					});
+					updateUnreadCount(data.unread);
+				}).catch((error) => {
+					window.console.log(error);
+				});
+			}
+
+			let observer = new IntersectionObserver((entries) => {
+				entries.forEach((entry) => {
+					let article = entry.target;
+					if (entry.isIntersecting || entry.boundingClientRect.bottom > 0) return;
+					observer.unobserve(article);
+					if (article.dataset["state"] == "read") return;
+					pending.set(article.dataset["entryId"], article);
+					if (timer === null) timer = window.setTimeout(flushPending, 1000);
+				});
+			});
+			document.querySelectorAll("article[data-entry-id]").forEach((element) => {
+				observer.observe(element);
+			});
+			window.addEventListener("pagehide", flushPending);
+		}
+
 		document.querySelectorAll("a[data-req-confirm=yes]").forEach((element) => {
 			element.onclick = handleConfirm;
 		});
@@ -25,19 +25,30 @@ except ImportError:
 
 from flask import (
     Blueprint,
+    Response,
     abort,
     current_app,
     flash,
-    make_response,
     redirect,
     render_template,
     request,
     session,
+    stream_with_context,
     url_for,
 )
 from flask_babel import gettext, ngettext
-
-from webmon2 import VERSION, common, database, imp_exp, model, opml, security
+from gevent import get_hub
+
+from webmon2 import (
+    VERSION,
+    common,
+    database,
+    imp_exp,
+    model,
+    opml,
+    profiler,
+    security,
+)
 
 from . import _commons as c
 from . import forms
@@ -187,18 +198,30 @@ def sett_data() -> ty.Any:
 def sett_data_export() -> ty.Any:
     db = c.get_db()
     user_id = session["user"]
-    content = imp_exp.dump_export(db, user_id)
-    headers = {"Content-Disposition": "attachment; filename=dump.json"}
-    return make_response((content, headers))
+    headers = {
+        "Content-Disposition": "attachment; filename=dump.json",
+        "Cache-Control": "no-cache, max-age=0",
+    }
+    return Response(
+        stream_with_context(imp_exp.iter_export(db, user_id)),
+        mimetype="application/json",
+        headers=headers,
+    )
 
 
 @BP.route("/settings/data/export/opml")
 def sett_data_export_opml() -> ty.Any:
     db = c.get_db()
     user_id = session["user"]
-    content = opml.dump_data(db, user_id)
-    headers = {"Content-Disposition": "attachment; filename=dump.opml"}
-    return make_response((content, headers))
+    headers = {
+        "Content-Disposition": "attachment; filename=dump.opml",
+        "Cache-Control": "no-cache, max-age=0",
+    }
+    return Response(
+        stream_with_context(opml.iter_dump_data(db, user_id)),
+        mimetype="text/x-opml",
+        headers=headers,
+    )
 
 
 @BP.route("/settings/data/import", methods=["POST"])
@@ -468,6 +491,52 @@ def sys_info() -> ty.Any:
         settings=settings,
         app_conf=current_app.config["app_conf"],
         db_tab_sizes=db_tab_sizes,
+        slow_queries=database.system.get_slow_queries(),
+    )
+
+
+@BP.route("/settings/system/profile")
+def sys_profile() -> ty.Any:
+    """Profile application for `seconds` and return stacks in collapsed
+    (flamegraph) format."""
+    if not session["user_admin"]:
+        abort(403)
+
+    seconds = request.args.get("seconds", 10, type=float)
+    interval = request.args.get("interval", 10, type=float)  # ms
+    if not 0 < seconds <= profiler.MAX_DURATION or interval < 1:
+        abort(400)
+
+    try:
+        # run sampler in real thread; block only current greenlet
+        stacks = get_hub().threadpool.apply(
+            profiler.sample, (seconds, interval / 1000)
+        )
+    except profiler.ProfilerBusyError:
+        abort(409)
+
+    now = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    return Response(
+        profiler.format_collapsed(stacks),
+        mimetype="text/plain",
+        headers={
+            "Content-Disposition": "attachment; "
+            f"filename=webmon2_profile_{now}.txt",
+            "Cache-Control": "no-cache",
+        },
+    )
+
+
+@BP.route("/settings/system/slow_sources")
+def sys_slow_sources() -> ty.Any:
+    if not session["user_admin"]:
+        abort(403)
+
+    days = request.args.get("days", 7, type=int)
+    db = c.get_db()
+    slow_sources = database.system.get_slowest_sources(db, days)
+    return render_template(
+        "system/slow_sources.html", slow_sources=slow_sources, days=days
     )
 
 
@@ -490,6 +559,7 @@ def _translate_sett_descr(
         "mail_html": gettext("Email: send miltipart email with html content"),
         "mail_mark_read": gettext("Email: mark reported entries read"),
         "start_at_unread_group": gettext("Start at first unread group"),
+        "mark_read_on_scroll": gettext("Mark entries read when scrolled"),
         "gitlab_token": gettext("GitLab: personal token"),
         "silent_hours_from": gettext("Silent hours: begin"),
         "silent_hours_to": gettext("Silent hours: end"),
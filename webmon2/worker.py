@@ -20,13 +20,24 @@ import re
 import threading
 import time
 import typing as ty
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from configparser import ConfigParser
 
 from flask import Flask
 from flask_babel import Babel, force_locale
 from prometheus_client import Counter
 
-from . import common, database, filters, formatters, mailer, model, sources
+from . import (
+    common,
+    database,
+    filters,
+    formatters,
+    mailer,
+    model,
+    shared_fetch,
+    sources,
+    tracing,
+)
 
 _LOG = logging.getLogger(__name__)
 _SOURCES_PROCESSED = Counter(
@@ -40,6 +51,10 @@ _WORKER_PROCESSING_TIME = Counter(
     "Worker processing time",
 )
 _ENTRIES_LOADED = Counter("webmon2_entries_loaded", "Entries loaded count")
+_SOURCES_TRUNCATED = Counter(
+    "webmon2_sources_truncated",
+    "Number of sources which entries were truncated due to limits",
+)
 _CLEAN_COUNTER = Counter(
     "webmon2_clean_items",
     "Number of deleted entries",
@@ -82,6 +97,16 @@ class CheckWorker(threading.Thread):
             15 if self._debug else self._conf.getint("main", "work_interval")
         )
         self._app = _create_app()
+        self._shared_fetch = conf.getboolean(
+            "main", "shared_fetch", fallback=True
+        )
+        # data loaded in current round shared between sources
+        self._shared: ty.Optional[shared_fetch.SharedFetches] = None
+        tracing.configure(conf.get("main", "trace_file", fallback=""))
+        # mail reports are rendered and sent in separate thread
+        self._mail_worker: ty.Optional[MailWorker] = None
+        if conf.getboolean("smtp", "enabled", fallback=False):
+            self._mail_worker = MailWorker(conf)
 
     def _notify(self, msg: str) -> None:
         """
@@ -97,6 +122,14 @@ class CheckWorker(threading.Thread):
             self._work_interval,
         )
         gc_cntr = 0
+        database.users.start_log_writer(
+            self._conf.getint("main", "user_logs_batch", fallback=100),
+            self._conf.getfloat("main", "user_logs_interval", fallback=5),
+            self._conf.getint("main", "user_logs_queue", fallback=10000),
+        )
+        if self._mail_worker:
+            self._mail_worker.start()
+
         time.sleep(15)  # initial sleep
         while True:
             self._notify("STATUS=processing")
@@ -105,11 +138,17 @@ class CheckWorker(threading.Thread):
                 try:
                     now = time.time()
                     if now > self._next_cleanup_start:
-                        _delete_old_entries(db)
+                        _delete_old_entries(
+                            db,
+                            self._conf.getint(
+                                "main", "user_logs_keep_days", fallback=7
+                            ),
+                        )
                         self._next_cleanup_start = now + _CLEANUP_INTERVAL
 
                     _LOG.debug("CheckWorker check start")
-                    ids = database.sources.get_sources_to_fetch(db)
+                    ids = self._get_sources_to_fetch(db)
+                    _prefetch_sources(db, ids)
                     for id_ in ids:
                         self._todo_queue.put(id_)
 
@@ -123,9 +162,11 @@ class CheckWorker(threading.Thread):
                         for worker in workers:
                             worker.join()
 
+                    self._shared = None
+
                     _LOG.debug("CheckWorker check done")
-                    self._notify("STATUS=mailing")
-                    _send_mails(db, self._conf)
+                    if self._mail_worker:
+                        self._mail_worker.trigger()
                 except Exception as err:  # pylint: disable=broad-except
                     _LOG.exception("CheckWorker thread error: %s", err)
 
@@ -139,16 +180,96 @@ class CheckWorker(threading.Thread):
             self._notify("STATUS=running")
             time.sleep(self._work_interval)
 
+    def _get_sources_to_fetch(self, db: database.DB) -> ty.List[int]:
+        """Get sources to fetch; prepare sharing loaded data between
+        similar sources."""
+        grouped = database.sources.get_sources_to_fetch_grouped(db)
+        if self._shared_fetch:
+            self._shared = shared_fetch.SharedFetches(
+                (id_ for id_, similar in grouped if similar),
+                self._conf.getfloat(
+                    "main", "shared_fetch_timeout", fallback=120
+                ),
+            )
+            _LOG.debug(
+                "CheckWorker: %d sources may be shared", len(self._shared)
+            )
+
+        return [id_ for id_, _similar in grouped]
+
     def _start_worker(self, idx: int) -> FetchWorker:
-        worker = FetchWorker(str(idx), self._todo_queue, self._conf, self._app)
+        worker = FetchWorker(
+            str(idx), self._todo_queue, self._conf, self._app, self._shared
+        )
         worker.start()
         _LOG.debug("CheckWorker worker %s started", idx)
         return worker
 
 
+def _prefetch_sources(db: database.DB, ids: ty.List[int]) -> None:
+    """Let sources prepare for loading, i.e. check for updates of many
+    sources in one request."""
+    kinds = sources.prefetch_kinds()
+    if not ids or not kinds:
+        return
+
+    users_settings: ty.Dict[int, ty.Dict[str, ty.Any]] = {}
+    srcs = []
+    for source in database.sources.get_by_kinds(db, ids, kinds):
+        sys_settings = users_settings.get(source.user_id)
+        if sys_settings is None:
+            sys_settings = users_settings[
+                source.user_id
+            ] = database.settings.get_dict(db, source.user_id)
+
+        try:
+            srcs.append(sources.get_source(source, sys_settings))
+        except Exception as err:  # pylint: disable=broad-except
+            _LOG.debug("prefetch: create source %d error %s", source.id, err)
+
+    sources.prefetch(srcs)
+
+
+class MailWorker(threading.Thread):
+    """Thread that prepare and send mail reports after each fetch round.
+
+    Reports are rendered and encrypted in pool of `smtp.workers` threads and
+    then sent by this thread.
+    """
+
+    def __init__(self, conf: ConfigParser) -> None:
+        threading.Thread.__init__(self, daemon=True, name="mail-worker")
+        self._conf = conf
+        self._event = threading.Event()
+        self._executor = ThreadPoolExecutor(
+            max_workers=conf.getint("smtp", "workers", fallback=2),
+            thread_name_prefix="mail-prepare",
+        )
+
+    def trigger(self) -> None:
+        """Request sending reports."""
+        self._event.set()
+
+    def run(self) -> None:
+        _LOG.info("MailWorker started")
+        while True:
+            self._event.wait()
+            self._event.clear()
+            with database.DB.get() as db:
+                try:
+                    _send_mails(db, self._conf, self._executor)
+                except Exception as err:  # pylint: disable=broad-except
+                    _LOG.exception("MailWorker thread error: %s", err)
+
+
 class FetchWorker(threading.Thread):
     def __init__(
-        self, idx: str, todo_queue: queue.Queue[int], conf: ConfigParser, app
+        self,
+        idx: str,
+        todo_queue: queue.Queue[int],
+        conf: ConfigParser,
+        app,
+        shared: ty.Optional[shared_fetch.SharedFetches] = None,
     ) -> None:
         threading.Thread.__init__(self)
         # id of thread
@@ -158,6 +279,8 @@ class FetchWorker(threading.Thread):
         # app configuration
         self._conf: ConfigParser = conf
         self._app = app
+        # data loaded by other workers in this round
+        self._shared = shared
 
     def run(self) -> None:
         while not self._todo_queue.empty():
@@ -207,10 +330,31 @@ class FetchWorker(threading.Thread):
 
         assert source.state and src
 
+        tracer = tracing.Tracer(
+            "process_source",
+            source.kind,
+            **{"source.id": source.id, "user.id": source.user_id},
+        )
+        try:
+            self._process_source_traced(
+                db, source, src, sys_settings, tracer, start
+            )
+        finally:
+            tracer.finish()
+
+    def _process_source_traced(
+        self,
+        db: database.DB,
+        source: model.Source,
+        src: sources.AbstractSource,
+        sys_settings: ty.Dict[str, ty.Any],
+        tracer: tracing.Tracer,
+        start: float,
+    ) -> None:
         with self._app.test_request_context():
             with force_locale(sys_settings.get("locale", "en")):
                 new_state, loaded = self._load_data(
-                    db, source, src, sys_settings
+                    db, source, src, sys_settings, tracer
                 )
 
         if not new_state:
@@ -221,20 +365,30 @@ class FetchWorker(threading.Thread):
         new_state.set_prop(
             "last_update_duration", f"{time.time() - start:0.2f}"
         )
-        database.sources.save_state(db, new_state, source.user_id)
+        with tracer.stage("db.save_state"):
+            database.sources.save_state(db, new_state, source.user_id)
+
         # if source was updated - save new version
         updated_source = src.updated_source
         if updated_source:
             _LOG.debug("[%s] source %d updated", self._idx, source.id)
-            database.sources.save(db, updated_source)
+            with tracer.stage("db.save_source"):
+                database.sources.save(db, updated_source)
 
         if loaded:
-            database.users.put_log(
-                db,
-                source.user_id,
-                f"process source {source.name} finished; loaded {loaded}",
-                source_id=source.id,
-            )
+            with tracer.stage("db.put_log"):
+                database.users.put_log(
+                    db,
+                    source.user_id,
+                    f"process source {source.name} finished; loaded {loaded}",
+                    source_id=source.id,
+                )
+
+        durations = tracer.durations
+        fetch_time = durations["load"] + durations["load.entries"]
+        database.system.save_source_timing(
+            db, source.id, fetch_time, time.time() - start - fetch_time
+        )
 
         _LOG.debug(
             "[%s] processing source %d FINISHED, entries=%d, state=%s",
@@ -250,9 +404,23 @@ class FetchWorker(threading.Thread):
         source: model.Source,
         src,
         sys_settings: ty.Dict[str, ty.Any],
+        tracer: tracing.Tracer,
     ):
         # load data
-        new_state, entries = src.load(source.state)
+        with tracer.stage("load"):
+            if self._shared is not None:
+                new_state, entries = self._shared.load(
+                    src,
+                    source,
+                    lambda entries: self._limit_entries(source, entries),
+                )
+            else:
+                new_state, entries = src.load(source.state)
+
+        # sources may return generators; measure lazy part of loading too
+        entries = tracer.wrap(
+            "load.entries", self._limit_entries(source, entries)
+        )
         if new_state.status == model.SourceStateStatus.ERROR:
             # stop processing source when error occurred
             _save_state_error(
@@ -290,29 +458,84 @@ class FetchWorker(threading.Thread):
         # filter entries
         if source.filters:
             entries = filters.filter_by(
-                source.filters, entries, source.state, new_state, db
+                source.filters,
+                entries,
+                source.state,
+                new_state,
+                db,
+                tracer,
+                source.id,
             )
 
         # process entriec, calcuate oids, sanitize content
-        entries = self._final_filter_entries(entries)
+        entries = tracer.wrap(
+            "final_filter", self._final_filter_entries(entries)
+        )
         # calculate scoring & update entries state
-        entries = self._score_entries(
-            entries, db, source.user_id, sys_settings
+        entries = tracer.wrap(
+            "score",
+            self._score_entries(entries, db, source.user_id, sys_settings),
         )
-        entries = list(entries)
-        if entries:
-            # save entries
-            max_date = max(entry.updated for entry in entries if entry.updated)
-            new_state.set_prop("last_entry_date", str(max_date))
-            database.entries.save_many(db, entries)
-            database.groups.update_state(db, source.group_id, max_date)
-            icon = entries[0].icon
+        # entries flow through all stages and are saved in chunks
+        chunk_size = self._conf.getint(
+            "main", "entries_chunk_size", fallback=100
+        )
+        loaded = 0
+        max_date = None
+        for chunk in common.chunked(entries, chunk_size):
+            with tracer.stage("db.save_entries"):
+                database.entries.save_many(db, chunk)
+
+            loaded += len(chunk)
+            dates = [entry.updated for entry in chunk if entry.updated]
+            if dates:
+                max_date = max(max_date or dates[0], *dates)
+
+            icon = chunk[0].icon
             if not new_state.icon and icon:
                 new_state.icon = icon
 
-            _ENTRIES_LOADED.inc(len(entries))
+        if loaded:
+            _ENTRIES_LOADED.inc(loaded)
+            with tracer.stage("db.update_stats"):
+                database.stats.refresh(db, (source.id,))
+
+        if max_date:
+            new_state.set_prop("last_entry_date", str(max_date))
+            with tracer.stage("db.update_group"):
+                database.groups.update_state(db, source.group_id, max_date)
 
-        return new_state, len(entries)
+        return new_state, loaded
+
+    def _limit_entries(
+        self, source: model.Source, entries: model.Entries
+    ) -> model.Entries:
+        """Stop loading entries from `source` when number of entries or
+        size of its content exceed limits."""
+        max_entries = self._conf.getint(
+            "main", "source_max_entries", fallback=5000
+        )
+        max_size = (
+            self._conf.getint("main", "source_max_size", fallback=50)
+            * 1024
+            * 1024
+        )
+        size = 0
+        for idx, entry in enumerate(entries):
+            size += len(entry.content or "")
+            if idx >= max_entries or size > max_size:
+                _LOG.warning(
+                    "[%s] source %d: too many entries or too big content; "
+                    "loaded %d entries, %d bytes; rest skipped",
+                    self._idx,
+                    source.id,
+                    idx,
+                    size,
+                )
+                _SOURCES_TRUNCATED.inc()
+                return
+
+            yield entry
 
     def _final_filter_entries(self, entries: model.Entries) -> model.Entries:
         """
@@ -417,13 +640,14 @@ class FetchWorker(threading.Thread):
         return src
 
 
-def _delete_old_entries(db: database.DB) -> None:
+def _delete_old_entries(db: database.DB, logs_keep_days: int = 7) -> None:
     """
     Remove old data from database.
     For each user:
         1. find and delete old entries
         2. remove unused binaries
         3. remove old source states
+    Then delete old user logs (for all users, in batches).
     """
     users = list(database.users.get_all(db))
     for user in users:
@@ -454,10 +678,6 @@ def _delete_old_entries(db: database.DB) -> None:
             _LOG.info("removed %d binaries for user %d", removed, user.id)
             _CLEAN_COUNTER.labels(user.id, "binaries").inc(removed)
 
-            removed = database.users.delete_old_log(db, user.id)
-            _LOG.info("removed %d logs for user %d", removed, user.id)
-            _CLEAN_COUNTER.labels(user.id, "logs").inc(removed)
-
             db.commit()
         except Exception as err:  # pylint: disable=broad-except
             db.rollback()
@@ -474,36 +694,79 @@ def _delete_old_entries(db: database.DB) -> None:
         db.rollback()
         _LOG.warning("_delete_old_entries error: %s", err)
 
+    _delete_old_logs(db, logs_keep_days)
+
     # delete expired sessions
     db.begin()
     cnt = database.system.delete_expired_sessions(db)
     _LOG.info("deleted %d expired sessions", cnt)
     db.commit()
 
+    db.begin()
+    cnt = database.system.delete_old_source_timing(db)
+    _LOG.info("deleted %d source timing records", cnt)
+    _CLEAN_COUNTER.labels("", "source_timing").inc(cnt)
+    db.commit()
 
-def _send_mails(db: database.DB, conf: ConfigParser) -> None:
-    """
-    For each user search and send reports by mail.
 
-    """
-    if not conf.getboolean("smtp", "enabled", fallback=False):
-        _LOG.debug("_send_mails disabled")
-        return
+def _delete_old_logs(db: database.DB, keep_days: int) -> None:
+    """Delete user logs older than `keep_days` in batches; commit each batch
+    to not lock table for long time."""
+    limit = 10000
+    total = 0
+    try:
+        while True:
+            db.begin()
+            cnt = database.users.delete_old_logs(db, keep_days, limit)
+            db.commit()
+            total += cnt
+            if cnt < limit:
+                break
 
+    except Exception as err:  # pylint: disable=broad-except
+        db.rollback()
+        _LOG.warning("_delete_old_logs error: %s", err)
+
+    _LOG.info("deleted %d old user logs", total)
+    _CLEAN_COUNTER.labels("", "logs").inc(total)
+
+
+def _prepare_mail(
+    user: model.User, conf: ConfigParser
+) -> ty.Optional[mailer.Report]:
+    with database.DB.get() as db:
+        return mailer.prepare(db, user, conf)
+
+
+def _send_mails(
+    db: database.DB, conf: ConfigParser, executor: ThreadPoolExecutor
+) -> None:
+    """
+    For each user search and send reports by mail. Reports are prepared
+    by `executor`; all messages are sent using one SMTP connection.
+    """
     _LOG.debug("_send_mails start")
     users = list(database.users.get_all_active(db))
-    for user in users:
-        assert user.id
-        db.begin()
-        try:
-            if mailer.process(db, user, conf):
-                database.users.put_log(db, user.id, "send mail success")
-        except Exception as err:  # pylint: disable=broad-except
-            _LOG.exception("send mail error")
-            db.rollback()
-            database.users.put_log(db, user.id, f"send mail error {err}")
-        else:
-            db.commit()
+    db.commit()
+    futures = {
+        executor.submit(_prepare_mail, user, conf): user for user in users
+    }
+    with mailer.SmtpConnection(conf) as smtp:
+        for future in as_completed(futures):
+            user = futures[future]
+            assert user.id
+            db.begin()
+            try:
+                report = future.result()
+                if report and mailer.send(db, report, smtp):
+                    database.users.put_log(db, user.id, "send mail success")
+            except Exception as err:  # pylint: disable=broad-except
+                _LOG.exception("send mail error")
+                db.rollback()
+                database.users.put_log(db, user.id, f"send mail error {err}")
+                db.commit()
+            else:
+                db.commit()
 
     _LOG.debug("_send_mails end")
 